@@ -8,15 +8,25 @@
 """
 PEFFORT (Project Effort) Module - Analisi avanzata di file FIT
 Main exports: EffortAnalyzer GUI, engine functions, configuration classes, inspection tools
+
+Le classi GUI (PySide6/QtWebEngine) sono importate solo al primo accesso: engine,
+report PDF e batch restano utilizzabili su macchine senza librerie grafiche.
 """
 
-from .peffort_gui import EffortAnalyzer
+from importlib import import_module
+
 from .peffort_engine import parse_fit, create_efforts, detect_sprints, merge_extend, split_included
-from .peffort_config import AnalysisConfig, AthleteProfile, EffortConfig, SprintConfig
+from .peffort_config import AnalysisConfig, AthleteProfile, EffortConfig, SprintConfig, ClimbConfig, QualityConfig
 from .peffort_exporter import create_pdf_report, plot_unified_html
-from .inspection_gui import InspectionTab
+from .report_pdf import render_pdf_report, export_pdf_reports
 from .inspection_core import InspectionManager
 from .inspection_builder import plot_inspection_figure
+from .season_store import SeasonStore
+from .mmp_envelope import SeasonEnvelope, ride_mmp
+from .season_mmp import RideMmpCache, scan_season_mmp, season_best_points
+from .climb_detection import detect_climbs, get_climb_index, ClimbIndex
+from .data_quality import clean_ride
+from .segment_index import SegmentIndex, build_segment_index, traversal_efforts
 
 __all__ = [
     'EffortAnalyzer',
@@ -29,9 +39,41 @@ __all__ = [
     'AthleteProfile',
     'EffortConfig',
     'SprintConfig',
+    'ClimbConfig',
+    'QualityConfig',
     'create_pdf_report',
     'plot_unified_html',
+    'render_pdf_report',
+    'export_pdf_reports',
     'InspectionTab',
     'InspectionManager',
-    'plot_inspection_figure'
+    'plot_inspection_figure',
+    'SeasonStore',
+    'SeasonEnvelope',
+    'ride_mmp',
+    'RideMmpCache',
+    'scan_season_mmp',
+    'season_best_points',
+    'detect_climbs',
+    'get_climb_index',
+    'ClimbIndex',
+    'SegmentIndex',
+    'build_segment_index',
+    'traversal_efforts',
+    'clean_ride'
 ]
+
+# Export GUI caricati su richiesta: nome -> modulo
+_LAZY_GUI_EXPORTS = {
+    'EffortAnalyzer': '.peffort_gui',
+    'InspectionTab': '.inspection_gui',
+}
+
+
+def __getattr__(name):
+    """Importa le classi GUI al primo accesso (PEP 562)"""
+    if name in _LAZY_GUI_EXPORTS:
+        value = getattr(import_module(_LAZY_GUI_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,235 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+CLIMB DETECTION - Rilevamento salite da altitudine e distanza
+Altitudine smussata, pendenza ricalcolata, segmentazione con isteresi, indice a intervalli
+"""
+
+from typing import List, Tuple, Dict, Optional
+import logging
+import weakref
+import numpy as np
+import pandas as pd
+
+from .peffort_config import ClimbConfig
+
+logger = logging.getLogger(__name__)
+
+# Soglie categoria (lunghezza [m] x pendenza media [%])
+CATEGORY_THRESHOLDS = ((80000, 'HC'), (64000, '1'), (32000, '2'), (16000, '3'), (8000, '4'))
+
+CLIMB_COLUMNS = ['start_idx', 'end_idx', 'start_time', 'duration', 'length_m', 'gain_m',
+                 'avg_grade', 'max_grade', 'vam', 'category']
+
+
+def _distance_window(distance: np.ndarray, half_width: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Per ogni campione gli indici [lo, hi) dei campioni entro ±half_width metri"""
+    lo = np.searchsorted(distance, distance - half_width, side='left')
+    hi = np.searchsorted(distance, distance + half_width, side='right')
+    return lo, hi
+
+
+def smooth_altitude(distance: np.ndarray, altitude: np.ndarray, window_m: float) -> np.ndarray:
+    """
+    Media mobile dell'altitudine su una finestra in metri (non in campioni).
+
+    Una finestra spaziale non dipende dalla velocità: in salita lenta i campioni
+    sono fitti e il rumore barometrico/GPS viene mediato sulla stessa distanza.
+    """
+    cum = np.concatenate(([0.0], np.cumsum(altitude)))
+    lo, hi = _distance_window(distance, window_m / 2)
+    return (cum[hi] - cum[lo]) / np.maximum(hi - lo, 1)
+
+
+def compute_grade(distance: np.ndarray, altitude: np.ndarray, base_m: float) -> np.ndarray:
+    """
+    Pendenza [%] come differenza centrata su base_m metri di altitudine smussata.
+
+    Ricalcolata dalla distanza perché il campo grade dei FIT è spesso 0.
+    """
+    lo, hi = _distance_window(distance, base_m / 2)
+    hi = hi - 1
+    run = distance[hi] - distance[lo]
+    rise = altitude[hi] - altitude[lo]
+    return np.where(run > base_m / 4, rise / np.where(run > 0, run, 1.0) * 100, 0.0)
+
+
+def _hysteresis(grade: np.ndarray, start_grade: float, end_grade: float) -> np.ndarray:
+    """
+    Stato salita per campione: si entra sopra start_grade e si esce sotto end_grade.
+
+    Tra le due soglie lo stato resta quello precedente (propagato senza loop
+    con l'indice dell'ultima soglia superata).
+    """
+    marks = np.where(grade >= start_grade, 1, np.where(grade < end_grade, 0, -1))
+    decided = np.where(marks >= 0, np.arange(len(marks)), -1)
+    last = np.maximum.accumulate(decided)
+    return np.where(last >= 0, marks[np.maximum(last, 0)], 0).astype(bool)
+
+
+def _climb_category(length_m: np.ndarray, avg_grade: np.ndarray) -> List[str]:
+    """Categoria dalla combinazione lunghezza x pendenza ('' se sotto la 4ª)"""
+    score = length_m * avg_grade
+    categories = []
+    for value in score:
+        categories.append(next((cat for limit, cat in CATEGORY_THRESHOLDS if value >= limit), ''))
+    return categories
+
+
+def detect_climbs(df: pd.DataFrame, config: Optional[ClimbConfig] = None) -> pd.DataFrame:
+    """
+    Rileva le salite di un'uscita.
+
+    Args:
+        df: DataFrame da parse_fit (time_sec, distance, altitude)
+        config: Soglie di rilevamento (default ClimbConfig())
+
+    Returns:
+        DataFrame con una riga per salita (colonne CLIMB_COLUMNS), end_idx esclusivo,
+        ordinato per start_idx; le salite non si sovrappongono
+    """
+    config = config or ClimbConfig()
+    empty = pd.DataFrame({col: [] for col in CLIMB_COLUMNS})
+    if len(df) < 2 or 'distance' not in df.columns or 'altitude' not in df.columns:
+        return empty
+
+    distance = np.maximum.accumulate(np.nan_to_num(df['distance'].to_numpy(dtype=float)))
+    if distance[-1] - distance[0] < config.min_length_m:
+        return empty
+    time_sec = df['time_sec'].to_numpy(dtype=float)
+    altitude = smooth_altitude(distance, np.nan_to_num(df['altitude'].to_numpy(dtype=float)),
+                               config.smooth_distance_m)
+    grade = compute_grade(distance, altitude, config.grade_distance_m)
+
+    state = _hysteresis(grade, config.start_grade, config.end_grade)
+    edges = np.diff(np.concatenate(([0], state.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return empty
+
+    # Unione dei tratti separati da brevi spianate
+    if len(starts) > 1:
+        split = distance[starts[1:]] - distance[ends[:-1] - 1] > config.merge_gap_m
+        starts = starts[np.concatenate(([True], split))]
+        ends = ends[np.concatenate((split, [True]))]
+
+    # Estremi della salita: dal punto più basso prima della cima fino alla cima
+    for i, (s, e) in enumerate(zip(starts, ends)):
+        top = s + int(np.argmax(altitude[s:e]))
+        starts[i] = s + int(np.argmin(altitude[s:top + 1]))
+        ends[i] = top + 1
+
+    length = distance[ends - 1] - distance[starts]
+    gain = altitude[ends - 1] - altitude[starts]
+    avg_grade = np.where(length > 0, gain / np.where(length > 0, length, 1.0) * 100, 0.0)
+    keep = (length >= config.min_length_m) & (gain >= config.min_gain_m) & (avg_grade >= config.min_avg_grade)
+    starts, ends, length, gain, avg_grade = starts[keep], ends[keep], length[keep], gain[keep], avg_grade[keep]
+    if len(starts) == 0:
+        return empty
+
+    max_grade = np.asarray([grade[s:e].max() for s, e in zip(starts, ends)])
+    duration = time_sec[ends - 1] - time_sec[starts] + 1
+    climbs = pd.DataFrame({
+        'start_idx': starts.astype(np.int64),
+        'end_idx': ends.astype(np.int64),
+        'start_time': time_sec[starts],
+        'duration': duration,
+        'length_m': length,
+        'gain_m': gain,
+        'avg_grade': avg_grade,
+        'max_grade': max_grade,
+        'vam': gain / (duration / 3600),
+        'category': _climb_category(length, avg_grade),
+    })
+    logger.info(f"Rilevate {len(climbs)} salite")
+    return climbs
+
+
+# ==============================================================================
+# INDICE A INTERVALLI
+# ==============================================================================
+
+class ClimbIndex:
+    """
+    Indice delle salite di un'uscita per join effort -> salita in O(log n).
+
+    Le salite non si sovrappongono e sono ordinate, quindi anche gli end sono
+    ordinati: le salite che intersecano [s, e) sono l'intervallo contiguo
+    da searchsorted(ends, s) a searchsorted(starts, e).
+    """
+
+    def __init__(self, climbs: pd.DataFrame):
+        self.climbs = climbs.reset_index(drop=True)
+        self.starts = self.climbs['start_idx'].to_numpy(dtype=np.int64)
+        self.ends = self.climbs['end_idx'].to_numpy(dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlapping(self, start: int, end: int) -> np.ndarray:
+        """Indici delle salite che intersecano [start, end)"""
+        first = np.searchsorted(self.ends, start, side='right')
+        last = np.searchsorted(self.starts, end, side='left')
+        return np.arange(first, max(first, last))
+
+    def climb_at(self, sample_idx) -> np.ndarray:
+        """Salita che contiene ciascun campione (-1 se fuori salita), vettorizzato"""
+        idx = np.asarray(sample_idx, dtype=np.int64)
+        pos = np.searchsorted(self.starts, idx, side='right') - 1
+        inside = (pos >= 0) & (idx < self.ends[np.maximum(pos, 0)]) if len(self) else np.zeros(idx.shape, bool)
+        return np.where(inside, pos, -1)
+
+    def join_efforts(self, efforts: List[Tuple[int, int, float]]) -> Dict[str, np.ndarray]:
+        """
+        Salita di appartenenza di ogni effort (quella con la sovrapposizione maggiore).
+
+        Returns:
+            Dict con climb (indice salita, -1 se nessuna) e overlap (frazione
+            dell'effort dentro la salita)
+        """
+        climb = np.full(len(efforts), -1, dtype=np.int64)
+        overlap = np.zeros(len(efforts))
+        for i, (s, e, _) in enumerate(efforts):
+            candidates = self.overlapping(s, e)
+            if len(candidates) == 0 or e <= s:
+                continue
+            shared = np.minimum(self.ends[candidates], e) - np.maximum(self.starts[candidates], s)
+            best = int(np.argmax(shared))
+            climb[i] = candidates[best]
+            overlap[i] = shared[best] / (e - s)
+        return {'climb': climb, 'overlap': overlap}
+
+
+# Indici calcolati per DataFrame vivo: id(df) -> (ref, chiave, indice)
+_index_cache: Dict[int, Tuple[weakref.ref, tuple, ClimbIndex]] = {}
+
+
+def get_climb_index(df: pd.DataFrame, config: Optional[ClimbConfig] = None) -> ClimbIndex:
+    """
+    Indice salite dell'uscita, calcolato una volta per DataFrame.
+
+    La voce vive quanto il DataFrame di parse_fit (riferimento debole): tab e
+    export che interrogano la stessa uscita non ripetono il rilevamento.
+    """
+    config = config or ClimbConfig()
+    key = (len(df), tuple(vars(config).values()))
+    entry = _index_cache.get(id(df))
+    if entry is not None and entry[0]() is df and entry[1] == key:
+        return entry[2]
+
+    index = ClimbIndex(detect_climbs(df, config))
+    df_id = id(df)
+
+    def _evict(ref: weakref.ref) -> None:
+        # L'id può essere già stato riusato da un altro DataFrame
+        if df_id in _index_cache and _index_cache[df_id][0] is ref:
+            del _index_cache[df_id]
+
+    _index_cache[df_id] = (weakref.ref(df, _evict), key, index)
+    return index
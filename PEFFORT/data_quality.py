@@ -0,0 +1,158 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+DATA QUALITY - Pulizia vettorizzata dello stream di potenza
+Picchi con mediana/MAD mobile, dropout del misuratore, interpolazione opzionale, maschera qualità
+"""
+
+from typing import Tuple, Dict, Any, Optional
+import logging
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .peffort_config import QualityConfig
+
+logger = logging.getLogger(__name__)
+
+# Colonna maschera qualità (True = campione affidabile) letta dai rilevatori
+QUALITY_COLUMN = 'power_quality'
+# Colonna con i campioni mancanti nel FIT originale (prima del riempimento a 0)
+MISSING_COLUMN = 'power_missing'
+# Fattore MAD -> deviazione standard per dati gaussiani
+MAD_SCALE = 1.4826
+
+
+def rolling_median_mad(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mediana e MAD mobili centrate (bordi estesi col valore estremo).
+
+    Con finestra w un blocco di al massimo (w - 1) / 2 campioni anomali non
+    sposta la mediana: i picchi brevi emergono, gli sprint veri no.
+    """
+    half = window // 2
+    padded = np.pad(np.asarray(values, dtype=float), half, mode='edge')
+    view = sliding_window_view(padded, window)
+    median = np.median(view, axis=1)
+    mad = np.median(np.abs(view - median[:, None]), axis=1)
+    return median, mad
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inizi e fini (esclusive) delle sequenze True"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _runs_to_mask(starts: np.ndarray, ends: np.ndarray, n: int) -> np.ndarray:
+    """Maschera booleana di lunghezza n con True sulle sequenze [start, end)"""
+    marks = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marks, starts, 1)
+    np.add.at(marks, ends, -1)
+    return np.cumsum(marks[:-1]) > 0
+
+
+def flag_spikes(power: np.ndarray, config: QualityConfig) -> np.ndarray:
+    """
+    Picchi verso l'alto fuori scala rispetto alla mediana locale, o oltre max_power.
+
+    Un picco del misuratore dura 1-2 campioni: le sequenze fuori scala più
+    lunghe di spike_max_samples sono surge veri (3-4 s di scatto) e restano.
+    """
+    p = np.asarray(power, dtype=float)
+    median, mad = rolling_median_mad(p, config.spike_window)
+    threshold = np.maximum(config.spike_mad_k * MAD_SCALE * mad, config.spike_min_delta)
+    starts, ends = _runs((p - median) > threshold)
+    short = ends - starts <= config.spike_max_samples
+    return _runs_to_mask(starts[short], ends[short], len(p)) | (p > config.max_power)
+
+
+def find_dropouts(df: pd.DataFrame, config: QualityConfig) -> np.ndarray:
+    """
+    Campioni persi dal misuratore di potenza.
+
+    Sono dropout i valori assenti nel FIT e le sequenze di 0 W con cadenza
+    attiva lunghe almeno dropout_min_sec (la ruota libera ha cadenza 0).
+    """
+    power = df['power'].to_numpy(dtype=float)
+    missing = df[MISSING_COLUMN].to_numpy(dtype=bool) if MISSING_COLUMN in df.columns else np.zeros(len(df), bool)
+    if 'cadence' not in df.columns:
+        return missing
+
+    pedaling_zero = (power <= 0) & (df['cadence'].to_numpy(dtype=float) > 0)
+    starts, ends = _runs(pedaling_zero)
+    time_sec = df['time_sec'].to_numpy(dtype=float)
+    long_enough = time_sec[ends - 1] - time_sec[starts] + 1 >= config.dropout_min_sec
+    return missing | _runs_to_mask(starts[long_enough], ends[long_enough], len(df))
+
+
+def detector_power(df: pd.DataFrame) -> np.ndarray:
+    """
+    Potenza vista dai rilevatori di efforts e sprint.
+
+    Senza maschera qualità è la colonna power; altrimenti i campioni scartati
+    sono ricostruiti linearmente dai vicini affidabili, così un picco non crea
+    uno sprint e un dropout non abbassa la media di un effort.
+    """
+    power = df['power'].values
+    if QUALITY_COLUMN not in df.columns:
+        return power
+    valid = df[QUALITY_COLUMN].to_numpy(dtype=bool)
+    if valid.all() or not valid.any():
+        return power
+    positions = np.arange(len(power))
+    filled = np.asarray(power, dtype=float).copy()
+    filled[~valid] = np.interp(positions[~valid], positions[valid], filled[valid])
+    return filled
+
+
+def clean_ride(df: pd.DataFrame, config: Optional[QualityConfig] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Passata di qualità su un'uscita da parse_fit.
+
+    Args:
+        df: DataFrame da parse_fit
+        config: Soglie (default QualityConfig())
+
+    Returns:
+        Tuple (copia del DataFrame con colonna power_quality, report con
+        n_spikes, n_dropouts, dropout_sec, n_interpolated)
+    """
+    config = config or QualityConfig()
+    out = df.copy()
+    n = len(out)
+    if n == 0:
+        out[QUALITY_COLUMN] = np.ones(0, dtype=bool)
+        return out, {'n_spikes': 0, 'n_dropouts': 0, 'dropout_sec': 0.0, 'n_interpolated': 0}
+
+    spikes = flag_spikes(out['power'].to_numpy(dtype=float), config)
+    dropouts = find_dropouts(out, config)
+    valid = ~(spikes | dropouts)
+    out[QUALITY_COLUMN] = valid
+
+    time_sec = out['time_sec'].to_numpy(dtype=float)
+    d_starts, d_ends = _runs(dropouts)
+    report = {
+        'n_spikes': int(spikes.sum()),
+        'n_dropouts': int(len(d_starts)),
+        'dropout_sec': float((time_sec[d_ends - 1] - time_sec[d_starts] + 1).sum()),
+        'n_interpolated': 0,
+    }
+
+    if config.interpolate and valid.any() and not valid.all():
+        # Solo i buchi brevi: su quelli lunghi una retta inventerebbe lo sforzo
+        starts, ends = _runs(~valid)
+        short = time_sec[ends - 1] - time_sec[starts] + 1 <= config.max_interp_sec
+        fill = _runs_to_mask(starts[short], ends[short], n)
+        filled = detector_power(out)
+        out['power'] = np.where(fill, np.round(filled), out['power'].to_numpy()).astype(out['power'].dtype)
+        report['n_interpolated'] = int(fill.sum())
+
+    logger.info(f"Qualità potenza: {report['n_spikes']} picchi, {report['n_dropouts']} dropout "
+                f"({report['dropout_sec']:.0f}s), {report['n_interpolated']} campioni interpolati")
+    return out, report
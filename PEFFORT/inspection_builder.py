@@ -10,7 +10,7 @@ INSPECTION BUILDER (MATPLOTLIB) - Generazione grafico interattivo con Matplotlib
 Permette visual inspection e modifica manuale dei bordi degli effort
 """
 
-from typing import List, Tuple, Any, Dict
+from typing import List, Tuple, Any, Dict, Optional
 import logging
 import pandas as pd
 import numpy as np
@@ -20,6 +20,129 @@ from matplotlib.patches import Rectangle
 
 logger = logging.getLogger(__name__)
 
+# Piramide min/max: fattore di aggregazione tra livelli e punti massimi disegnati
+PYRAMID_FACTOR = 4
+PYRAMID_MAX_POINTS = 2000
+
+
+class SignalPyramid:
+    """
+    Piramide min/max di un segnale per il rendering a risoluzione adattiva.
+    
+    Il livello 0 è il segnale grezzo; ogni livello successivo aggrega PYRAMID_FACTOR
+    campioni del precedente mantenendo minimo e massimo, così l'inviluppo disegnato
+    resta fedele ai picchi a qualunque zoom.
+    """
+    
+    def __init__(self, time_sec: np.ndarray, values: np.ndarray,
+                 factor: int = PYRAMID_FACTOR, max_points: int = PYRAMID_MAX_POINTS):
+        """
+        Args:
+            time_sec: Array tempi [s] (crescente)
+            values: Array valori del segnale (NaN ammessi)
+            factor: Campioni aggregati per bin tra un livello e il successivo
+            max_points: Numero massimo di bin da disegnare per vista
+        """
+        self.factor = factor
+        self.max_points = max_points
+        
+        t = np.asarray(time_sec, dtype=float)
+        lo = np.asarray(values, dtype=float)
+        hi = lo
+        # Ogni livello: (tempo inizio bin, minimo, massimo)
+        self.levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = [(t, lo, hi)]
+        
+        while len(t) > max_points:
+            n_bins = -(-len(t) // factor)
+            pad = n_bins * factor - len(t)
+            lo = np.fmin.reduce(np.append(lo, np.full(pad, np.nan)).reshape(n_bins, factor), axis=1)
+            hi = np.fmax.reduce(np.append(hi, np.full(pad, np.nan)).reshape(n_bins, factor), axis=1)
+            t = t[::factor]
+            self.levels.append((t, lo, hi))
+    
+    @property
+    def max_value(self) -> float:
+        """Massimo globale del segnale (ignora NaN)"""
+        hi = self.levels[-1][2]
+        return float(np.nanmax(hi)) if np.isfinite(hi).any() else 0.0
+    
+    def view(self, x_min: float, x_max: float) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Ritorna i punti da disegnare per l'intervallo visibile [x_min, x_max].
+        
+        Sceglie il livello più dettagliato che resta entro max_points nell'intervallo;
+        per i livelli aggregati restituisce l'inviluppo min/max alternato.
+        
+        Returns:
+            Tuple (x, y, livello)
+        """
+        last = len(self.levels) - 1
+        for level, (t, lo, hi) in enumerate(self.levels):
+            # Un bin di margine per lato, così la linea non si interrompe ai bordi
+            i0 = max(0, int(np.searchsorted(t, x_min, side='right')) - 1)
+            i1 = min(len(t), int(np.searchsorted(t, x_max, side='right')) + 1)
+            if i1 - i0 <= self.max_points or level == last:
+                break
+        
+        t, lo, hi = t[i0:i1], lo[i0:i1], hi[i0:i1]
+        if level == 0:
+            return t, lo, level
+        return np.repeat(t, 2), np.column_stack((lo, hi)).ravel(), level
+
+
+def build_inspection_pyramids(df: pd.DataFrame) -> Dict[str, SignalPyramid]:
+    """
+    Costruisce una volta per uscita le piramidi di potenza grezza e media mobile 30s.
+    
+    Args:
+        df: DataFrame con dati FIT (power, time_sec)
+        
+    Returns:
+        Dict {'power': SignalPyramid, 'rolling': SignalPyramid}
+    """
+    time_sec = df['time_sec'].values
+    power = df['power'].values
+    
+    # Calcola media mobile 30-secondi
+    window_size = max(1, int(30 / (time_sec[1] - time_sec[0])) if len(time_sec) > 1 else 1)
+    rolling_avg = pd.Series(power).rolling(window=window_size, center=True).mean().values
+    
+    pyramids = {
+        'power': SignalPyramid(time_sec, power),
+        'rolling': SignalPyramid(time_sec, rolling_avg),
+    }
+    logger.debug(f"Piramidi inspection: {len(pyramids['power'].levels)} livelli")
+    return pyramids
+
+
+def _connect_pyramid_refresh(series: List[Dict[str, Any]]) -> None:
+    """
+    Aggiorna linee e riempimenti al livello di piramide adatto ai nuovi x-limits.
+    
+    Args:
+        series: Lista di dict {ax, pyramid, line, fill, color, level}
+    """
+    last_xlim: List[Tuple[float, float]] = []
+    
+    def on_xlim_changed(changed_ax):
+        xlim = tuple(changed_ax.get_xlim())
+        # Gli assi condivisi notificano lo stesso cambio: aggiorna una sola volta
+        if last_xlim and last_xlim[0] == xlim:
+            return
+        last_xlim[:] = [xlim]
+        x_min, x_max = xlim
+        for item in series:
+            x, y, level = item['pyramid'].view(x_min, x_max)
+            item['line'].set_data(x, y)
+            item['fill'].remove()
+            item['fill'] = item['ax'].fill_between(x, y, alpha=0.2, color=item['color'], zorder=1)
+            if level != item['level']:
+                logger.debug(f"Piramide inspection: livello {item['level']} -> {level}")
+                item['level'] = level
+    
+    for item in series:
+        item['ax'].callbacks.connect('xlim_changed', on_xlim_changed)
+
 
 def plot_inspection_figure(fig: Figure,
                            df: pd.DataFrame, 
@@ -27,7 +150,8 @@ def plot_inspection_figure(fig: Figure,
                            sprints: List[Dict[str, Any]],
                            ftp: float,
                            weight: float,
-                           zoom_level: float = 1.0) -> None:
+                           zoom_level: float = 1.0,
+                           pyramids: Optional[Dict[str, SignalPyramid]] = None) -> Dict[int, Dict[str, Any]]:
     """
     Disegna il grafico di ispezione su una figura Matplotlib esistente
     
@@ -39,20 +163,29 @@ def plot_inspection_figure(fig: Figure,
         ftp: Soglia funzionale
         weight: Peso atleta
         zoom_level: Livello di zoom (non usato, ma per coerenza API)
+        pyramids: Piramidi precalcolate (build_inspection_pyramids), None = calcola ora
+        
+    Returns:
+        Dict indice effort -> {rects, lines, label}: artisti aggiornabili con blitting
     """
     fig.patch.set_facecolor('#0f172a')
     
+    if pyramids is None:
+        pyramids = build_inspection_pyramids(df)
+    
     # Layout: 2 subplot in colonna con margini ridotti
     gs = fig.add_gridspec(2, 1, height_ratios=[1, 1], hspace=0.25, left=0.08, right=0.95, top=0.95, bottom=0.08)
     ax1 = fig.add_subplot(gs[0])  # Power raw
     ax2 = fig.add_subplot(gs[1], sharex=ax1)  # 30s average
     
     time_sec = df['time_sec'].values
-    power = df['power'].values
+    power_pyr = pyramids['power']
+    rolling_pyr = pyramids['rolling']
     
     # ============ SUBPLOT 1: POWER RAW ============
-    ax1.plot(time_sec, power, color='#3b82f6', linewidth=0.8, label='Power', zorder=2)
-    ax1.fill_between(time_sec, power, alpha=0.2, color='#3b82f6', zorder=1)
+    x1, y1, level1 = power_pyr.view(time_sec[0], time_sec[-1])
+    line1, = ax1.plot(x1, y1, color='#3b82f6', linewidth=0.8, label='Power', zorder=2)
+    fill1 = ax1.fill_between(x1, y1, alpha=0.2, color='#3b82f6', zorder=1)
     ax1.set_ylabel('Power (W)', fontsize=11, color='#e2e8f0', fontweight='bold')
     ax1.set_title('Raw Power Signal', fontsize=12, color='#e2e8f0', fontweight='bold', pad=10)
     ax1.grid(True, color='#475569', linewidth=0.5, alpha=0.5)
@@ -64,12 +197,9 @@ def plot_inspection_figure(fig: Figure,
     ax1.spines['right'].set_visible(False)
     
     # ============ SUBPLOT 2: 30-SECOND AVERAGE ============
-    # Calcola media mobile 30-secondi
-    window_size = max(1, int(30 / (time_sec[1] - time_sec[0])) if len(time_sec) > 1 else 1)
-    rolling_avg = pd.Series(power).rolling(window=window_size, center=True).mean().values
-    
-    ax2.plot(time_sec, rolling_avg, color='#f59e0b', linewidth=1.2, label='30s Average', zorder=2)
-    ax2.fill_between(time_sec, rolling_avg, alpha=0.2, color='#f59e0b', zorder=1)
+    x2, y2, level2 = rolling_pyr.view(time_sec[0], time_sec[-1])
+    line2, = ax2.plot(x2, y2, color='#f59e0b', linewidth=1.2, label='30s Average', zorder=2)
+    fill2 = ax2.fill_between(x2, y2, alpha=0.2, color='#f59e0b', zorder=1)
     ax2.set_xlabel('Time (s)', fontsize=11, color='#e2e8f0', fontweight='bold')
     ax2.set_ylabel('Power (W)', fontsize=11, color='#e2e8f0', fontweight='bold')
     ax2.set_title('30-Second Rolling Average', fontsize=12, color='#e2e8f0', fontweight='bold', pad=10)
@@ -83,6 +213,7 @@ def plot_inspection_figure(fig: Figure,
     
     # ============ EVIDENZIA GLI EFFORT ============
     colors_effort = plt.cm.tab10(np.linspace(0, 1, len(efforts)))
+    effort_artists: Dict[int, Dict[str, Any]] = {}
     
     for idx, (start_idx, end_idx, avg) in enumerate(efforts):
         # end_idx è esclusivo, come convenzione Python slicing
@@ -116,15 +247,17 @@ def plot_inspection_figure(fig: Figure,
                          zorder=3)
         ax2.add_patch(rect2)
         
-        # Linee di bordo
-        ax1.axvline(x=start_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4)
-        ax1.axvline(x=end_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4)
-        ax2.axvline(x=start_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4)
-        ax2.axvline(x=end_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4)
+        # Linee di bordo (start, end per ciascun asse)
+        border_lines = [
+            ax1.axvline(x=start_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4),
+            ax1.axvline(x=end_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4),
+            ax2.axvline(x=start_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4),
+            ax2.axvline(x=end_time, color=color, linestyle='--', linewidth=2, alpha=0.7, zorder=4),
+        ]
         
         # Label effort
         mid_time = (start_time + end_time) / 2
-        ax1.text(mid_time, ax1.get_ylim()[1] * 0.95, 
+        label = ax1.text(mid_time, ax1.get_ylim()[1] * 0.95, 
                 f'#{idx+1}', 
                 fontsize=10, 
                 color=color, 
@@ -132,15 +265,24 @@ def plot_inspection_figure(fig: Figure,
                 ha='center',
                 bbox=dict(boxstyle='round,pad=0.3', facecolor='#0f172a', edgecolor=color, alpha=0.8),
                 zorder=5)
+        
+        effort_artists[idx] = {'rects': [rect1, rect2], 'lines': border_lines, 'label': label}
     
     # Imposta limiti assi
     ax2.set_xlim(time_sec[0], time_sec[-1])
     ax1.set_xlim(time_sec[0], time_sec[-1])
     
     # Imposta i limiti Y per avere spazio per le labels
-    y1_max = max(power) if len(power) > 0 else 100
-    y2_max = max(rolling_avg[~np.isnan(rolling_avg)]) if len(rolling_avg[~np.isnan(rolling_avg)]) > 0 else 100
+    y1_max = power_pyr.max_value or 100
+    y2_max = rolling_pyr.max_value or 100
     ax1.set_ylim(0, y1_max * 1.1)
     ax2.set_ylim(0, y2_max * 1.1)
     
+    # Zoom/pan: ridisegna solo il livello di piramide adatto all'intervallo visibile
+    _connect_pyramid_refresh([
+        {'ax': ax1, 'pyramid': power_pyr, 'line': line1, 'fill': fill1, 'color': '#3b82f6', 'level': level1},
+        {'ax': ax2, 'pyramid': rolling_pyr, 'line': line2, 'fill': fill2, 'color': '#f59e0b', 'level': level2},
+    ])
+    
     logger.debug(f"Grafico inspection completato: {len(efforts)} efforts visualizzati")
+    return effort_artists
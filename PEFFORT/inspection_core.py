@@ -18,6 +18,28 @@ import numpy as np
 logger = logging.getLogger(__name__)
 
 
+def _prefix_sum(values: np.ndarray) -> np.ndarray:
+    """Somma prefissa con zero iniziale: sum(values[a:b]) = P[b] - P[a]"""
+    return np.concatenate(([0], np.cumsum(values)))
+
+
+def _build_sparse_max(values: np.ndarray) -> List[np.ndarray]:
+    """Sparse table per massimo su intervallo in O(1) (costruzione O(n log n))"""
+    table = [np.asarray(values)]
+    span = 1
+    while 2 * span <= len(values):
+        prev = table[-1]
+        table.append(np.maximum(prev[:-span], prev[span:]))
+        span *= 2
+    return table
+
+
+def _range_max(table: List[np.ndarray], start: int, end: int) -> float:
+    """Massimo di values[start:end] (end esclusivo, end > start) dalla sparse table"""
+    level = int(end - start).bit_length() - 1
+    return max(table[level][start], table[level][end - (1 << level)])
+
+
 class InspectionManager:
     """Gestisce la modifica interattiva degli effort con traccia delle modifiche"""
     
@@ -56,6 +78,31 @@ class InspectionManager:
         self.time_sec = df['time_sec'].values
         self.power = df['power'].values
         
+        # Serie opzionali estratte una sola volta dal DataFrame
+        n = len(self.power)
+        self.heartrate = df['heartrate'].values if 'heartrate' in df.columns else None
+        self.altitude = df['altitude'].values if 'altitude' in df.columns else None
+        
+        # Somme prefisse: ogni statistica su qualunque [start, end) diventa O(1)
+        positive = self.power > 0
+        self._cum_power_pos = _prefix_sum(np.where(positive, self.power, 0))
+        self._cum_count_pos = _prefix_sum(positive)
+        
+        # Lavoro del campione i verso i+1 (delta validi 0 < dt < 30s)
+        dt = np.diff(self.time_sec.astype(float))
+        work = np.where((dt > 0) & (dt < 30), self.power[:-1] * dt, 0.0) if n > 1 else np.zeros(0)
+        self._cum_work = _prefix_sum(work)
+        
+        self._power_max = _build_sparse_max(self.power) if n > 0 else []
+        if self.heartrate is not None and n > 0:
+            hr_positive = self.heartrate > 0
+            self._cum_hr_pos = _prefix_sum(np.where(hr_positive, self.heartrate, 0))
+            self._cum_hr_count = _prefix_sum(hr_positive)
+            self._hr_max = _build_sparse_max(self.heartrate)
+        
+        # Cache statistiche per effort, invalidata solo per l'effort modificato
+        self._stats_cache: Dict[int, Dict[str, Any]] = {}
+        
         logger.info(
             f"InspectionManager inizializzato: {len(self.original_efforts)} efforts, "
             f"FTP={ftp}W, Weight={weight}kg"
@@ -89,9 +136,21 @@ class InspectionManager:
         if start_idx >= end_idx:
             return 0.0
         
-        # Usa slicing con end_idx esclusivo
-        seg_power = self.power[start_idx:end_idx]
-        return float(np.mean(seg_power[seg_power > 0])) if (seg_power > 0).any() else 0.0
+        # Differenza di somme prefisse (end_idx esclusivo)
+        count = self._cum_count_pos[end_idx] - self._cum_count_pos[start_idx]
+        if count <= 0:
+            return 0.0
+        return float((self._cum_power_pos[end_idx] - self._cum_power_pos[start_idx]) / count)
+    
+    def preview_effort_power(self, start_sec: float, end_sec: float) -> float:
+        """
+        Potenza media per bordi provvisori (es. durante il drag), senza modificare l'effort.
+        
+        Args:
+            start_sec: Tempo inizio in secondi
+            end_sec: Tempo fine in secondi
+        """
+        return self._recalculate_effort_power(self._time_to_index(start_sec), self._time_to_index(end_sec))
     
     def modify_effort(self, effort_idx: int, start_sec: float, end_sec: float):
         """
@@ -129,6 +188,7 @@ class InspectionManager:
         # Aggiorna
         self.modified_efforts[effort_idx] = (start_idx, end_idx, new_avg_power)
         self.modifications[effort_idx] = True
+        self._stats_cache.pop(effort_idx, None)
         
         logger.info(
             f"Effort {effort_idx} modificato: "
@@ -142,6 +202,7 @@ class InspectionManager:
         
         self.modified_efforts[effort_idx] = self.original_efforts[effort_idx]
         self.modifications[effort_idx] = False
+        self._stats_cache.pop(effort_idx, None)
         
         logger.info(f"Effort {effort_idx} ripristinato")
     
@@ -162,6 +223,12 @@ class InspectionManager:
                 self.modifications[new_idx] = old_mods[i]
                 new_idx += 1
         
+        # Le statistiche in cache seguono lo slittamento degli indici
+        self._stats_cache = {
+            (i if i < effort_idx else i - 1): stats
+            for i, stats in self._stats_cache.items() if i != effort_idx
+        }
+        
         logger.info(f"Effort {effort_idx} eliminato - rimasti {len(self.modified_efforts)}")
     
     def is_modified(self, effort_idx: int) -> bool:
@@ -174,73 +241,80 @@ class InspectionManager:
         """Ritorna la lista degli effort modificati"""
         return list(self.modified_efforts)
     
-    def get_effort_stats(self, effort_idx: int) -> Dict[str, Any]:
-        """Ritorna statistiche dettagliate di un effort"""
-        if effort_idx < 0 or effort_idx >= len(self.modified_efforts):
-            raise ValueError(f"Indice effort non valido: {effort_idx}")
-        
-        start_idx, end_idx, avg_power = self.modified_efforts[effort_idx]
+    def get_range_stats(self, start_idx: int, end_idx: int) -> Dict[str, Any]:
+        """
+        Statistiche di un intervallo qualsiasi [start_idx, end_idx) in O(1).
         
-        # end_idx è esclusivo, quindi usiamo slicing standard
-        seg_power = self.power[start_idx:end_idx]
-        seg_time = self.time_sec[start_idx:end_idx]
+        Note: end_idx è ESCLUSIVO, come da convenzione Python slicing
+        """
+        if start_idx < 0 or end_idx > len(self.power) or start_idx >= end_idx:
+            raise ValueError(f"Intervallo non valido: [{start_idx}, {end_idx})")
         
-        start_time = seg_time[0]
-        end_time = seg_time[-1]
+        last_idx = end_idx - 1
+        start_time = self.time_sec[start_idx]
+        end_time = self.time_sec[last_idx]
         duration = end_time - start_time
         
-        # Valori disponibili
-        power_peak = float(seg_power.max()) if len(seg_power) > 0 else 0.0
-        power_mean = float(avg_power)
+        power_peak = float(_range_max(self._power_max, start_idx, end_idx))
         
         # HR se disponibile
-        if 'heartrate' in self.df.columns:
-            seg_hr = self.df['heartrate'].iloc[start_idx:end_idx].values
-            hr_mean = float(seg_hr[seg_hr > 0].mean()) if (seg_hr > 0).any() else 0.0
-            hr_max = float(seg_hr.max()) if len(seg_hr) > 0 else 0.0
+        if self.heartrate is not None:
+            hr_count = self._cum_hr_count[end_idx] - self._cum_hr_count[start_idx]
+            hr_sum = self._cum_hr_pos[end_idx] - self._cum_hr_pos[start_idx]
+            hr_mean = float(hr_sum / hr_count) if hr_count > 0 else 0.0
+            hr_max = float(_range_max(self._hr_max, start_idx, end_idx))
         else:
             hr_mean = 0.0
             hr_max = 0.0
         
         # Altimetria se disponibile
-        if 'altitude' in self.df.columns:
-            seg_alt = self.df['altitude'].iloc[start_idx:end_idx].values
-            elevation_gain = float(seg_alt[-1] - seg_alt[0])
+        if self.altitude is not None:
+            elevation_gain = float(self.altitude[last_idx] - self.altitude[start_idx])
             vam = elevation_gain / (duration / 3600) if duration > 0 else 0.0
         else:
             elevation_gain = 0.0
             vam = 0.0
         
-        # Calcoli w/kg
-        w_kg = power_mean / self.weight if self.weight > 0 else 0.0
-        
-        # Calcolo energia (kJ)
-        energy_j = 0.0
-        # end_idx è esclusivo, quindi iteriamo fino a end_idx-1
-        for i in range(start_idx, min(end_idx - 1, len(self.time_sec) - 1)):
-            dt = self.time_sec[i+1] - self.time_sec[i]
-            if dt > 0 and dt < 30:  # Sanità check per delta
-                energy_j += self.power[i] * dt
-        energy_kj = energy_j / 1000
+        # Energia (kJ): lavoro dei campioni start..end-2 verso il successivo
+        energy_j = self._cum_work[max(start_idx, last_idx)] - self._cum_work[start_idx]
         
         return {
             'start_time': start_time,
             'end_time': end_time,
             'duration': duration,
-            'power_mean': power_mean,
             'power_peak': power_peak,
-            'w_kg': w_kg,
             'hr_mean': hr_mean,
             'hr_max': hr_max,
             'elevation_gain': elevation_gain,
             'vam': vam,
-            'energy_kj': energy_kj,
+            'energy_kj': float(energy_j) / 1000,
+        }
+    
+    def get_effort_stats(self, effort_idx: int) -> Dict[str, Any]:
+        """Ritorna statistiche dettagliate di un effort (in cache fino alla prossima modifica)"""
+        if effort_idx < 0 or effort_idx >= len(self.modified_efforts):
+            raise ValueError(f"Indice effort non valido: {effort_idx}")
+        
+        cached = self._stats_cache.get(effort_idx)
+        if cached is not None:
+            return dict(cached)
+        
+        start_idx, end_idx, avg_power = self.modified_efforts[effort_idx]
+        stats = self.get_range_stats(start_idx, end_idx)
+        
+        power_mean = float(avg_power)
+        stats.update({
+            'power_mean': power_mean,
+            'w_kg': power_mean / self.weight if self.weight > 0 else 0.0,
             'is_modified': self.is_modified(effort_idx),
             'original_duration': (
                 self.time_sec[self.original_efforts[effort_idx][1]] -
                 self.time_sec[self.original_efforts[effort_idx][0]]
             )
-        }
+        })
+        
+        self._stats_cache[effort_idx] = stats
+        return dict(stats)
     
     def get_all_stats(self) -> List[Dict[str, Any]]:
         """Ritorna statistiche per tutti gli effort"""
@@ -280,59 +354,92 @@ class InspectionManager:
 import hashlib
 import json
 from pathlib import Path
-from datetime import datetime
+
+from .inspection_store import EffortStore
+
+_store: Optional[EffortStore] = None
 
 
 def get_database_path() -> Path:
     """Ritorna il percorso della cartella Database in PEFFORT"""
     peffort_dir = Path(__file__).parent
-    db_path = peffort_dir / "Database" / "JSON"
+    db_path = peffort_dir / "Database"
     db_path.mkdir(parents=True, exist_ok=True)
     return db_path
 
 
+def get_effort_store() -> EffortStore:
+    """Archivio SQLite condiviso degli effort (creato al primo uso)"""
+    global _store
+    if _store is None:
+        _store = EffortStore(get_database_path() / "efforts.sqlite")
+    return _store
+
+
 def hash_fit_file(fit_path: str) -> str:
-    """Calcola hash MD5 di un file FIT per verificare integrità"""
+    """Calcola hash MD5 di un file FIT (lettura a blocchi, solo per i JSON legacy)"""
     try:
+        digest = hashlib.md5()
         with open(fit_path, 'rb') as f:
-            return hashlib.md5(f.read()).hexdigest()
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
     except Exception as e:
         logger.error(f"Errore nel calcolo hash FIT: {e}")
         return ""
 
 
-def save_efforts_to_database(fit_path: str, efforts: List[Tuple[int, int, float]]) -> bool:
+def _import_legacy_json(fit_path: str) -> bool:
+    """
+    Importa nel database SQLite il vecchio file Database/JSON/<nome>.efforts.json
+    se esiste, l'hash MD5 corrisponde al FIT e l'uscita non è mai stata salvata
+    nel database (un salvataggio con lista vuota è una cancellazione, non un
+    dato mancante). Dopo l'import il JSON è rinominato in .imported.
+    
+    Returns:
+        True se importato
+    """
+    json_path = get_database_path() / "JSON" / f"{Path(fit_path).stem}.efforts.json"
+    if not json_path.exists():
+        return False
+    store = get_effort_store()
+    if store.has_ride(fit_path):
+        return False
+    
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    
+    stored_hash = data.get("fit_hash", "")
+    if stored_hash and stored_hash != hash_fit_file(fit_path):
+        logger.warning(f"JSON legacy ignorato: hash FIT non corrisponde ({json_path.name})")
+        return False
+    
+    efforts = [(e["start_idx"], e["end_idx"], e["avg_power"]) for e in data.get("efforts", [])]
+    if not efforts:
+        return False
+    
+    store.save_efforts(fit_path, efforts)
+    json_path.replace(json_path.with_name(json_path.name + ".imported"))
+    logger.info(f"Effort legacy importati da: {json_path}")
+    return True
+
+
+def save_efforts_to_database(fit_path: str, efforts: List[Tuple[int, int, float]],
+                             modified: Optional[List[bool]] = None) -> bool:
     """
-    Salva gli effort in un file JSON nel Database
+    Salva gli effort nel database SQLite (transazione unica)
     
     Args:
         fit_path: Percorso completo al file FIT originale
         efforts: Lista di tuple (start_idx, end_idx, avg_power)
+        modified: Flag di modifica per effort (opzionale)
     
     Returns:
         True se salvato con successo, False altrimenti
     """
     try:
-        fit_name = Path(fit_path).stem  # Nome senza estensione
-        db_path = get_database_path()
-        json_path = db_path / f"{fit_name}.efforts.json"
-        
-        fit_hash = hash_fit_file(fit_path)
-        
-        data = {
-            "fit_file": Path(fit_path).name,
-            "fit_hash": fit_hash,
-            "created": datetime.now().isoformat(),
-            "efforts": [
-                {"start_idx": int(s), "end_idx": int(e), "avg_power": float(avg)}
-                for s, e, avg in efforts
-            ]
-        }
-        
-        with open(json_path, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        logger.info(f"Effort salvati in: {json_path}")
+        content_hash = get_effort_store().save_efforts(fit_path, efforts, modified)
+        logger.info(f"Effort salvati per {Path(fit_path).name} (hash {content_hash[:12]})")
         return True
         
     except Exception as e:
@@ -340,53 +447,58 @@ def save_efforts_to_database(fit_path: str, efforts: List[Tuple[int, int, float]
         return False
 
 
+def save_manager_to_database(fit_path: str, manager: InspectionManager) -> bool:
+    """Salva effort e flag di modifica di un InspectionManager in un'unica transazione"""
+    efforts = manager.get_modified_efforts()
+    modified = [manager.is_modified(i) for i in range(len(efforts))]
+    return save_efforts_to_database(fit_path, efforts, modified)
+
+
 def load_efforts_from_database(fit_path: str) -> Optional[List[Tuple[int, int, float]]]:
     """
-    Carica gli effort da file JSON nel Database se esiste e hash valido
+    Carica gli effort salvati per il FIT (chiave: hash di contenuto)
     
     Args:
         fit_path: Percorso completo al file FIT
     
     Returns:
-        Lista di tuple (start_idx, end_idx, avg_power) se trovato e valido, None altrimenti
+        Lista di tuple (start_idx, end_idx, avg_power) se trovato, None altrimenti
     """
     try:
-        fit_name = Path(fit_path).stem
-        db_path = get_database_path()
-        json_path = db_path / f"{fit_name}.efforts.json"
-        
-        if not json_path.exists():
-            logger.info(f"Nessun file di effort salvato per {fit_name}")
-            return None
+        store = get_effort_store()
+        efforts = store.load_efforts(fit_path)
+        if efforts is None and _import_legacy_json(fit_path):
+            efforts = store.load_efforts(fit_path)
         
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-        
-        # Verifica hash
-        stored_hash = data.get("fit_hash", "")
-        current_hash = hash_fit_file(fit_path)
-        
-        if stored_hash and stored_hash != current_hash:
-            logger.warning(f"Hash FIT non corrisponde. File potrebbe essere stato modificato.")
+        if efforts is None:
+            logger.info(f"Nessun effort salvato per {Path(fit_path).name}")
             return None
         
-        # Estrai effort
-        efforts = [
-            (e["start_idx"], e["end_idx"], e["avg_power"])
-            for e in data.get("efforts", [])
-        ]
-        
-        logger.info(f"Effort caricati da: {json_path}")
-        return efforts if efforts else None
+        logger.info(f"Effort caricati dal database per {Path(fit_path).name}")
+        return efforts
         
     except Exception as e:
         logger.error(f"Errore nel caricamento effort: {e}", exc_info=True)
         return None
 
 
+def load_folder_efforts_from_database(folder: str) -> Dict[str, List[Tuple[int, int, float]]]:
+    """
+    Effort salvati per tutti i FIT di una cartella (lookup unico sul database)
+    
+    Returns:
+        Dict percorso FIT -> lista effort; vuoto in caso di errore
+    """
+    try:
+        return get_effort_store().load_folder(folder)
+    except Exception as e:
+        logger.error(f"Errore nel caricamento effort della cartella: {e}", exc_info=True)
+        return {}
+
+
 def get_saved_effort_info(fit_path: str) -> Optional[Dict[str, Any]]:
     """
-    Ritorna info sul file effort salvato (data creazione, numero effort, ecc)
+    Ritorna info sugli effort salvati (data creazione, numero effort, ecc)
     
     Args:
         fit_path: Percorso completo al file FIT
@@ -395,22 +507,11 @@ def get_saved_effort_info(fit_path: str) -> Optional[Dict[str, Any]]:
         Dict con info o None se non esiste
     """
     try:
-        fit_name = Path(fit_path).stem
-        db_path = get_database_path()
-        json_path = db_path / f"{fit_name}.efforts.json"
-        
-        if not json_path.exists():
-            return None
-        
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-        
-        return {
-            "path": str(json_path),
-            "created": data.get("created"),
-            "effort_count": len(data.get("efforts", [])),
-            "fit_name": data.get("fit_file")
-        }
+        store = get_effort_store()
+        info = store.get_info(fit_path)
+        if info is None and _import_legacy_json(fit_path):
+            info = store.get_info(fit_path)
+        return info
         
     except Exception as e:
         logger.error(f"Errore nel recupero info effort: {e}")
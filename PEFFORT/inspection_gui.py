@@ -24,6 +24,7 @@ from .inspection_core import (
     get_saved_effort_info
 )
 from .inspection_handlers import EffortHandler
+from .inspection_interaction import EffortBoundaryEditor
 from .inspection_widgets import (
     build_top_bar, build_graph_widget, build_detail_panel,
     build_efforts_table, update_detail_panel, update_efforts_table
@@ -44,11 +45,14 @@ class InspectionTab(QWidget):
         self.current_ftp: float = 280
         self.current_weight: float = 70
         self.current_fit_path: Optional[str] = None
+        self.signal_pyramids: Optional[Dict[str, Any]] = None
         
         # Stato
         self.selected_effort_idx: Optional[int] = None
         self.zoom_level: float = 1.0
         self.click_mode: Optional[str] = None
+        self.drag_edge: Optional[str] = None
+        self.drag_last_x: Optional[float] = None
         
         # Handler
         self.effort_handler = EffortHandler(self)
@@ -61,6 +65,9 @@ class InspectionTab(QWidget):
         
         self.init_ui()
         
+        # Layer blitting per la modifica interattiva dei bordi
+        self.boundary_editor = EffortBoundaryEditor(self.canvas)
+        
     def init_ui(self):
         """Inizializza UI della tab ispezione"""
         layout = QVBoxLayout(self)
@@ -112,6 +119,10 @@ class InspectionTab(QWidget):
             self.current_ftp = ftp
             self.current_weight = weight
             
+            # Piramidi min/max calcolate una sola volta per uscita (zoom/pan fluidi)
+            from .inspection_builder import build_inspection_pyramids
+            self.signal_pyramids = build_inspection_pyramids(self.current_df)
+            
             # ========== CARICAMENTO EFFORT DA DATABASE ==========
             # Se abbiamo il percorso FIT, cerchiamo effort salvati nel Database
             if fit_path and self.try_load_efforts_from_database(fit_path):
@@ -172,15 +183,17 @@ class InspectionTab(QWidget):
             
             # Crea il grafico direttamente sulla figura del canvas
             from .inspection_builder import plot_inspection_figure
-            plot_inspection_figure(
+            effort_artists = plot_inspection_figure(
                 self.figure,
                 self.current_df,
                 self.current_efforts,
                 self.current_sprints,
                 self.current_ftp,
                 self.current_weight,
-                zoom_level=self.zoom_level
+                zoom_level=self.zoom_level,
+                pyramids=self.signal_pyramids
             )
+            self.boundary_editor.set_artists(effort_artists, self.selected_effort_idx)
             
             # Ridisegna il canvas
             self.canvas.draw_idle()
@@ -198,8 +211,11 @@ class InspectionTab(QWidget):
         if event.inaxes is None or self.selected_effort_idx is None or not hasattr(self, 'click_mode'):
             return
         
-        # Se non siamo in modalità di selezione, ignora
+        # Fuori dalla modalità di selezione: drag diretto dei bordi (se pan/zoom non attivi)
         if self.click_mode is None:
+            if not self.toolbar.mode:
+                self.drag_edge = self.boundary_editor.hit_test(event)
+                self.drag_last_x = event.xdata
             return
         
         # Ottieni la coordinata X (tempo)
@@ -216,12 +232,62 @@ class InspectionTab(QWidget):
         self.btn_set_start.setStyleSheet("background-color: #06b6d4; color: white;")
         self.btn_set_end.setStyleSheet("background-color: #f97316; color: white;")
     
+    def on_graph_motion(self, event):
+        """Drag di un bordo: aggiorna span e potenza media con blitting"""
+        if self.drag_edge is None or event.xdata is None or self.inspection_manager is None:
+            return
+        
+        idx = self.selected_effort_idx
+        start_idx, end_idx, _ = self.current_efforts[idx]
+        time_sec = self.current_df['time_sec'].values
+        start_time = float(time_sec[start_idx])
+        end_time = float(time_sec[end_idx - 1])
+        
+        x = float(event.xdata)
+        if self.drag_edge == 'start':
+            start_time = min(x, end_time - 1)
+        else:
+            end_time = max(x, start_time + 1)
+        self.drag_last_x = x
+        
+        avg = self.inspection_manager.preview_effort_power(start_time, end_time)
+        self.boundary_editor.update_span(idx, start_time, end_time, label_text=f"#{idx+1} | {avg:.0f}W")
+    
+    def on_graph_release(self, event):
+        """Fine drag: applica il nuovo bordo tramite il manager"""
+        if self.drag_edge is None:
+            return
+        
+        is_start = (self.drag_edge == 'start')
+        x = event.xdata if event.xdata is not None else self.drag_last_x
+        self.drag_edge = None
+        self.drag_last_x = None
+        if x is not None:
+            self._apply_effort_change(float(x), is_start=is_start)
+    
+    def refresh_effort_overlay(self, effort_idx: int):
+        """Aggiorna solo span e label dell'effort modificato (fallback: render completo)"""
+        if not self.boundary_editor.has_effort(effort_idx):
+            self.render_inspection_plot()
+            return
+        
+        start_idx, end_idx, _ = self.current_efforts[effort_idx]
+        time_sec = self.current_df['time_sec'].values
+        self.boundary_editor.update_span(
+            effort_idx,
+            float(time_sec[start_idx]),
+            float(time_sec[end_idx - 1]),
+            label_text=f"#{effort_idx+1}",
+            force=True
+        )
+    
     def on_effort_selected(self, idx: int):
         """Seleziona un effort dalla combo"""
         if idx < 0 or idx >= len(self.current_efforts):
             return
         
         self.selected_effort_idx = idx
+        self.boundary_editor.activate(idx)
         self.update_effort_detail_panel(idx)
         self.update_all_efforts_table()
     
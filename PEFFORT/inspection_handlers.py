@@ -15,7 +15,7 @@ import logging
 from PySide6.QtWidgets import QMessageBox
 
 from .peffort_engine import format_time_hhmmss
-from .inspection_core import save_efforts_to_database
+from .inspection_core import save_manager_to_database
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +80,7 @@ class EffortHandler:
                 self.parent.current_efforts = self.parent.inspection_manager.get_modified_efforts()
                 self.parent.update_effort_detail_panel(self.parent.selected_effort_idx)
                 self.parent.update_all_efforts_table()
-                self.parent.render_inspection_plot()
+                self.parent.refresh_effort_overlay(self.parent.selected_effort_idx)
                 self.parent.status_label.setText("✓ Modifica applicata - non salvata")
                 return True
             
@@ -105,8 +105,10 @@ class EffortHandler:
         try:
             if self.parent.inspection_manager:
                 self.parent.inspection_manager.reset_effort(idx)
+                self.parent.current_efforts = self.parent.inspection_manager.get_modified_efforts()
                 self.parent.update_effort_detail_panel(idx)
                 self.parent.update_all_efforts_table()
+                self.parent.refresh_effort_overlay(idx)
                 self.parent.status_label.setText("✓ Effort ripristinato")
                 return True
         except Exception as e:
@@ -212,8 +214,10 @@ class EffortHandler:
             
             # ========== SALVA NEL DATABASE ==========
             if self.parent.current_fit_path:
-                save_efforts_to_database(self.parent.current_fit_path, modified_efforts)
-                db_saved = "✓ Salvati anche nel Database"
+                if save_manager_to_database(self.parent.current_fit_path, self.parent.inspection_manager):
+                    db_saved = "✓ Salvati anche nel Database"
+                else:
+                    db_saved = "⚠️ Salvataggio nel Database non riuscito"
             else:
                 db_saved = "(Nessun FIT associato per salvare nel Database)"
             
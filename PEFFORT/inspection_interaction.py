@@ -0,0 +1,159 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+INSPECTION INTERACTION - Layer di interazione con blitting per i bordi degli effort
+Sfondo statico in cache, ridisegno del solo effort in modifica (span, bordi, label)
+"""
+
+from typing import Optional, List, Dict, Any
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Distanza massima (pixel) dal bordo per iniziare un drag
+DRAG_PIXEL_TOLERANCE = 8
+# Intervallo minimo tra due blit durante il drag (~60 fps)
+BLIT_MIN_INTERVAL = 1 / 60
+
+
+class EffortBoundaryEditor:
+    """
+    Gestisce il blitting degli artisti dell'effort attivo sul canvas Matplotlib.
+
+    Gli artisti dell'effort selezionato sono marcati come animated: restano fuori
+    dallo sfondo catturato a ogni draw completo e vengono ridisegnati da soli
+    sopra lo sfondo in cache quando i bordi cambiano.
+    """
+
+    def __init__(self, canvas):
+        """
+        Args:
+            canvas: FigureCanvas Matplotlib (backend con supporto blit)
+        """
+        self.canvas = canvas
+        self.background = None
+        self.effort_artists: Dict[int, Dict[str, Any]] = {}
+        self.active_idx: Optional[int] = None
+        self._last_blit = 0.0
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def set_artists(self, effort_artists: Dict[int, Dict[str, Any]],
+                    active_idx: Optional[int] = None) -> None:
+        """Registra gli artisti di un nuovo render completo e attiva l'effort selezionato"""
+        self.effort_artists = effort_artists
+        self.active_idx = None
+        self.background = None
+        self.activate(active_idx)
+
+    def _artists(self, idx: Optional[int]) -> List[Any]:
+        """Lista piatta degli artisti di un effort"""
+        entry = self.effort_artists.get(idx) if idx is not None else None
+        if not entry:
+            return []
+        return entry['rects'] + entry['lines'] + [entry['label']]
+
+    def activate(self, idx: Optional[int]) -> None:
+        """Rende animated gli artisti dell'effort idx (e ripristina il precedente)"""
+        if idx == self.active_idx:
+            return
+        for artist in self._artists(self.active_idx):
+            artist.set_animated(False)
+        self.active_idx = idx
+        for artist in self._artists(idx):
+            artist.set_animated(True)
+        # Nuovo sfondo senza l'effort attivo: catturato al prossimo draw_event
+        self.canvas.draw_idle()
+
+    def has_effort(self, idx: int) -> bool:
+        """True se l'effort idx è disegnato nel render corrente"""
+        return idx in self.effort_artists
+
+    def _on_draw(self, event) -> None:
+        """Cattura lo sfondo statico dopo ogni draw completo"""
+        if event is not None and event.canvas != self.canvas:
+            return
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_active()
+
+    def _draw_active(self) -> None:
+        """Disegna gli artisti dell'effort attivo sul renderer corrente"""
+        figure = self.canvas.figure
+        for artist in self._artists(self.active_idx):
+            figure.draw_artist(artist)
+
+    def _blit(self) -> None:
+        """Ripristina lo sfondo e ridisegna solo l'effort attivo"""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_active()
+        self.canvas.blit(self.canvas.figure.bbox)
+        self.canvas.flush_events()
+
+    def update_span(self, idx: int, start_time: float, end_time: float,
+                    label_text: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Sposta span, linee di bordo e label di un effort e aggiorna il canvas con blit.
+
+        Args:
+            idx: Indice effort
+            start_time: Nuovo inizio [s]
+            end_time: Nuova fine [s]
+            label_text: Testo label (None = invariato)
+            force: Ignora il limite di frame rate (es. commit a fine drag)
+
+        Returns:
+            True se il canvas è stato aggiornato
+        """
+        entry = self.effort_artists.get(idx)
+        if entry is None:
+            return False
+
+        now = time.perf_counter()
+        if not force and now - self._last_blit < BLIT_MIN_INTERVAL:
+            return False
+        self._last_blit = now
+
+        self.activate(idx)
+        for rect in entry['rects']:
+            rect.set_x(start_time)
+            rect.set_width(end_time - start_time)
+        for i, line in enumerate(entry['lines']):
+            x = start_time if i % 2 == 0 else end_time
+            line.set_xdata([x, x])
+        entry['label'].set_x((start_time + end_time) / 2)
+        if label_text is not None:
+            entry['label'].set_text(label_text)
+
+        self._blit()
+        return True
+
+    def hit_test(self, event) -> Optional[str]:
+        """
+        Verifica se il mouse è su un bordo dell'effort attivo.
+
+        Returns:
+            'start', 'end' oppure None
+        """
+        entry = self.effort_artists.get(self.active_idx) if self.active_idx is not None else None
+        if entry is None or event.inaxes is None or event.x is None:
+            return None
+
+        transform = event.inaxes.transData
+        start_time = entry['rects'][0].get_x()
+        end_time = start_time + entry['rects'][0].get_width()
+        start_px = transform.transform((start_time, 0))[0]
+        end_px = transform.transform((end_time, 0))[0]
+
+        dist_start = abs(event.x - start_px)
+        dist_end = abs(event.x - end_px)
+        if min(dist_start, dist_end) > DRAG_PIXEL_TOLERANCE:
+            return None
+        return 'start' if dist_start <= dist_end else 'end'
@@ -0,0 +1,274 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+INSPECTION STORE - Archivio SQLite degli effort rettificati
+Chiave: hash di contenuto del FIT (streaming), in cache con dimensione + mtime
+"""
+
+from typing import List, Tuple, Dict, Any, Optional, Iterable
+from pathlib import Path
+from datetime import datetime
+import hashlib
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Blocco di lettura per l'hash streaming (1 MB)
+HASH_CHUNK_SIZE = 1 << 20
+# Estensioni considerate nella ricerca per cartella
+FIT_EXTENSIONS = ('.fit', '.FIT')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_file_hashes_directory ON file_hashes(directory);
+
+CREATE TABLE IF NOT EXISTS rides (
+    content_hash TEXT PRIMARY KEY,
+    fit_name TEXT NOT NULL,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS efforts (
+    content_hash TEXT NOT NULL REFERENCES rides(content_hash) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    start_idx INTEGER NOT NULL,
+    end_idx INTEGER NOT NULL,
+    avg_power REAL NOT NULL,
+    is_modified INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (content_hash, position)
+);
+"""
+
+
+def fast_content_hash(fit_path: str) -> str:
+    """Hash BLAKE2b del contenuto letto a blocchi (memoria costante)"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(fit_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EffortStore:
+    """
+    Archivio SQLite degli effort salvati dall'Inspection.
+
+    Gli effort sono indicizzati per hash di contenuto: due uscite con lo stesso
+    nome file non collidono e un FIT rinominato ritrova le sue modifiche.
+    L'hash viene ricalcolato solo se dimensione o mtime del file cambiano.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: Percorso del file SQLite (creato se non esiste)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Nuova connessione (una per operazione: sicura tra thread)"""
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    # ========================================================================
+    # HASH IN CACHE
+    # ========================================================================
+
+    def _hash_with_cache(self, conn: sqlite3.Connection, fit_path: Path,
+                         cached: Optional[Tuple[int, int, str]] = None) -> str:
+        """Ritorna l'hash del FIT, ricalcolandolo solo se size/mtime sono cambiati"""
+        stat = fit_path.stat()
+        if cached is None:
+            row = conn.execute(
+                "SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?",
+                (str(fit_path),)
+            ).fetchone()
+            cached = tuple(row) if row else None
+
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        content_hash = fast_content_hash(str(fit_path))
+        conn.execute(
+            "INSERT OR REPLACE INTO file_hashes (path, directory, size, mtime_ns, content_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (str(fit_path), str(fit_path.parent), stat.st_size, stat.st_mtime_ns, content_hash)
+        )
+        return content_hash
+
+    def content_hash(self, fit_path: str) -> str:
+        """Hash di contenuto del FIT (dalla cache se il file non è cambiato)"""
+        path = Path(fit_path).resolve()
+        with self._connect() as conn:
+            return self._hash_with_cache(conn, path)
+
+    # ========================================================================
+    # SCRITTURA
+    # ========================================================================
+
+    def save_efforts(self, fit_path: str, efforts: List[Tuple[int, int, float]],
+                     modified: Optional[Iterable[bool]] = None) -> str:
+        """
+        Sostituisce in un'unica transazione gli effort salvati per un FIT.
+
+        Args:
+            fit_path: Percorso del file FIT
+            efforts: Lista di tuple (start_idx, end_idx, avg_power)
+            modified: Flag "modificato" per effort (es. InspectionManager.modifications)
+
+        Returns:
+            Hash di contenuto usato come chiave
+        """
+        path = Path(fit_path).resolve()
+        flags = list(modified) if modified is not None else [False] * len(efforts)
+        if len(flags) != len(efforts):
+            raise ValueError("Numero di flag di modifica diverso dal numero di effort")
+
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        try:
+            with conn:
+                content_hash = self._hash_with_cache(conn, path)
+                conn.execute(
+                    "INSERT INTO rides (content_hash, fit_name, created, updated) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(content_hash) DO UPDATE SET fit_name = excluded.fit_name, "
+                    "updated = excluded.updated",
+                    (content_hash, path.name, now, now)
+                )
+                conn.execute("DELETE FROM efforts WHERE content_hash = ?", (content_hash,))
+                conn.executemany(
+                    "INSERT INTO efforts (content_hash, position, start_idx, end_idx, avg_power, is_modified) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (content_hash, pos, int(s), int(e), float(avg), int(bool(flag)))
+                        for pos, ((s, e, avg), flag) in enumerate(zip(efforts, flags))
+                    ]
+                )
+        finally:
+            conn.close()
+        return content_hash
+
+    # ========================================================================
+    # LETTURA
+    # ========================================================================
+
+    def load_efforts(self, fit_path: str) -> Optional[List[Tuple[int, int, float]]]:
+        """Effort salvati per il FIT (None se assenti)"""
+        path = Path(fit_path).resolve()
+        conn = self._connect()
+        try:
+            with conn:
+                content_hash = self._hash_with_cache(conn, path)
+                rows = conn.execute(
+                    "SELECT start_idx, end_idx, avg_power FROM efforts "
+                    "WHERE content_hash = ? ORDER BY position",
+                    (content_hash,)
+                ).fetchall()
+        finally:
+            conn.close()
+        return [tuple(r) for r in rows] if rows else None
+
+    def has_ride(self, fit_path: str) -> bool:
+        """True se il FIT è già stato salvato (anche con lista effort vuota)"""
+        path = Path(fit_path).resolve()
+        conn = self._connect()
+        try:
+            with conn:
+                content_hash = self._hash_with_cache(conn, path)
+                row = conn.execute("SELECT 1 FROM rides WHERE content_hash = ?", (content_hash,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def get_info(self, fit_path: str) -> Optional[Dict[str, Any]]:
+        """Info sugli effort salvati (data, numero effort, nome FIT) o None"""
+        path = Path(fit_path).resolve()
+        conn = self._connect()
+        try:
+            with conn:
+                content_hash = self._hash_with_cache(conn, path)
+                row = conn.execute(
+                    "SELECT r.created, r.updated, r.fit_name, COUNT(e.position), "
+                    "COALESCE(SUM(e.is_modified), 0) "
+                    "FROM rides r LEFT JOIN efforts e ON e.content_hash = r.content_hash "
+                    "WHERE r.content_hash = ? GROUP BY r.content_hash",
+                    (content_hash,)
+                ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None or row[3] == 0:
+            return None
+        return {
+            "path": str(self.db_path),
+            "content_hash": content_hash,
+            "created": row[0],
+            "updated": row[1],
+            "fit_name": row[2],
+            "effort_count": row[3],
+            "modified_count": row[4],
+        }
+
+    def load_folder(self, folder: str) -> Dict[str, List[Tuple[int, int, float]]]:
+        """
+        Effort salvati per tutti i FIT di una cartella.
+
+        Gli hash in cache della cartella si leggono con una query; solo i file
+        nuovi o cambiati vengono riletti. Gli effort arrivano con una seconda
+        query unica su tutti gli hash.
+
+        Returns:
+            Dict percorso FIT -> lista effort (solo i FIT con effort salvati)
+        """
+        directory = Path(folder).resolve()
+        fit_files = sorted(p for p in directory.iterdir() if p.suffix in FIT_EXTENSIONS)
+        if not fit_files:
+            return {}
+
+        conn = self._connect()
+        try:
+            with conn:
+                cached = {
+                    row[0]: (row[1], row[2], row[3])
+                    for row in conn.execute(
+                        "SELECT path, size, mtime_ns, content_hash FROM file_hashes WHERE directory = ?",
+                        (str(directory),)
+                    )
+                }
+                hash_to_paths: Dict[str, List[str]] = {}
+                for fit_path in fit_files:
+                    content_hash = self._hash_with_cache(conn, fit_path, cached.get(str(fit_path)))
+                    hash_to_paths.setdefault(content_hash, []).append(str(fit_path))
+
+                rows = conn.execute(
+                    "SELECT e.content_hash, e.start_idx, e.end_idx, e.avg_power FROM efforts e "
+                    "JOIN file_hashes f ON f.content_hash = e.content_hash "
+                    "WHERE f.directory = ? GROUP BY e.content_hash, e.position "
+                    "ORDER BY e.content_hash, e.position",
+                    (str(directory),)
+                ).fetchall()
+        finally:
+            conn.close()
+
+        result: Dict[str, List[Tuple[int, int, float]]] = {}
+        for content_hash, s, e, avg in rows:
+            for fit_path in hash_to_paths.get(content_hash, []):
+                result.setdefault(fit_path, []).append((s, e, avg))
+        return result
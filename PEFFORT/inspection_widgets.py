@@ -108,6 +108,8 @@ def build_graph_widget(parent):
     parent.figure = Figure(figsize=(18, 10), dpi=100)
     parent.canvas = FigureCanvas(parent.figure)
     parent.canvas.mpl_connect('button_press_event', parent.on_graph_click)
+    parent.canvas.mpl_connect('motion_notify_event', parent.on_graph_motion)
+    parent.canvas.mpl_connect('button_release_event', parent.on_graph_release)
     graph_container.addWidget(parent.canvas)
     
     # Toolbar
@@ -237,28 +239,37 @@ def update_detail_panel(parent, effort_idx: int):
     try:
         start_idx, end_idx, avg_power = parent.current_efforts[effort_idx]
         
-        power = parent.current_df['power'].values
-        time_sec = parent.current_df['time_sec'].values
-        
-        # Controlla se la colonna heartrate esiste
-        if 'heartrate' in parent.current_df.columns:
-            hr = parent.current_df['heartrate'].values
+        if parent.inspection_manager:
+            # Statistiche O(1) dalle somme prefisse del manager (in cache per effort)
+            stats = parent.inspection_manager.get_effort_stats(effort_idx)
+            start_time = stats['start_time']
+            end_time = stats['end_time']
+            power_peak = stats['power_peak']
+            hr_mean = stats['hr_mean']
+            hr_max = stats['hr_max']
         else:
-            hr = np.zeros(len(power))  # Array di zeri se heartrate non disponibile
-        
-        # end_idx è esclusivo, quindi usiamo slicing standard senza +1
-        seg_power = power[start_idx:end_idx]
-        seg_time = time_sec[start_idx:end_idx]
-        seg_hr = hr[start_idx:end_idx]
+            power = parent.current_df['power'].values
+            time_sec = parent.current_df['time_sec'].values
+            
+            # Controlla se la colonna heartrate esiste
+            if 'heartrate' in parent.current_df.columns:
+                hr = parent.current_df['heartrate'].values
+            else:
+                hr = np.zeros(len(power))  # Array di zeri se heartrate non disponibile
+            
+            # end_idx è esclusivo, quindi usiamo slicing standard senza +1
+            seg_power = power[start_idx:end_idx]
+            seg_time = time_sec[start_idx:end_idx]
+            seg_hr = hr[start_idx:end_idx]
+            
+            start_time = seg_time[0]
+            end_time = seg_time[-1]
+            power_peak = seg_power.max() if len(seg_power) > 0 else 0
+            hr_mean = seg_hr[seg_hr > 0].mean() if (seg_hr > 0).any() else 0
+            hr_max = seg_hr.max() if len(seg_hr) > 0 else 0
         
-        start_time = seg_time[0]
-        end_time = seg_time[-1]
         duration = int(end_time - start_time)
-        
-        power_peak = seg_power.max() if len(seg_power) > 0 else 0
         w_kg = avg_power / parent.current_weight if parent.current_weight > 0 else 0
-        hr_mean = seg_hr[seg_hr > 0].mean() if (seg_hr > 0).any() else 0
-        hr_max = seg_hr.max() if len(seg_hr) > 0 else 0
         
         # Aggiorna tabella
         parent.table_effort_detail.setItem(0, 1, QTableWidgetItem(format_time_hhmmss(start_time)))
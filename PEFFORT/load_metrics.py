@@ -0,0 +1,162 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+LOAD METRICS - Normalized Power, xPower, IF e TSS dallo stream grezzo
+Un'unica passata di somme cumulative per uscita, poi ogni intervallo in O(1)
+"""
+
+from typing import List, Tuple, Dict
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Finestra media mobile per NP [s]
+NP_WINDOW_SEC = 30
+# Costante di tempo della media esponenziale per xPower [s]
+XPOWER_TAU_SEC = 25
+# Intervallo di tempo per blocco nella media esponenziale: exp(span / tau) resta lontano dall'overflow
+EWMA_BLOCK_TAU = 500
+# Delta oltre il quale il campione non conta come tempo in movimento [s]
+MAX_SAMPLE_GAP = 30
+
+
+def ewma(time_sec: np.ndarray, power: np.ndarray, tau: float) -> np.ndarray:
+    """
+    Media mobile esponenziale con costante di tempo tau, su tempi irregolari.
+
+    Ricorrenza y_k = d_k y_{k-1} + (1 - d_k) p_k con d_k = exp(-dt_k / tau)
+    (il primo campione vale 1 s). Moltiplicando per E_k = exp(t_k / tau) la
+    ricorrenza diventa una somma cumulativa; i blocchi di EWMA_BLOCK_TAU * tau
+    secondi ripartono da un riferimento nuovo per evitare l'overflow.
+
+    Args:
+        time_sec: Tempi [s] (crescenti)
+        power: Potenza [W]
+        tau: Costante di tempo [s]
+
+    Returns:
+        Array della media esponenziale, stessa lunghezza di power
+    """
+    t = np.asarray(time_sec, dtype=float)
+    p = np.asarray(power, dtype=float)
+    out = np.empty(len(p))
+    if len(p) == 0:
+        return out
+    dt = np.diff(t, prepend=t[0] - 1.0)
+    gain = -np.expm1(-dt / tau)
+    block = np.floor((t - t[0]) / (EWMA_BLOCK_TAU * tau)).astype(np.int64)
+    edges = np.flatnonzero(np.diff(block, prepend=-1, append=block[-1] + 1))
+    carry = 0.0
+    for start, end in zip(edges[:-1], edges[1:]):
+        scale = np.exp((t[start:end] - t[start]) / tau)
+        decay_in = np.exp(-dt[start] / tau)
+        out[start:end] = (carry * decay_in + np.cumsum(gain[start:end] * p[start:end] * scale)) / scale
+        carry = out[end - 1]
+    return out
+
+
+class RideLoad:
+    """
+    Metriche di carico di un'uscita.
+
+    Costruisce una volta le somme prefisse di potenza, media mobile 30s alla
+    quarta, media esponenziale 25s alla quarta e tempo in movimento;
+    NP/xPower/IF/TSS di qualunque intervallo (uscita intera o effort) si
+    ricavano poi da differenze di somme prefisse.
+
+    La media mobile usa una finestra temporale (campioni negli ultimi 30 s) e
+    la media esponenziale decade con il tempo trascorso, quindi restano
+    corrette anche con campionamento irregolare o pause.
+    """
+
+    def __init__(self, time_sec: np.ndarray, power: np.ndarray, ftp: float):
+        """
+        Args:
+            time_sec: Tempi [s] (crescenti)
+            power: Potenza [W]
+            ftp: Functional Threshold Power [W]
+        """
+        if ftp <= 0:
+            raise ValueError(f"FTP non valida: {ftp}")
+        self.ftp = float(ftp)
+        self.time_sec = np.asarray(time_sec, dtype=float)
+        p = np.nan_to_num(np.asarray(power, dtype=float))
+        n = len(p)
+
+        self._cum_power = np.concatenate(([0.0], np.cumsum(p)))
+
+        # Media mobile: campioni con t in (t_k - 30, t_k]
+        window_start = np.searchsorted(self.time_sec, self.time_sec - NP_WINDOW_SEC, side='right')
+        counts = np.arange(1, n + 1) - window_start
+        rolling = (self._cum_power[1:] - self._cum_power[window_start]) / np.maximum(counts, 1)
+        self._cum_rolling4 = np.concatenate(([0.0], np.cumsum(rolling ** 4)))
+        self._cum_ewma4 = np.concatenate(([0.0], np.cumsum(ewma(self.time_sec, p, XPOWER_TAU_SEC) ** 4)))
+
+        # Tempo in movimento: delta dal campione precedente se 0 < dt < 30s
+        dt = np.diff(self.time_sec, prepend=self.time_sec[0] if n else 0.0)
+        self._cum_moving = np.concatenate(([0.0], np.cumsum(np.where((dt > 0) & (dt < MAX_SAMPLE_GAP), dt, 0.0))))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, ftp: float) -> 'RideLoad':
+        """Costruisce le metriche da un DataFrame di parse_fit"""
+        return cls(df['time_sec'].values, df['power'].values, ftp)
+
+    def range_metrics(self, starts: np.ndarray, ends: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        NP, xPower, IF e TSS per più intervalli [start, end) in blocco.
+
+        Per ogni intervallo contano solo le medie 30s la cui finestra copre 30 s
+        interamente dentro l'intervallo; se l'intervallo è più corto della
+        finestra, NP coincide con la potenza media. xPower usa tutti i campioni
+        dell'intervallo: la media esponenziale porta con sé lo storico precedente.
+
+        Returns:
+            Dict di array: avg_power, np, xpower, if_, tss, duration
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if np.any(ends <= starts):
+            raise ValueError("Intervalli non validi: end deve essere > start")
+
+        avg_power = (self._cum_power[ends] - self._cum_power[starts]) / (ends - starts)
+
+        # Primo campione con 30s di dati alle spalle dentro l'intervallo
+        first_full = np.searchsorted(self.time_sec, self.time_sec[starts] + NP_WINDOW_SEC - 1, side='left')
+        full = first_full < ends
+        first_full = np.where(full, first_full, starts)
+        n_full = np.maximum(ends - first_full, 1)
+        mean4 = (self._cum_rolling4[ends] - self._cum_rolling4[first_full]) / n_full
+        np_power = np.where(full, mean4 ** 0.25, avg_power)
+        xpower = ((self._cum_ewma4[ends] - self._cum_ewma4[starts]) / (ends - starts)) ** 0.25
+
+        # Durata come nelle tabelle effort (ultimo - primo + 1 campione)
+        duration = self.time_sec[ends - 1] - self.time_sec[starts] + 1
+        if_ = np_power / self.ftp
+        tss = duration * np_power * if_ / (self.ftp * 3600) * 100
+        return {'avg_power': avg_power, 'np': np_power, 'xpower': xpower, 'if_': if_, 'tss': tss,
+                'duration': duration}
+
+    def effort_metrics(self, efforts: List[Tuple[int, int, float]]) -> Dict[str, np.ndarray]:
+        """NP/xPower/IF/TSS per ogni effort (end esclusivo)"""
+        if not efforts:
+            return {key: np.zeros(0) for key in ('avg_power', 'np', 'xpower', 'if_', 'tss', 'duration')}
+        bounds = np.asarray([(s, e) for s, e, _ in efforts], dtype=np.int64)
+        return self.range_metrics(bounds[:, 0], bounds[:, 1])
+
+    def ride_metrics(self) -> Dict[str, float]:
+        """NP/xPower/IF/TSS dell'uscita intera (TSS sul tempo in movimento)"""
+        n = len(self.time_sec)
+        if n == 0:
+            return {'avg_power': 0.0, 'np': 0.0, 'xpower': 0.0, 'if_': 0.0, 'tss': 0.0, 'duration': 0.0}
+        metrics = {k: float(v[0]) for k, v in self.range_metrics(np.array([0]), np.array([n])).items()}
+        moving = float(self._cum_moving[-1])
+        metrics['duration'] = moving
+        metrics['tss'] = moving * metrics['np'] * metrics['if_'] / (self.ftp * 3600) * 100
+        return metrics
@@ -23,7 +23,8 @@ from .map3d_core import (
     export_traccia_geojson,
     validate_and_filter_coordinates,
     calculate_zoom_level,
-    prepare_efforts_data
+    prepare_efforts_data,
+    build_track_pyramid
 )
 from .map3d_renderer import generate_3d_map_html as render_html
 
@@ -109,6 +110,21 @@ def generate_3d_map_html(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]
         # Calcola zoom basato sull'extent
         zoom = calculate_zoom_level(lat, lon)
         
+        # ===== STEP 3b: Multi-resolution Track =====
+        # Traccia semplificata (Douglas-Peucker) per livello di zoom; inizio/fine
+        # degli effort restano vertici della traccia a ogni risoluzione
+        boundaries = [b for s, e, _ in efforts for b in (s, e)]
+        effort_positions = np.searchsorted(np.asarray(orig_indices), boundaries)
+        track_levels = build_track_pyramid(lat, lon, keep_positions=effort_positions)
+        track_levels_json = json.dumps([
+            {'minzoom': level_zoom, 'data': export_traccia_geojson(df_geom.iloc[kept])[0]}
+            for level_zoom, kept in sorted(track_levels.items())
+        ])
+        logger.info(
+            "Traccia multi-risoluzione: " +
+            ", ".join(f"z{z}={len(k)}" for z, k in sorted(track_levels.items()))
+        )
+        
         # ===== STEP 4: Track Statistics =====
         if 'altitude' in df.columns:
             alt_min = df['altitude'].min()
@@ -158,7 +174,8 @@ def generate_3d_map_html(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]
             center_lat=center_lat,
             center_lon=center_lon,
             zoom=zoom,
-            distance_km=distance_km
+            distance_km=distance_km,
+            track_levels_json=track_levels_json
         )
         
         logger.info("Mappa 3D generata con successo")
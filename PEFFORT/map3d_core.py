@@ -14,18 +14,27 @@ import json
 import logging
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional, Iterable
 from .peffort_engine import get_zone_color
 
 logger = logging.getLogger(__name__)
 
+# Costanti geografiche per semplificazione traccia
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_PIXEL_Z0 = 156543.03392  # Web Mercator, tile 256px, all'equatore
+TRACK_PYRAMID_ZOOMS = (8, 10, 12, 14)
+TRACK_PIXEL_TOLERANCE = 0.5
 
-def export_traccia_geojson(df: pd.DataFrame) -> Tuple[dict, List[int]]:
+
+def export_traccia_geojson(df: pd.DataFrame, tolerance_m: Optional[float] = None,
+                           keep_positions: Optional[Iterable[int]] = None) -> Tuple[dict, List[int]]:
     """
     Esporta la traccia in formato GeoJSON LineString con altitudine.
     
     Args:
         df: DataFrame con colonne position_lat, position_long, altitude
+        tolerance_m: Tolleranza Douglas-Peucker in metri (None = tutti i punti)
+        keep_positions: Posizioni (nel df) da mantenere sempre come vertici
         
     Returns:
         Dict GeoJSON FeatureCollection con traccia LineString, lista indici originali
@@ -35,12 +44,19 @@ def export_traccia_geojson(df: pd.DataFrame) -> Tuple[dict, List[int]]:
     
     lat = df['position_lat'].values
     lon = df['position_long'].values
-    alt = df['altitude'].values if 'altitude' in df.columns else [0] * len(lat)
+    alt = df['altitude'].values if 'altitude' in df.columns else np.zeros(len(lat))
     
-    # Crea coordinate [lon, lat, alt] (GeoJSON format)
-    coordinates = [[float(lon[i]), float(lat[i]), float(alt[i])] for i in range(len(lat))]
     # Mantieni mappatura verso indici originali del DataFrame filtrato
-    orig_indices = df.index.to_list()
+    orig_indices = df.index.to_numpy()
+    
+    if tolerance_m is not None:
+        kept = simplify_track_rdp(lat, lon, tolerance_m, keep_positions)
+        lat, lon, alt = lat[kept], lon[kept], alt[kept]
+        orig_indices = orig_indices[kept]
+    
+    # Crea coordinate [lon, lat, alt] (GeoJSON format)
+    coordinates = np.column_stack((lon, lat, alt)).astype(float).tolist()
+    orig_indices = orig_indices.tolist()
     
     feature = {
         "type": "Feature",
@@ -111,6 +127,167 @@ def calculate_zoom_level(lat_values: np.ndarray, lon_values: np.ndarray) -> int:
         return 11
 
 
+def zoom_to_tolerance(zoom: float, lat_ref: float,
+                      pixel_tolerance: float = TRACK_PIXEL_TOLERANCE) -> float:
+    """
+    Converte un livello di zoom in tolleranza di semplificazione (metri).
+    
+    Args:
+        zoom: Livello zoom mappa (Web Mercator)
+        lat_ref: Latitudine di riferimento [gradi]
+        pixel_tolerance: Errore massimo ammesso sullo schermo [pixel]
+        
+    Returns:
+        Tolleranza in metri
+    """
+    meters_per_pixel = METERS_PER_PIXEL_Z0 * np.cos(np.radians(lat_ref)) / (2 ** zoom)
+    return float(pixel_tolerance * meters_per_pixel)
+
+
+def _project_to_meters(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Proiezione equirettangolare locale (metri) centrata sulla traccia"""
+    lat0 = np.radians(np.nanmean(lat))
+    lon0 = np.nanmean(lon)
+    x = EARTH_RADIUS_M * np.radians(lon - lon0) * np.cos(lat0)
+    y = EARTH_RADIUS_M * np.radians(lat - np.degrees(lat0))
+    return x, y
+
+
+def _segment_distance_sq(px: np.ndarray, py: np.ndarray,
+                         ax: float, ay: float, bx: float, by: float) -> np.ndarray:
+    """Distanza al quadrato dei punti (px, py) dal segmento A-B"""
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq > 0:
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+    else:
+        # Segmento degenere (es. circuito chiuso): distanza dal punto A
+        t = np.zeros_like(px)
+    return (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+
+
+def simplify_track_rdp(lat: np.ndarray, lon: np.ndarray, tolerance_m: float,
+                       keep_positions: Optional[Iterable[int]] = None) -> np.ndarray:
+    """
+    Semplificazione Ramer-Douglas-Peucker della traccia (versione iterativa a stack).
+    
+    Le distanze di ogni sotto-segmento sono calcolate in modo vettoriale; le
+    posizioni in keep_positions (es. inizio/fine effort) restano sempre vertici,
+    così gli effort cadono esattamente su punti della traccia semplificata.
+    
+    Args:
+        lat: Array di latitudini [gradi]
+        lon: Array di longitudini [gradi]
+        tolerance_m: Distanza massima ammessa dalla traccia originale [m]
+        keep_positions: Posizioni da mantenere obbligatoriamente
+        
+    Returns:
+        Array ordinato delle posizioni mantenute (indici nell'input)
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    if n <= 2 or tolerance_m <= 0:
+        return np.arange(n)
+    
+    x, y = _project_to_meters(lat, lon)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = True
+    keep[-1] = True
+    if keep_positions is not None:
+        forced = np.asarray(list(keep_positions), dtype=int)
+        forced = forced[(forced >= 0) & (forced < n)]
+        keep[forced] = True
+    
+    # Ogni coppia di vertici obbligatori è un sotto-problema indipendente
+    anchors = np.flatnonzero(keep)
+    stack = [(int(a), int(b)) for a, b in zip(anchors[:-1], anchors[1:]) if b - a > 1]
+    tolerance_sq = tolerance_m * tolerance_m
+    
+    while stack:
+        a, b = stack.pop()
+        dist_sq = _segment_distance_sq(x[a+1:b], y[a+1:b], x[a], y[a], x[b], y[b])
+        k = int(np.argmax(dist_sq))
+        if dist_sq[k] > tolerance_sq:
+            m = a + 1 + k
+            keep[m] = True
+            if m - a > 1:
+                stack.append((a, m))
+            if b - m > 1:
+                stack.append((m, b))
+    
+    return np.flatnonzero(keep)
+
+
+def build_track_pyramid(lat: np.ndarray, lon: np.ndarray,
+                        zooms: Iterable[int] = TRACK_PYRAMID_ZOOMS,
+                        keep_positions: Optional[Iterable[int]] = None,
+                        pixel_tolerance: float = TRACK_PIXEL_TOLERANCE) -> Dict[int, np.ndarray]:
+    """
+    Precalcola la traccia semplificata a più risoluzioni (una per livello di zoom).
+    
+    I livelli sono calcolati dal più dettagliato al più grossolano, e ogni livello
+    semplifica i vertici del precedente: il costo totale resta vicino a una sola
+    passata sulla traccia completa.
+    
+    Args:
+        lat: Array di latitudini [gradi]
+        lon: Array di longitudini [gradi]
+        zooms: Livelli di zoom per cui precalcolare la traccia
+        keep_positions: Posizioni da mantenere in tutti i livelli
+        pixel_tolerance: Errore massimo sullo schermo [pixel]
+        
+    Returns:
+        Dict zoom -> array posizioni mantenute (indici nell'input)
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    lat_ref = float(np.nanmean(lat)) if len(lat) > 0 else 0.0
+    forced = np.asarray(list(keep_positions) if keep_positions is not None else [], dtype=int)
+    
+    levels: Dict[int, np.ndarray] = {}
+    current = np.arange(len(lat))
+    for zoom in sorted(zooms, reverse=True):
+        tolerance = zoom_to_tolerance(zoom, lat_ref, pixel_tolerance)
+        # Rimappa le posizioni obbligatorie sui vertici del livello precedente
+        local_forced = np.searchsorted(current, forced)
+        kept_local = simplify_track_rdp(lat[current], lon[current], tolerance, local_forced)
+        current = current[kept_local]
+        levels[int(zoom)] = current
+        logger.debug(f"Traccia zoom {zoom}: {len(current)} punti (tolleranza {tolerance:.1f} m)")
+    
+    return levels
+
+
+def calculate_cumulative_joules(time_sec: np.ndarray, power: np.ndarray,
+                                ftp: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcola il lavoro cumulativo (totale e sopra CP) campione per campione.
+    
+    I delta temporali non positivi o >= 30s (pause) non contribuiscono.
+    
+    Args:
+        time_sec: Array tempi [s]
+        power: Array potenze [W]
+        ftp: Functional Threshold Power (soglia "sopra CP")
+        
+    Returns:
+        Tuple (joules_cumulative, joules_over_cp_cumulative)
+    """
+    power = np.asarray(power)
+    if len(power) == 0:
+        return np.zeros(0), np.zeros(0)
+    
+    dt = np.diff(np.asarray(time_sec, dtype=float))
+    work = np.where((dt > 0) & (dt < 30), power[1:] * dt, 0.0)
+    work_over_cp = np.where(power[1:] >= ftp, work, 0.0)
+    
+    joules_cumulative = np.concatenate(([0.0], np.cumsum(work)))
+    joules_over_cp_cumulative = np.concatenate(([0.0], np.cumsum(work_over_cp)))
+    return joules_cumulative, joules_over_cp_cumulative
+
+
 def calculate_effort_parameters(s: int, e: int, avg: float, 
                                df: pd.DataFrame, 
                                alt_values: np.ndarray,
@@ -261,37 +438,22 @@ def prepare_efforts_data(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]
     time_sec = df['time_sec'].values if 'time_sec' in df.columns else np.arange(len(df))
     power_all = df['power'].values if 'power' in df.columns else np.zeros(len(df))
     
-    joules_cumulative = np.zeros(len(power_all))
-    joules_over_cp_cumulative = np.zeros(len(power_all))
-    for i in range(1, len(power_all)):
-        dt = time_sec[i] - time_sec[i-1]
-        if dt > 0 and dt < 30:
-            joules_cumulative[i] = joules_cumulative[i-1] + power_all[i] * dt
-            if power_all[i] >= ftp:
-                joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1] + power_all[i] * dt
-            else:
-                joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1]
-        else:
-            joules_cumulative[i] = joules_cumulative[i-1]
-            joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1]
+    joules_cumulative, joules_over_cp_cumulative = calculate_cumulative_joules(time_sec, power_all, ftp)
     
     efforts_list: List[Dict[str, Any]] = []
     coords = geojson_data['features'][0]['geometry']['coordinates']
     
-    for s, e, avg in efforts:
-        # Mappa indici da effort a coordinate filtrate
-        pos_start = 0
-        for idx_f, idx_orig in enumerate(orig_indices):
-            if idx_orig >= s:
-                pos_start = idx_f
-                break
-        
-        pos_end = len(orig_indices) - 1
-        for idx_f, idx_orig in enumerate(orig_indices):
-            if idx_orig >= e:
-                pos_end = idx_f
-                break
-        
+    # Mappa indici da effort a coordinate filtrate (tutti gli effort in un colpo solo):
+    # prima posizione con indice originale >= start/end, fallback 0 / ultima posizione
+    orig_array = np.asarray(orig_indices)
+    starts = np.fromiter((s for s, _, _ in efforts), dtype=float, count=len(efforts))
+    ends = np.fromiter((e for _, e, _ in efforts), dtype=float, count=len(efforts))
+    pos_starts = np.searchsorted(orig_array, starts, side='left')
+    pos_ends = np.searchsorted(orig_array, ends, side='left')
+    pos_starts[pos_starts >= len(orig_array)] = 0
+    pos_ends[pos_ends >= len(orig_array)] = len(orig_array) - 1
+    
+    for (s, e, avg), pos_start, pos_end in zip(efforts, pos_starts.tolist(), pos_ends.tolist()):
         if pos_end < pos_start:
             pos_end = pos_start + 1
         if pos_end >= len(coords):
@@ -52,7 +52,8 @@ def get_css_styles() -> str:
 
 
 def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojson_str: str, 
-                        maptiler_key: str, center_lat: float, center_lon: float, zoom: int) -> str:
+                        maptiler_key: str, center_lat: float, center_lon: float, zoom: int,
+                        track_levels_json: str = "[]") -> str:
     """
     Generate the complete JavaScript code for map interaction and visualization.
     
@@ -64,6 +65,7 @@ def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojso
         center_lat: Map center latitude
         center_lon: Map center longitude
         zoom: Initial zoom level
+        track_levels_json: JSON list of {minzoom, data} simplified track levels
         
     Returns:
         str: Complete JavaScript code block
@@ -94,6 +96,25 @@ def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojso
 
         const tracceGeoJSON = {geojson_str};
         console.log('Traccia GeoJSON caricata:', tracceGeoJSON);
+        // Livelli semplificati (Douglas-Peucker), ordinati per minzoom crescente
+        const trackLevels = {track_levels_json};
+        let currentTrackLevel = null;
+
+        function trackDataForZoom(z) {{
+            if (!trackLevels.length) return tracceGeoJSON;
+            // Oltre due livelli di zoom sopra il più dettagliato usa la traccia completa
+            if (z >= trackLevels[trackLevels.length - 1].minzoom + 2) return tracceGeoJSON;
+            let data = trackLevels[0].data;
+            trackLevels.forEach(level => {{ if (z >= level.minzoom) data = level.data; }});
+            return data;
+        }}
+
+        function updateTrackResolution() {{
+            const data = trackDataForZoom(map.getZoom());
+            if (data === currentTrackLevel || !map.getSource('traccia')) return;
+            currentTrackLevel = data;
+            map.getSource('traccia').setData(data);
+        }}
         const elevationData = JSON.parse('{elevation_data_json}');
         console.log('Elevation data:', elevationData);
         
@@ -446,10 +467,11 @@ def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojso
         }}
 
         function addOverlays() {{
+            currentTrackLevel = trackDataForZoom(map.getZoom());
             if (!map.getSource('traccia')) {{
-                map.addSource('traccia', {{ 'type': 'geojson', 'data': tracceGeoJSON }});
+                map.addSource('traccia', {{ 'type': 'geojson', 'data': currentTrackLevel }});
             }} else {{
-                map.getSource('traccia').setData(tracceGeoJSON);
+                map.getSource('traccia').setData(currentTrackLevel);
             }}
             if (!map.getLayer('traccia-line')) {{
                 map.addLayer({{
@@ -472,12 +494,9 @@ def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojso
             console.log('Efforts loaded:', efforts);
 
             efforts.forEach(function(effort, idx) {{
-                const feature = tracceGeoJSON.features[0];
-                if (!feature || !feature.geometry || !feature.geometry.coordinates) {{
-                    console.error('Invalid feature or coordinates');
-                    return;
-                }}
-                const coordStart = feature.geometry.coordinates[effort.pos];
+                // Il primo punto del segmento coincide con il vertice di inizio effort
+                // a qualunque risoluzione della traccia
+                const coordStart = effort.segment && effort.segment.length ? effort.segment[0] : null;
                 if (!coordStart) {{
                     console.warn(`No coordinate at pos index ${{effort.pos}}`);
                     return;
@@ -525,6 +544,8 @@ def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojso
             drawFullElevationChart();
         }});
 
+        map.on('zoomend', updateTrackResolution);
+
         map.on('error', (e) => {{ console.error('Map error:', e); }});
 
         function updateStyleName() {{
@@ -571,7 +592,7 @@ def get_javascript_code(efforts_data_json: str, elevation_data_json: str, geojso
 
 def generate_3d_map_html(efforts_data_json: str, elevation_data_json: str, geojson_str: str,
                          maptiler_key: str, center_lat: float, center_lon: float, zoom: int,
-                         distance_km: float) -> str:
+                         distance_km: float, track_levels_json: str = "[]") -> str:
     """
     Generate the complete HTML document for the 3D map visualization.
     
@@ -584,13 +605,15 @@ def generate_3d_map_html(efforts_data_json: str, elevation_data_json: str, geojs
         center_lon: Map center longitude
         zoom: Initial zoom level
         distance_km: Total track distance in km
+        track_levels_json: JSON list of {minzoom, data} simplified track levels
         
     Returns:
         str: Complete HTML document
     """
     css_styles = get_css_styles()
     javascript_code = get_javascript_code(efforts_data_json, elevation_data_json, geojson_str, 
-                                         maptiler_key, center_lat, center_lon, zoom)
+                                         maptiler_key, center_lat, center_lon, zoom,
+                                         track_levels_json)
     
     html = f"""<!DOCTYPE html>
 <html>
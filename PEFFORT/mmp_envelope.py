@@ -0,0 +1,263 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+MMP ENVELOPE - Curva best-power di stagione aggiornata in modo incrementale
+MMP per uscita, inviluppo con max elemento per elemento, finestre temporali (42/90 giorni)
+"""
+
+from typing import List, Tuple, Dict, Any, Optional, Sequence
+import logging
+import numpy as np
+import pandas as pd
+
+from .data_quality import detector_power
+
+logger = logging.getLogger(__name__)
+
+# Durate MMP [s]: griglia logaritmica 1s - 2h
+MMP_DURATIONS = np.unique(np.round(np.geomspace(1, 7200, 120)).astype(int))
+# Finestre temporali di default [giorni]
+DEFAULT_WINDOWS_DAYS = (42, 90)
+# Gap oltre il quale i campioni mancanti non vengono ricostruiti [s]
+RESAMPLE_MAX_GAP = 30
+
+
+def resample_1hz(time_sec: np.ndarray, power: np.ndarray) -> np.ndarray:
+    """
+    Potenza su griglia regolare a 1 Hz.
+
+    I buchi brevi (< RESAMPLE_MAX_GAP) ripetono l'ultimo valore, le pause più
+    lunghe valgono 0 W, così una media su d secondi copre davvero d secondi.
+    """
+    t = np.round(np.asarray(time_sec, dtype=float) - time_sec[0]).astype(np.int64)
+    p = np.asarray(power, dtype=float)
+    out = np.zeros(int(t[-1]) + 1)
+    # Indice del campione valido più recente per ogni secondo
+    last = np.full(len(out), -1, dtype=np.int64)
+    last[t] = np.arange(len(t))
+    last = np.maximum.accumulate(last)
+    gap = np.diff(t, append=t[-1] + 1)
+    keep = (np.arange(len(out)) == t[last]) | (gap[last] < RESAMPLE_MAX_GAP)
+    out[keep] = p[last[keep]]
+    return out
+
+
+def compute_mmp(power: np.ndarray, durations: Sequence[int] = MMP_DURATIONS) -> np.ndarray:
+    """
+    Mean Maximal Power per ogni durata da una serie a 1 Hz (somme cumulative, O(n) per durata).
+
+    Args:
+        power: Potenza a 1 Hz [W]
+        durations: Durate [s]
+
+    Returns:
+        Array MMP [W] (NaN per durate più lunghe dell'uscita)
+    """
+    p = np.nan_to_num(np.asarray(power, dtype=float))
+    cum = np.concatenate(([0.0], np.cumsum(p)))
+    mmp = np.full(len(durations), np.nan)
+    for i, d in enumerate(durations):
+        if d <= len(p):
+            mmp[i] = (cum[d:] - cum[:-d]).max() / d
+    return mmp
+
+
+def ride_mmp(df: pd.DataFrame, durations: Sequence[int] = MMP_DURATIONS) -> np.ndarray:
+    """
+    MMP di un'uscita da parse_fit (colonne time_sec, power).
+
+    Con la maschera qualità di clean_ride i campioni scartati sono ricostruiti
+    dai vicini (detector_power): un picco non entra nei punti da 1-10 s.
+    """
+    return compute_mmp(resample_1hz(df['time_sec'].values, detector_power(df)), durations)
+
+
+def _merge(old_values: np.ndarray, old_idx: np.ndarray, new_values: np.ndarray,
+           new_idx: np.ndarray, prefer_new: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Max elemento per elemento con indice dell'uscita vincente (NaN = assente)"""
+    old_cmp = np.where(np.isnan(old_values), -np.inf, old_values)
+    new_cmp = np.where(np.isnan(new_values), -np.inf, new_values)
+    take_new = (new_cmp >= old_cmp) if prefer_new else (new_cmp > old_cmp)
+    take_new &= ~np.isnan(new_values)
+    return np.where(take_new, new_values, old_values), np.where(take_new, new_idx, old_idx)
+
+
+class _WindowMaxQueue:
+    """
+    Coda FIFO di MMP con massimo elemento per elemento in O(durate) ammortizzato.
+
+    Due stack: il posteriore accumula gli inserimenti con il loro massimo corrente,
+    l'anteriore contiene le uscite più vecchie con il massimo verso le più recenti.
+    Una rimozione dal fronte non richiede mai di riesaminare le altre uscite.
+    """
+
+    def __init__(self, n_durations: int):
+        self.n = n_durations
+        self.front: List[Tuple[np.datetime64, np.ndarray, np.ndarray]] = []
+        self.back: List[Tuple[np.datetime64, np.ndarray, np.ndarray]] = []
+        self.back_agg = (np.full(n_durations, np.nan), np.full(n_durations, -1))
+
+    def __len__(self) -> int:
+        return len(self.front) + len(self.back)
+
+    def push(self, timestamp: np.datetime64, values: np.ndarray, ride_idx: int) -> None:
+        """Aggiunge l'uscita più recente"""
+        idx = np.full(self.n, ride_idx)
+        self.back.append((timestamp, values, idx))
+        self.back_agg = _merge(*self.back_agg, values, idx, prefer_new=True)
+
+    def _refill_front(self) -> None:
+        """Sposta lo stack posteriore nel fronte calcolando i massimi suffissi"""
+        agg = (np.full(self.n, np.nan), np.full(self.n, -1))
+        for timestamp, values, idx in reversed(self.back):
+            # Uscita più vecchia: a parità vince la più recente già aggregata
+            agg = _merge(values, idx, *agg, prefer_new=True)
+            self.front.append((timestamp, *agg))
+        self.back = []
+        self.back_agg = (np.full(self.n, np.nan), np.full(self.n, -1))
+
+    def oldest(self) -> Optional[np.datetime64]:
+        """Timestamp dell'uscita più vecchia in coda"""
+        if not self.front and self.back:
+            self._refill_front()
+        return self.front[-1][0] if self.front else None
+
+    def pop(self) -> None:
+        """Rimuove l'uscita più vecchia"""
+        if not self.front:
+            self._refill_front()
+        self.front.pop()
+
+    def envelope(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Massimo su tutte le uscite in coda (valori, indice uscita)"""
+        if not self.front:
+            return self.back_agg
+        return _merge(self.front[-1][1], self.front[-1][2], *self.back_agg, prefer_new=True)
+
+
+class SeasonEnvelope:
+    """
+    Inviluppo best-power di stagione aggiornato uscita per uscita.
+
+    L'inviluppo complessivo è un max elemento per elemento con, per ogni durata,
+    l'uscita e la data che hanno fissato il record. Le finestre temporali
+    (es. ultimi 42/90 giorni) usano code a due stack: aggiungere un'uscita o
+    scartare quelle uscite dalla finestra costa O(durate) ammortizzato.
+
+    Le uscite vanno aggiunte in ordine cronologico; un'uscita più vecchia
+    dell'ultima aggiunta ricostruisce solo le code delle finestre.
+    """
+
+    def __init__(self, durations: Sequence[int] = MMP_DURATIONS,
+                 windows_days: Sequence[int] = DEFAULT_WINDOWS_DAYS):
+        """
+        Args:
+            durations: Durate MMP [s] comuni a tutte le uscite
+            windows_days: Finestre temporali da mantenere [giorni]
+        """
+        self.durations = np.asarray(durations, dtype=int)
+        self.windows_days = tuple(int(w) for w in windows_days)
+        self.ride_ids: List[str] = []
+        self.timestamps: List[np.datetime64] = []
+        self.mmps: List[np.ndarray] = []
+
+        n = len(self.durations)
+        self.best = np.full(n, np.nan)
+        self.best_idx = np.full(n, -1)
+        self.windows = {w: _WindowMaxQueue(n) for w in self.windows_days}
+        self.now: Optional[np.datetime64] = None
+
+    def __len__(self) -> int:
+        return len(self.ride_ids)
+
+    def add_ride(self, ride_id: str, timestamp, mmp: np.ndarray) -> None:
+        """
+        Unisce l'MMP di una nuova uscita all'inviluppo.
+
+        Args:
+            ride_id: Identificativo uscita
+            timestamp: Data/ora dell'uscita
+            mmp: MMP sulle stesse durate dell'inviluppo
+        """
+        mmp = np.asarray(mmp, dtype=float)
+        if mmp.shape != self.durations.shape:
+            raise ValueError(f"MMP con {len(mmp)} durate, attese {len(self.durations)}")
+
+        ts = np.datetime64(pd.Timestamp(timestamp).tz_localize(None), 's')
+        ride_idx = len(self.ride_ids)
+        self.ride_ids.append(ride_id)
+        self.timestamps.append(ts)
+        self.mmps.append(mmp)
+
+        # A parità resta il record più vecchio
+        self.best, self.best_idx = _merge(self.best, self.best_idx, mmp,
+                                          np.full(len(mmp), ride_idx), prefer_new=False)
+
+        if self.now is not None and ts < self.now:
+            logger.debug(f"Uscita {ride_id} fuori ordine: ricostruzione finestre")
+            self._rebuild_windows(self.now)
+            return
+        for queue in self.windows.values():
+            queue.push(ts, mmp, ride_idx)
+        self.advance(ts)
+
+    def add_rides(self, rides: Sequence[Tuple[str, Any, np.ndarray]]) -> None:
+        """Aggiunge più uscite (ride_id, timestamp, mmp) ordinandole per data"""
+        for ride_id, timestamp, mmp in sorted(rides, key=lambda r: pd.Timestamp(r[1])):
+            self.add_ride(ride_id, timestamp, mmp)
+
+    def advance(self, now) -> None:
+        """Porta le finestre alla data now scartando le uscite uscite dalla finestra"""
+        now = np.datetime64(pd.Timestamp(now).tz_localize(None), 's')
+        if self.now is not None and now < self.now:
+            raise ValueError("Le finestre possono solo avanzare nel tempo")
+        self.now = now
+        for days, queue in self.windows.items():
+            cutoff = now - np.timedelta64(days, 'D')
+            while len(queue) and queue.oldest() <= cutoff:
+                queue.pop()
+
+    def _rebuild_windows(self, now: np.datetime64) -> None:
+        """Ricostruisce le code delle finestre dalle uscite in ordine cronologico"""
+        order = np.argsort(np.asarray(self.timestamps), kind='stable')
+        self.windows = {w: _WindowMaxQueue(len(self.durations)) for w in self.windows_days}
+        for days, queue in self.windows.items():
+            cutoff = now - np.timedelta64(days, 'D')
+            for i in order:
+                if cutoff < self.timestamps[i] <= now:
+                    queue.push(self.timestamps[i], self.mmps[i], int(i))
+
+    def envelope(self, window_days: Optional[int] = None) -> pd.DataFrame:
+        """
+        Curva best-power complessiva o di una finestra.
+
+        Args:
+            window_days: None = tutta la stagione, altrimenti una delle finestre configurate
+
+        Returns:
+            DataFrame con colonne duration, power, ride_id, timestamp (solo durate coperte)
+        """
+        if window_days is None:
+            values, idx = self.best, self.best_idx
+        elif window_days in self.windows:
+            values, idx = self.windows[window_days].envelope()
+        else:
+            raise ValueError(f"Finestra non configurata: {window_days} giorni")
+
+        valid = ~np.isnan(values) & (idx >= 0)
+        return pd.DataFrame({
+            'duration': self.durations[valid],
+            'power': values[valid],
+            'ride_id': [self.ride_ids[i] for i in idx[valid]],
+            'timestamp': [self.timestamps[i] for i in idx[valid]],
+        })
+
+    def point_cloud(self, window_days: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Arrays (t [s], P [W]) dell'inviluppo, pronti per calculate_omnipd_model"""
+        env = self.envelope(window_days)
+        return env['duration'].to_numpy(dtype=float), env['power'].to_numpy(dtype=float)
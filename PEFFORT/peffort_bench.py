@@ -0,0 +1,249 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+BENCHMARK - Tempi di engine, exporter e mappa 3D su uscite sintetiche
+Risultati in JSON lines (bench_output.txt) confrontabili tra versioni
+
+Uso: python -m PEFFORT.peffort_bench --hours 1 4 24 --compare vecchio_bench.txt
+"""
+
+from typing import List, Dict, Any, Callable, Optional, Sequence
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from .peffort_config import AnalysisConfig
+from .synthetic_ride import synthetic_ride, write_fit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOURS = (1, 4, 12, 24)
+DEFAULT_OUTPUT = 'bench_output.txt'
+# Rallentamento relativo oltre il quale il confronto segnala una regressione
+REGRESSION_THRESHOLD = 0.20
+# Passi che producono l'input dei successivi (eseguiti anche se esclusi da --only)
+PIPELINE_STAGES = ('parse_fit', 'clean_ride', 'create_efforts', 'merge_extend', 'split_included', 'detect_sprints')
+
+
+def _git_revision() -> str:
+    """Commit corrente del repository (o 'unknown' fuori da git)"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return result.stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia profonda dello stato: ogni ripetizione parte dallo stesso input"""
+    return {key: value.copy() if isinstance(value, pd.DataFrame) else copy.deepcopy(value)
+            for key, value in state.items()}
+
+
+def _time_call(fn: Callable[[Dict[str, Any]], Any], state: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """
+    Esegue fn repeat volte, ognuna su una copia fresca di state (copia fuori dal tempo misurato).
+
+    Returns:
+        Tempi e risultato dell'ultima esecuzione
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        fresh = _copy_state(state)
+        t0 = time.perf_counter()
+        result = fn(fresh)
+        times.append(time.perf_counter() - t0)
+    return {'best_s': min(times), 'median_s': float(np.median(times)), 'mean_s': float(np.mean(times)),
+            'result': result}
+
+
+def _stages(fit_path: str, config: AnalysisConfig, workdir: str) -> List[tuple]:
+    """
+    Sequenza (nome, funzione) dei passi misurati.
+
+    Ogni funzione riceve lo stato e non lo modifica: i passi della pipeline
+    restituiscono il dict di aggiornamento (applicato una volta dal chiamante),
+    così merge_extend lavora sugli efforts di create_efforts e gli exporter sul
+    risultato finale, e ogni ripetizione misura lo stesso input.
+    """
+    from .peffort_engine import parse_fit, create_efforts, merge_extend, split_included, detect_sprints
+    from .data_quality import clean_ride
+
+    ec, sc, athlete = config.effort_config, config.sprint_config, config.athlete
+
+    def plot_unified(state):
+        from .peffort_exporter import plot_unified_html
+        return plot_unified_html(state['df'], state['efforts'], state['sprints'], athlete.ftp, athlete.weight,
+                                 ec.window_seconds, ec.merge_power_diff_percent, ec.min_effort_intensity_ftp,
+                                 ec.trim_window_seconds, ec.trim_low_percent, ec.extend_window_seconds,
+                                 ec.extend_low_percent, sc.window_seconds, sc.min_power)
+
+    def plot_stream(state):
+        from .stream_exporter import plot_stream_html
+        return plot_stream_html(state['df'], state['efforts'], state['sprints'], athlete.ftp, athlete.weight)
+
+    def plot_planimetria(state):
+        from .pplan_exporter import plot_planimetria_html
+        return plot_planimetria_html(state['df'], state['efforts'], state['sprints'], athlete.ftp, athlete.weight)
+
+    def pdf_report(state):
+        from .report_pdf import render_pdf_report
+        return render_pdf_report(state['df'], state['efforts'], state['sprints'], athlete.ftp, athlete.weight,
+                                 os.path.join(workdir, 'bench_report.pdf'), 'benchmark')
+
+    def map3d(state):
+        from .map3d_builder import generate_3d_map_html
+        return generate_3d_map_html(state['df'], state['efforts'], athlete.ftp, athlete.weight)
+
+    return [
+        ('parse_fit', lambda state: {'df': parse_fit(fit_path)}),
+        ('clean_ride', lambda state: {'df': clean_ride(state['df'], config.quality_config)[0]}),
+        ('create_efforts', lambda state: {'efforts': create_efforts(
+            state['df'], athlete.ftp, ec.window_seconds, ec.merge_power_diff_percent,
+            ec.min_effort_intensity_ftp, ec.trim_window_seconds, ec.trim_low_percent)}),
+        ('merge_extend', lambda state: {'efforts': merge_extend(
+            state['df'], state['efforts'], ec.merge_power_diff_percent, ec.trim_window_seconds,
+            ec.trim_low_percent, ec.extend_window_seconds, ec.extend_low_percent)}),
+        ('split_included', lambda state: {'efforts': split_included(state['df'], state['efforts'])}),
+        ('detect_sprints', lambda state: {'sprints': detect_sprints(
+            state['df'], sc.min_power, sc.window_seconds, merge_gap_sec=sc.merge_gap_sec)}),
+        ('plot_unified_html', plot_unified),
+        ('plot_stream_html', plot_stream),
+        ('plot_planimetria_html', plot_planimetria),
+        ('render_pdf_report', pdf_report),
+        ('generate_3d_map_html', map3d),
+    ]
+
+
+def run_benchmarks(hours: Sequence[float] = DEFAULT_HOURS, efforts_per_hour: float = 4,
+                   repeat: int = 3, seed: int = 0, only: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Misura tutti i passi su uscite sintetiche di varie durate.
+
+    Args:
+        hours: Durate delle uscite [h]
+        efforts_per_hour: Densità efforts del generatore
+        repeat: Ripetizioni per passo (si registrano best/mediana/media)
+        seed: Seme del generatore
+        only: Sottoinsieme di passi da misurare (None = tutti)
+
+    Returns:
+        Lista di record (uno per passo e durata); un passo fallito ha 'error'
+    """
+    config = AnalysisConfig.from_dict({})
+    # L'HTML 3D incorpora solo la chiave: il benchmark non scarica tile
+    os.environ.setdefault('MAPTILER_KEY', 'benchmark')
+    meta = {
+        'revision': _git_revision(),
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+    }
+    records = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for h in hours:
+            df = synthetic_ride(h, efforts_per_hour=efforts_per_hour, seed=seed)
+            fit_path = os.path.join(workdir, f'synthetic_{h}h.fit')
+            write_fit(df, fit_path)
+            state = {'df': df}
+            for name, stage in _stages(fit_path, config, workdir):
+                if only and name not in only:
+                    if name in PIPELINE_STAGES:
+                        # Eseguito una volta senza misura: fornisce l'input ai passi successivi
+                        state.update(stage(state))
+                    continue
+                record = {**meta, 'benchmark': name, 'hours': h, 'samples': len(df),
+                          'efforts_per_hour': efforts_per_hour, 'repeat': repeat}
+                try:
+                    timing = _time_call(stage, state, repeat)
+                    if name in PIPELINE_STAGES:
+                        state.update(timing['result'])
+                    record.update({k: v for k, v in timing.items() if k != 'result'})
+                    record['error'] = None
+                    logger.info(f"Benchmark {name} ({h:g}h): best {record['best_s'] * 1000:.1f} ms, "
+                                f"mediana {record['median_s'] * 1000:.1f} ms")
+                except Exception as e:
+                    logger.error(f"Benchmark {name} ({h}h) fallito: {e}")
+                    record.update({'best_s': None, 'median_s': None, 'mean_s': None, 'error': str(e)})
+                records.append(record)
+    return records
+
+
+def write_results(records: List[Dict[str, Any]], output_path: str = DEFAULT_OUTPUT) -> None:
+    """Scrive i record in JSON lines (un oggetto per riga)"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    logger.info(f"Risultati benchmark salvati: {output_path}")
+
+
+def load_results(path: str) -> pd.DataFrame:
+    """Legge un file di risultati JSON lines"""
+    return pd.read_json(path, lines=True)
+
+
+def compare_results(baseline_path: str, current: pd.DataFrame,
+                    threshold: float = REGRESSION_THRESHOLD) -> pd.DataFrame:
+    """
+    Confronta i tempi mediani con un file di riferimento.
+
+    Returns:
+        DataFrame per (benchmark, hours) con mediane, rapporto e flag regression
+    """
+    baseline = load_results(baseline_path)
+    keys = ['benchmark', 'hours']
+    merged = baseline[keys + ['median_s']].merge(current[keys + ['median_s']], on=keys,
+                                                 suffixes=('_base', '_new'))
+    merged['ratio'] = merged['median_s_new'] / merged['median_s_base']
+    merged['regression'] = merged['ratio'] > 1 + threshold
+    return merged
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point da riga di comando; exit code 1 se ci sono regressioni"""
+    parser = argparse.ArgumentParser(description="Benchmark PEFFORT su uscite sintetiche")
+    parser.add_argument('--hours', type=float, nargs='+', default=list(DEFAULT_HOURS))
+    parser.add_argument('--efforts-per-hour', type=float, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='+', help="Passi da misurare (gli altri girano senza misura)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', help="File di risultati di riferimento")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    records = run_benchmarks(args.hours, args.efforts_per_hour, args.repeat, args.seed, args.only)
+    for record in records:
+        if record['best_s'] is not None:
+            print(f"{record['benchmark']:24s} {record['hours']:5g}h  best {record['best_s'] * 1000:9.1f} ms  "
+                  f"median {record['median_s'] * 1000:9.1f} ms")
+    write_results(records, args.output)
+    if not args.compare:
+        return 0
+
+    comparison = compare_results(args.compare, pd.DataFrame(records), args.threshold)
+    print(comparison.to_string(index=False))
+    return 1 if comparison['regression'].any() else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -10,7 +10,7 @@ CONFIGURATION - Configurazione centralizzata per PEFFORT
 Dataclasses con validazione e valori di default
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 import logging
 
@@ -59,11 +59,65 @@ class SprintConfig:
             raise ValueError("merge_gap_sec non può essere negativo")
 
 
+@dataclass
+class QualityConfig:
+    """Configurazione pulizia dati potenza"""
+    # Finestra mediana/MAD centrata [campioni]. Una finestra w non "vede" i blocchi fino a (w - 1) / 2
+    # campioni, quindi allargarla marcherebbe sprint più lunghi: i surge veri sono protetti da spike_max_samples
+    spike_window: int = 9
+    spike_max_samples: int = 2  # Sequenze anomale più lunghe sono sforzi veri, non picchi [campioni]
+    spike_mad_k: float = 6.0  # Soglia in deviazioni robuste
+    spike_min_delta: float = 200  # Scarto minimo dalla mediana per un picco [W]
+    max_power: float = 2500  # Oltre è sempre un picco [W]
+    dropout_min_sec: float = 3  # Durata minima di zeri con cadenza per un dropout [s]
+    interpolate: bool = False  # Interpola i campioni scartati nella colonna power
+    max_interp_sec: float = 10  # Buchi più lunghi non vengono interpolati [s]
+
+    def __post_init__(self):
+        """Validazione parametri"""
+        if self.spike_window < 3 or self.spike_window % 2 == 0:
+            raise ValueError("spike_window deve essere dispari e >= 3")
+        if not 1 <= self.spike_max_samples <= self.spike_window // 2:
+            raise ValueError("spike_max_samples deve essere tra 1 e spike_window // 2")
+        if self.spike_mad_k <= 0 or self.spike_min_delta < 0:
+            raise ValueError("spike_mad_k deve essere > 0 e spike_min_delta >= 0")
+        if self.max_power <= 0:
+            raise ValueError("max_power deve essere > 0")
+        if self.dropout_min_sec < 0 or self.max_interp_sec < 0:
+            raise ValueError("dropout_min_sec e max_interp_sec non possono essere negativi")
+
+
+@dataclass
+class ClimbConfig:
+    """Configurazione per rilevamento salite"""
+    smooth_distance_m: float = 100  # Finestra media mobile altitudine [m]
+    grade_distance_m: float = 200  # Base di calcolo pendenza [m]
+    start_grade: float = 3.0  # Pendenza di ingresso in salita [%]
+    end_grade: float = 1.0  # Pendenza di uscita dalla salita [%]
+    merge_gap_m: float = 300  # Tratti più vicini vengono uniti [m]
+    min_length_m: float = 500
+    min_gain_m: float = 30
+    min_avg_grade: float = 3.0  # [%]
+
+    def __post_init__(self):
+        """Validazione parametri"""
+        if self.smooth_distance_m <= 0 or self.grade_distance_m <= 0:
+            raise ValueError("smooth_distance_m e grade_distance_m devono essere > 0")
+        if self.end_grade > self.start_grade:
+            raise ValueError("end_grade deve essere <= start_grade (isteresi)")
+        if self.merge_gap_m < 0:
+            raise ValueError("merge_gap_m non può essere negativo")
+        if self.min_length_m < 0 or self.min_gain_m < 0:
+            raise ValueError("min_length_m e min_gain_m non possono essere negativi")
+
+
 @dataclass
 class AthleteProfile:
     """Profilo atleta con validazione"""
     ftp: float  # Functional Threshold Power [W]
     weight: float  # Peso corporeo [kg]
+    cp: Optional[float] = None  # Critical Power da omniPD [W]
+    w_prime: Optional[float] = None  # W' da omniPD [J]
 
     def __post_init__(self):
         """Validazione profilo atleta"""
@@ -71,6 +125,15 @@ class AthleteProfile:
             raise ValueError(f"FTP non valida: {self.ftp}. Deve essere tra 1 e 500 W")
         if self.weight <= 0 or self.weight > 200:
             raise ValueError(f"Peso non valido: {self.weight}. Deve essere tra 1 e 200 kg")
+        if self.cp is not None and self.cp <= 0:
+            raise ValueError(f"CP non valida: {self.cp}")
+        if self.w_prime is not None and self.w_prime <= 0:
+            raise ValueError(f"W' non valido: {self.w_prime}")
+
+    @property
+    def has_wbal_model(self) -> bool:
+        """True se CP e W' sono disponibili per il calcolo W'bal"""
+        return self.cp is not None and self.w_prime is not None
 
     @property
     def w_per_kg(self) -> float:
@@ -84,6 +147,7 @@ class AnalysisConfig:
     athlete: AthleteProfile
     effort_config: EffortConfig
     sprint_config: SprintConfig
+    quality_config: QualityConfig = field(default_factory=QualityConfig)
 
     def validate(self) -> bool:
         """Valida tutte le configurazioni"""
@@ -104,7 +168,9 @@ class AnalysisConfig:
         """Factory method per creare config da dizionario"""
         athlete = AthleteProfile(
             ftp=config_dict.get('ftp', 280),
-            weight=config_dict.get('weight', 70)
+            weight=config_dict.get('weight', 70),
+            cp=config_dict.get('cp'),
+            w_prime=config_dict.get('w_prime')
         )
         effort_config = EffortConfig(
             window_seconds=config_dict.get('window_seconds', 60),
@@ -120,8 +186,13 @@ class AnalysisConfig:
             min_power=config_dict.get('min_sprint_power', 500),
             merge_gap_sec=config_dict.get('sprint_merge_gap', 1.0)
         )
+        quality_config = QualityConfig(
+            max_power=config_dict.get('max_power', 2500),
+            interpolate=config_dict.get('interpolate_dropouts', False)
+        )
         return AnalysisConfig(
             athlete=athlete,
             effort_config=effort_config,
-            sprint_config=sprint_config
+            sprint_config=sprint_config,
+            quality_config=quality_config
         )
@@ -10,12 +10,15 @@ CORE ENGINE - Logica pura per analisi efforts e sprints
 Contiene: parsing FIT, calcoli VAM, filtraggio, analisi sprint
 """
 
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 import logging
 import numpy as np
 import pandas as pd
 from fitparse import FitFile
 
+from .peffort_config import QualityConfig
+from .data_quality import detector_power, clean_ride, MISSING_COLUMN, QUALITY_COLUMN
+
 logger = logging.getLogger(__name__)
 
 # =====================
@@ -70,16 +73,18 @@ def format_time_mmss(seconds: float) -> str:
 # FUNZIONI CORE - PARSING & DATA
 # =====================
 
-def parse_fit(file_path: str) -> pd.DataFrame:
+def parse_fit(file_path: str, quality: Optional[QualityConfig] = None) -> pd.DataFrame:
     """
     Estrae dati FIT in DataFrame con validazione.
     
     Args:
         file_path: Percorso al file FIT
+        quality: QualityConfig opzionale; se presente applica la pulizia potenza
         
     Returns:
         DataFrame con colonne: time, power, altitude, distance, heartrate, grade, cadence, 
-        position_lat, position_long, time_sec, distance_km
+        position_lat, position_long, time_sec, distance_km, power_missing
+        (+ power_quality se quality è indicato)
         
     Raises:
         FileNotFoundError: Se il file non esiste
@@ -135,7 +140,9 @@ def parse_fit(file_path: str) -> pd.DataFrame:
         raise ValueError(f"Errore parsing timestamp: {str(e)}")
     
     # Riempimento intelligente con fallback
-    df["power"] = pd.to_numeric(df["power"], errors='coerce').fillna(0).astype(int)
+    df["power"] = pd.to_numeric(df["power"], errors='coerce')
+    df[MISSING_COLUMN] = df["power"].isna()
+    df["power"] = df["power"].fillna(0).astype(int)
     df["heartrate"] = pd.to_numeric(df["heartrate"], errors='coerce').fillna(0).astype(int)
     df["cadence"] = pd.to_numeric(df["cadence"], errors='coerce').fillna(0).astype(int)
     
@@ -172,6 +179,8 @@ def parse_fit(file_path: str) -> pd.DataFrame:
     df["distance_km"] = df["distance"] / 1000
     
     logger.info(f"DataFrame creato: {len(df)} righe")
+    if quality is not None:
+        df, _ = clean_ride(df, quality)
     return df
 
 
@@ -261,6 +270,28 @@ def trim_segment(power: np.ndarray, start: int, end: int, trim_win: int, trim_pc
     return start, end
 
 
+def _detector_avgs(df: pd.DataFrame, power: np.ndarray,
+                   efforts: List[Tuple[int, int, float]]) -> List[Tuple[int, int, float]]:
+    """Medie degli efforts in ingresso sulla potenza dei rilevatori (con maschera qualità)"""
+    if QUALITY_COLUMN not in df.columns:
+        return efforts
+    return [(s, e, power[s:e].mean() if e > s else 0) for s, e, _ in efforts]
+
+
+def _reported_avgs(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]) -> List[Tuple[int, int, float]]:
+    """
+    Medie degli efforts in uscita sulla colonna power.
+
+    I confini si cercano su detector_power (un picco non crea né allunga uno
+    sforzo), ma la media salvata è quella della serie letta da tabelle, NP/kJ,
+    PDF e inspection: così ogni consumatore vede lo stesso numero.
+    """
+    if QUALITY_COLUMN not in df.columns:
+        return efforts
+    power = df['power'].to_numpy(dtype=float)
+    return [(s, e, power[s:e].mean() if e > s else 0) for s, e, _ in efforts]
+
+
 def create_efforts(df: pd.DataFrame, ftp: float, window_sec: int = 60, merge_pct: float = 15, 
                    min_ftp_pct: float = 100, trim_win: int = 10, trim_low: float = 85) -> List[Tuple[int, int, float]]:
     """Crea finestre, merge, trim, filtro FTP.
@@ -287,7 +318,7 @@ def create_efforts(df: pd.DataFrame, ftp: float, window_sec: int = 60, merge_pct
     if min_ftp_pct < 0 or min_ftp_pct > 300:
         raise ValueError(f"min_ftp_pct fuori range: {min_ftp_pct}")
     
-    power = df["power"].values
+    power = detector_power(df)
     n = len(power)
     windows = []
     i = 0
@@ -327,7 +358,7 @@ def create_efforts(df: pd.DataFrame, ftp: float, window_sec: int = 60, merge_pct
         idx = j
     
     logger.info(f"Creati {len(merged)} efforts")
-    return merged
+    return _reported_avgs(df, merged)
 
 
 def merge_extend(df: pd.DataFrame, efforts: List[Tuple[int, int, float]], 
@@ -347,7 +378,8 @@ def merge_extend(df: pd.DataFrame, efforts: List[Tuple[int, int, float]],
     Returns:
         Lista di efforts dopo merge/extend
     """
-    power = df["power"].values
+    power = detector_power(df)
+    efforts = _detector_avgs(df, power, efforts)
     changed = True
     
     while changed:
@@ -398,7 +430,7 @@ def merge_extend(df: pd.DataFrame, efforts: List[Tuple[int, int, float]],
             changed = True
         efforts = new_eff
     
-    return efforts
+    return _reported_avgs(df, efforts)
 
 
 def split_included(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]) -> List[Tuple[int, int, float]]:
@@ -411,8 +443,8 @@ def split_included(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]) -> L
     Returns:
         Lista di efforts modificati dopo split
     """
-    power = df["power"].values
-    sorted_efforts = sorted(efforts, key=lambda x: x[0])  # Create sorted copy
+    power = detector_power(df)
+    sorted_efforts = sorted(_detector_avgs(df, power, efforts), key=lambda x: x[0])  # Create sorted copy
     changed = True
     
     while changed:
@@ -457,7 +489,7 @@ def split_included(df: pd.DataFrame, efforts: List[Tuple[int, int, float]]) -> L
                     changed = True
                     break
     
-    return sorted_efforts
+    return _reported_avgs(df, sorted_efforts)
 
 
 # =====================
@@ -486,7 +518,7 @@ def detect_sprints(df: pd.DataFrame, min_power: float, min_duration_sec: float,
     if min_duration_sec <= 0:
         raise ValueError(f"min_duration_sec non valida: {min_duration_sec}")
     
-    power = df["power"].values
+    power = detector_power(df)
     time_sec = df["time_sec"].values
     
     above_threshold = power >= min_power
@@ -535,4 +567,35 @@ def detect_sprints(df: pd.DataFrame, min_power: float, min_duration_sec: float,
     
     merged.append(curr)
     logger.info(f"Rilevati {len(merged)} sprint")
+    if QUALITY_COLUMN in df.columns:
+        # Come per gli efforts: confini sulla potenza dei rilevatori, media sulla colonna power
+        raw = df['power'].to_numpy(dtype=float)
+        for sprint in merged:
+            sprint['avg'] = np.mean(raw[sprint['start']:sprint['end']])
     return merged
+
+
+def analyze_ride(df: pd.DataFrame, config) -> Tuple[List[Tuple[int, int, float]], List[Dict[str, Any]]]:
+    """
+    Pipeline completa efforts + sprints con una AnalysisConfig (stessa sequenza della GUI).
+    
+    Args:
+        df: DataFrame da parse_fit (pulito con quality_config se manca la maschera qualità)
+        config: AnalysisConfig (athlete, effort_config, sprint_config, quality_config)
+        
+    Returns:
+        Tuple (efforts, sprints)
+    """
+    ec = config.effort_config
+    sc = config.sprint_config
+    ftp = config.athlete.ftp
+    if QUALITY_COLUMN not in df.columns:
+        df, _ = clean_ride(df, config.quality_config)
+    
+    efforts = create_efforts(df, ftp, ec.window_seconds, ec.merge_power_diff_percent,
+                             ec.min_effort_intensity_ftp, ec.trim_window_seconds, ec.trim_low_percent)
+    efforts = merge_extend(df, efforts, ec.merge_power_diff_percent, ec.trim_window_seconds,
+                           ec.trim_low_percent, ec.extend_window_seconds, ec.extend_low_percent)
+    efforts = split_included(df, efforts)
+    sprints = detect_sprints(df, sc.min_power, sc.window_seconds, merge_gap_sec=sc.merge_gap_sec)
+    return efforts, sprints
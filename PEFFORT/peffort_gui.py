@@ -20,14 +20,16 @@ from PySide6.QtWidgets import (
     QTabWidget
 )
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import QUrl, QBuffer, QIODevice, QRect
+from PySide6.QtCore import QUrl
 import tempfile
 import webbrowser
-import base64
 from pathlib import Path
 
 from .peffort_engine import format_time_hhmmss
-from .peffort_exporter import create_pdf_report, plot_unified_html
+from .peffort_exporter import plot_unified_html
+from .report_pdf import render_pdf_report
+from .load_metrics import RideLoad
+from .climb_detection import get_climb_index
 from .peffort_config import AnalysisConfig, AthleteProfile, EffortConfig, SprintConfig
 from .pplan_gui import PlanimetriaTab
 from .stream_gui import StreamTab
@@ -230,8 +232,8 @@ class EffortAnalyzer(QWidget):
         tables_container.setSpacing(15)
 
         self.table_efforts = QTableWidget()
-        self.table_efforts.setColumnCount(5)
-        self.table_efforts.setHorizontalHeaderLabels(["Inizio", "Durata", "Watt", "W/kg", "VAM"])
+        self.table_efforts.setColumnCount(8)
+        self.table_efforts.setHorizontalHeaderLabels(["Inizio", "Durata", "Watt", "NP", "W/kg", "VAM", "TSS", "Salita"])
         self.table_efforts.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table_efforts.verticalHeader().setVisible(False)
         
@@ -364,7 +366,7 @@ class EffortAnalyzer(QWidget):
             self.status_label.setText("⏳ Parsing file FIT...")
             QApplication.processEvents()
             try:
-                df = parse_fit(self.file_path)
+                df = parse_fit(self.file_path, quality=self.current_config.quality_config)
                 logger.info(f"File FIT parsato: {len(df)} record")
             except FileNotFoundError as e:
                 self.show_error_dialog(f"File non trovato: {str(e)}")
@@ -479,7 +481,11 @@ class EffortAnalyzer(QWidget):
             hr = df["heartrate"].values
             grade = df["grade"].values
 
-            # Tabella Efforts
+            # Tabella Efforts (NP/TSS da un'unica passata di somme cumulative)
+            load = RideLoad.from_dataframe(df, ftp).effort_metrics(efforts)
+            # Salita di appartenenza (indice in cache con il DataFrame dell'uscita)
+            climb_index = get_climb_index(df)
+            climb_join = climb_index.join_efforts(efforts)
             self.table_efforts.setRowCount(len(efforts))
             for i, (s, e, avg) in enumerate(efforts):
                 seg_alt = alt[s:e]
@@ -495,8 +501,15 @@ class EffortAnalyzer(QWidget):
                 self.table_efforts.setItem(i, 0, QTableWidgetItem(format_time_hhmmss(seg_time[0])))
                 self.table_efforts.setItem(i, 1, QTableWidgetItem(f"{duration}s"))
                 self.table_efforts.setItem(i, 2, QTableWidgetItem(f"{avg:.0f}"))
-                self.table_efforts.setItem(i, 3, QTableWidgetItem(f"{w_kg:.2f}"))
-                self.table_efforts.setItem(i, 4, QTableWidgetItem(f"{vam:.0f}"))
+                self.table_efforts.setItem(i, 3, QTableWidgetItem(f"{load['np'][i]:.0f}"))
+                self.table_efforts.setItem(i, 4, QTableWidgetItem(f"{w_kg:.2f}"))
+                self.table_efforts.setItem(i, 5, QTableWidgetItem(f"{vam:.0f}"))
+                self.table_efforts.setItem(i, 6, QTableWidgetItem(f"{load['tss'][i]:.1f}"))
+                climb_label = "—"
+                if climb_join['climb'][i] >= 0:
+                    climb = climb_index.climbs.iloc[climb_join['climb'][i]]
+                    climb_label = f"{climb['length_m'] / 1000:.1f} km @ {climb['avg_grade']:.1f}%"
+                self.table_efforts.setItem(i, 7, QTableWidgetItem(climb_label))
 
             # Tabella Sprints
             self.table_sprints.setRowCount(len(sprints))
@@ -538,36 +551,17 @@ class EffortAnalyzer(QWidget):
             return
 
         try:
-            self.status_label.setText("⏳ Cattura immagine...")
-            QApplication.processEvents()
-
-            left_margin = 1
-            top_margin = 35
-            right_margin = 130
-            bottom_margin = 1
-
-            graph_width = self.web_view.width() - left_margin - right_margin
-            graph_height = self.web_view.height() - top_margin - bottom_margin
-
-            rect = QRect(left_margin, top_margin, graph_width, graph_height)
-            pixmap = self.web_view.grab(rect)
-            
-            buffer = QBuffer()
-            buffer.open(QIODevice.OpenModeFlag.ReadWrite)
-            pixmap.save(buffer, "PNG")
-            b64_data = base64.b64encode(buffer.data().data()).decode()
-
             ftp = float(self.ftp_input.text())
             weight = float(self.weight_input.text())
             
             self.status_label.setText("⏳ Generazione PDF...")
             QApplication.processEvents()
             
-            success = create_pdf_report(
+            # Report vettoriale dagli array: indipendente da webview e dimensione finestra
+            success = render_pdf_report(
                 self.current_df, 
                 self.current_efforts, 
                 self.current_sprints, 
-                b64_data,
                 ftp, 
                 weight, 
                 pdf_path,
@@ -17,6 +17,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.io as pio
 from .peffort_engine import format_time_hhmmss, get_zone_color
+from .map3d_core import simplify_track_rdp, zoom_to_tolerance, calculate_cumulative_joules
 
 logger = logging.getLogger(__name__)
 
@@ -95,19 +96,7 @@ def plot_planimetria_html(df: pd.DataFrame, efforts: List[Tuple[int, int, float]
     cadence = df["cadence"].values
     
     # Calcolo Joules cumulative
-    joules_cumulative = np.zeros(len(power))
-    joules_over_cp_cumulative = np.zeros(len(power))
-    for i in range(1, len(power)):
-        dt = time_sec[i] - time_sec[i-1]
-        if dt > 0 and dt < 30:
-            joules_cumulative[i] = joules_cumulative[i-1] + power[i] * dt
-            if power[i] >= ftp:
-                joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1] + power[i] * dt
-            else:
-                joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1]
-        else:
-            joules_cumulative[i] = joules_cumulative[i-1]
-            joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1]
+    joules_cumulative, joules_over_cp_cumulative = calculate_cumulative_joules(time_sec, power, ftp)
     
     # Rimuovi punti senza coordinate
     valid = ~np.isnan(lat) & ~np.isnan(lon) & (lat != 0) & (lon != 0)
@@ -117,11 +106,20 @@ def plot_planimetria_html(df: pd.DataFrame, efforts: List[Tuple[int, int, float]
     
     fig = go.Figure()
     
-    # Traccia principale - percorso completo
-    step = max(1, len(lat[valid]) // 2000)
+    # Traccia principale - semplificata Douglas-Peucker con tolleranza legata allo zoom
+    # iniziale (+2 livelli di margine per lo zoom interattivo), mantenendo come vertici
+    # inizio/fine di effort e sprint
+    valid_idx = np.flatnonzero(valid)
+    boundaries = [b for s, e, _ in efforts for b in (s, e)]
+    boundaries += [b for sprint in sprints for b in (sprint['start'], sprint['end'])]
+    keep_positions = np.searchsorted(valid_idx, boundaries)
+    track_zoom = calculate_zoom_level(lat[valid], lon[valid]) + 2
+    tolerance_m = zoom_to_tolerance(track_zoom, np.nanmean(lat[valid]))
+    kept = valid_idx[simplify_track_rdp(lat[valid], lon[valid], tolerance_m, keep_positions)]
+    logger.info(f"Traccia planimetria: {len(kept)} punti su {len(valid_idx)}")
     fig.add_trace(go.Scattermapbox(
-        lat=lat[valid][::step],
-        lon=lon[valid][::step],
+        lat=lat[kept],
+        lon=lon[kept],
         mode='lines',
         line=dict(color="#EEFF00", width=3), #COLORE TRACCIA PLANIMETRIA
         name='Percorso',
@@ -0,0 +1,461 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+REPORT PDF - Report PDF vettoriale generato direttamente dagli array
+Headless (nessuna finestra o webview), eseguibile in processi worker per export batch
+"""
+
+from typing import List, Tuple, Dict, Any, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import logging
+import numpy as np
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.graphics.shapes import Drawing, Rect, Line, PolyLine, Polygon, String
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from .peffort_engine import format_time_hhmmss, get_zone_color
+from .peffort_config import AnalysisConfig
+from .inspection_builder import SignalPyramid
+from .load_metrics import RideLoad
+
+logger = logging.getLogger(__name__)
+
+# Margine pagina A4 e dimensione grafico [pt]
+PAGE_MARGIN = 1 * cm
+CHART_SIZE = (A4[0] - 2 * PAGE_MARGIN, 260)
+# Punti massimi della linea di potenza (inviluppo min/max oltre questa soglia)
+CHART_MAX_POINTS = 3000
+
+EFFORT_COLUMNS = ["ID", "Start", "Dur", "Power", "NP", "W/kg", "%FTP", "Best 5s", "HR", "VAM", "Grade", "kJ", "TSS"]
+SPRINT_COLUMNS = ["ID", "Start", "Dur", "Avg Power", "Max Power", "W/kg", "HR Max", "Cad Avg/Max", "Speed Max"]
+
+
+# ============================================================================
+# METRICHE TABELLE (calcolate in blocco per tutti gli effort)
+# ============================================================================
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """Colonna come array float, zeri se assente"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=float)
+    logger.warning(f"Colonna mancante nel DataFrame: {name}")
+    return np.zeros(len(df))
+
+
+def _rank_map(values: Sequence[float]) -> np.ndarray:
+    """Posizione in classifica (1 = valore più alto) per ogni elemento"""
+    order = np.argsort(-np.asarray(values, dtype=float), kind='stable')
+    ranks = np.empty(len(order), dtype=int)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+def build_effort_rows(df: pd.DataFrame, efforts: List[Tuple[int, int, float]],
+                      ftp: float, weight: float, load: Optional[RideLoad] = None) -> List[Dict[str, Any]]:
+    """
+    Metriche della tabella effort calcolate con somme prefisse su tutta l'uscita.
+
+    Args:
+        df: DataFrame con dati attività
+        efforts: Lista efforts (start, end, avg_power), end esclusivo
+        ftp: Functional Threshold Power
+        weight: Peso atleta
+        load: Metriche di carico già calcolate per l'uscita (None = calcolate qui)
+
+    Returns:
+        Lista di dict (una riga per effort, nell'ordine di input)
+    """
+    if not efforts:
+        return []
+    load_metrics = (load or RideLoad.from_dataframe(df, ftp)).effort_metrics(efforts)
+
+    time_sec = _column(df, 'time_sec')
+    power = _column(df, 'power')
+    alt = _column(df, 'altitude')
+    dist = _column(df, 'distance')
+    hr = _column(df, 'heartrate')
+
+    bounds = np.asarray([(s, e) for s, e, _ in efforts], dtype=int)
+    avg = np.asarray([a for _, _, a in efforts], dtype=float)
+    starts, ends = bounds[:, 0], bounds[:, 1]
+    lasts = ends - 1
+
+    duration = (time_sec[lasts] - time_sec[starts] + 1).astype(int)
+    elevation_gain = alt[lasts] - alt[starts]
+    dist_tot = dist[lasts] - dist[starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_grade = np.where(dist_tot > 0, elevation_gain / dist_tot * 100, 0.0)
+        vam = np.where(duration > 0, elevation_gain / (duration / 3600), 0.0)
+
+    # HR media dei campioni > 0
+    hr_pos = hr > 0
+    cum_hr = np.concatenate(([0], np.cumsum(np.where(hr_pos, hr, 0))))
+    cum_hr_n = np.concatenate(([0], np.cumsum(hr_pos)))
+    hr_n = cum_hr_n[ends] - cum_hr_n[starts]
+
+    # Lavoro: potenza del campione k per il delta dal precedente (0 < dt < 30s)
+    dt = np.diff(time_sec, prepend=time_sec[0] if len(time_sec) else 0)
+    work = np.where((dt > 0) & (dt < 30), power * dt, 0.0)
+    cum_work = np.concatenate(([0], np.cumsum(work)))
+    energy_kj = (cum_work[ends] - cum_work[np.minimum(starts + 1, ends)]) / 1000
+
+    # Media mobile 5 campioni su tutta l'uscita, massimo per effort
+    cum_power = np.concatenate(([0], np.cumsum(power)))
+    rolling_5 = (cum_power[5:] - cum_power[:-5]) / 5
+
+    ranks = _rank_map(avg)
+    rows = []
+    for i, (s, e) in enumerate(bounds):
+        best_5s = int(rolling_5[s:e - 4].max()) if e - s >= 5 else 0
+        rows.append({
+            'rank': int(ranks[i]),
+            'start_time': float(time_sec[s]),
+            'duration': int(duration[i]),
+            'avg_power': float(avg[i]),
+            'w_kg': avg[i] / weight if weight > 0 else 0.0,
+            'perc_ftp': avg[i] / ftp * 100 if ftp > 0 else 0.0,
+            'best_5s': best_5s,
+            'hr_mean': int((cum_hr[e] - cum_hr[s]) / hr_n[i]) if hr_n[i] > 0 else None,
+            'vam': float(vam[i]),
+            'avg_grade': float(avg_grade[i]),
+            'energy_kj': float(energy_kj[i]),
+            'np': float(load_metrics['np'][i]),
+            'if_': float(load_metrics['if_'][i]),
+            'tss': float(load_metrics['tss'][i]),
+        })
+    return rows
+
+
+def build_sprint_rows(df: pd.DataFrame, sprints: List[Dict[str, Any]],
+                      weight: float) -> List[Dict[str, Any]]:
+    """
+    Metriche della tabella sprint.
+
+    Args:
+        df: DataFrame con dati attività
+        sprints: Lista sprints {start, end, avg}
+        weight: Peso atleta
+
+    Returns:
+        Lista di dict (una riga per sprint, nell'ordine di input)
+    """
+    if not sprints:
+        return []
+
+    time_sec = _column(df, 'time_sec')
+    power = _column(df, 'power')
+    hr = _column(df, 'heartrate')
+    cadence = _column(df, 'cadence')
+    dist_km = _column(df, 'distance_km')
+
+    # Velocità istantanea tra campioni consecutivi [km/h]
+    dt = np.diff(time_sec)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.where(dt > 0, np.diff(dist_km) / dt * 3600, -np.inf)
+
+    ranks = _rank_map([sp['avg'] for sp in sprints])
+    rows = []
+    for i, sprint in enumerate(sprints):
+        s, e = sprint['start'], sprint['end']
+        seg_hr = hr[s:e]
+        seg_cad = cadence[s:e]
+        seg_cad = seg_cad[seg_cad > 0]
+        seg_speed = speed[s:e - 1]
+        max_speed = float(seg_speed.max()) if len(seg_speed) and np.isfinite(seg_speed.max()) else 0.0
+        rows.append({
+            'rank': int(ranks[i]),
+            'start_time': float(time_sec[s]),
+            'duration': int(e - s),
+            'avg_power': float(sprint['avg']),
+            'max_power': float(power[s:e].max()),
+            'w_kg': sprint['avg'] / weight if weight > 0 else 0.0,
+            'hr_max': float(seg_hr.max()) if (seg_hr > 0).any() else 0.0,
+            'cadence': (float(seg_cad.mean()), float(seg_cad.max())) if len(seg_cad) else None,
+            'max_speed': max_speed,
+        })
+    return rows
+
+
+def _effort_cells(rows: List[Dict[str, Any]]) -> List[List[str]]:
+    """Righe effort formattate per la tabella"""
+    return [[
+        f"#{r['rank']}",
+        format_time_hhmmss(r['start_time']),
+        f"{r['duration']}s",
+        f"{r['avg_power']:.0f} W",
+        f"{r['np']:.0f} W",
+        f"{r['w_kg']:.2f}",
+        f"{r['perc_ftp']:.0f}%",
+        f"{r['best_5s']:.0f} W",
+        f"{r['hr_mean']}" if r['hr_mean'] is not None else "-",
+        f"{r['vam']:.0f}",
+        f"{r['avg_grade']:.1f}%",
+        f"{r['energy_kj']:.0f}",
+        f"{r['tss']:.1f}",
+    ] for r in rows]
+
+
+def _sprint_cells(rows: List[Dict[str, Any]]) -> List[List[str]]:
+    """Righe sprint formattate per la tabella"""
+    return [[
+        f"S#{r['rank']}",
+        format_time_hhmmss(r['start_time']),
+        f"{r['duration']}s",
+        f"{r['avg_power']:.0f} W",
+        f"{r['max_power']:.0f} W",
+        f"{r['w_kg']:.2f}",
+        f"{r['hr_max']:.0f}",
+        f"{r['cadence'][0]:.0f}/{r['cadence'][1]:.0f}" if r['cadence'] else "-",
+        f"{r['max_speed']:.1f}",
+    ] for r in rows]
+
+
+# ============================================================================
+# RENDERING PDF
+# ============================================================================
+
+def _nice_step(span: float, target_ticks: int = 6) -> float:
+    """Passo "tondo" (1, 2, 5 x 10^k) per circa target_ticks tacche"""
+    if span <= 0:
+        return 1.0
+    raw = span / target_ticks
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for mult in (1, 2, 5, 10):
+        if raw <= mult * magnitude:
+            return float(mult * magnitude)
+    return float(10 * magnitude)
+
+
+def _build_chart(df: pd.DataFrame, efforts: List[Tuple[int, int, float]],
+                 sprints: List[Dict[str, Any]], ftp: float) -> Drawing:
+    """Grafico potenza/altimetria con effort e sprint evidenziati (primitive vettoriali)"""
+    time_sec = _column(df, 'time_sec')
+    power = _column(df, 'power')
+    alt = _column(df, 'altitude')
+    minutes = time_sec / 60
+
+    left, bottom = 36, 24
+    plot_w, plot_h = CHART_SIZE[0] - left - 10, CHART_SIZE[1] - bottom - 8
+    drawing = Drawing(*CHART_SIZE)
+
+    # Inviluppo min/max: stessi picchi del segnale grezzo con pochi punti
+    pyramid = SignalPyramid(minutes, power, max_points=CHART_MAX_POINTS)
+    px, py, _ = pyramid.view(minutes[0], minutes[-1])
+    x0, x1 = float(minutes[0]), float(minutes[-1])
+    y1 = max(pyramid.max_value * 1.05, ftp * 1.2)
+
+    def sx(x):
+        return left + (np.asarray(x, dtype=float) - x0) / max(x1 - x0, 1e-9) * plot_w
+
+    def sy(y):
+        return bottom + np.clip(np.asarray(y, dtype=float), 0, y1) / y1 * plot_h
+
+    # Altimetria di sfondo scalata sull'altezza del grafico
+    alt_pyramid = SignalPyramid(minutes, alt, max_points=CHART_MAX_POINTS)
+    ax, ay, _ = alt_pyramid.view(x0, x1)
+    finite = np.isfinite(ay)
+    if finite.any():
+        a_min, a_max = np.nanmin(ay), np.nanmax(ay)
+        ay_px = bottom + (ay[finite] - a_min) / max(a_max - a_min, 1e-9) * plot_h * 0.6
+        ax_px = sx(ax[finite])
+        points = np.column_stack((ax_px, ay_px)).ravel().tolist()
+        points += [float(ax_px[-1]), bottom, float(ax_px[0]), bottom]
+        drawing.add(Polygon(points, fillColor=colors.HexColor('#d0d7de'), strokeColor=None))
+
+    for s, e, avg in efforts:
+        color = colors.HexColor(get_zone_color(avg, ftp))
+        xa, xb = float(sx(minutes[s])), float(sx(minutes[e - 1]))
+        drawing.add(Rect(xa, bottom, xb - xa, plot_h, fillColor=color, fillOpacity=0.35,
+                         strokeColor=None))
+        ya = float(sy(avg))
+        drawing.add(Line(xa, ya, xb, ya, strokeColor=color, strokeWidth=1.2))
+    for sprint in sprints:
+        xa, xb = float(sx(minutes[sprint['start']])), float(sx(minutes[sprint['end'] - 1]))
+        drawing.add(Rect(xa, bottom, max(xb - xa, 0.5), plot_h, fillColor=colors.black,
+                         fillOpacity=0.25, strokeColor=None))
+
+    line_points = np.column_stack((sx(px), sy(np.nan_to_num(py)))).ravel().tolist()
+    drawing.add(PolyLine(line_points, strokeColor=colors.HexColor('#555555'), strokeWidth=0.3))
+    y_ftp = float(sy(ftp))
+    drawing.add(Line(left, y_ftp, left + plot_w, y_ftp, strokeColor=colors.HexColor('#d62728'),
+                     strokeWidth=0.6, strokeDashArray=[3, 2]))
+
+    # Assi e tacche
+    grid = colors.HexColor('#cccccc')
+    drawing.add(Rect(left, bottom, plot_w, plot_h, fillColor=None, strokeColor=colors.HexColor('#888888'),
+                     strokeWidth=0.5))
+    step = _nice_step(x1 - x0)
+    for tick in np.arange(np.ceil(x0 / step) * step, x1 + 1e-9, step):
+        x = float(sx(tick))
+        drawing.add(Line(x, bottom, x, bottom + plot_h, strokeColor=grid, strokeWidth=0.2))
+        drawing.add(String(x, bottom - 9, f"{tick:.0f}", fontName='Helvetica', fontSize=6, textAnchor='middle'))
+    step = _nice_step(y1)
+    for tick in np.arange(0, y1 + 1e-9, step):
+        y = float(sy(tick))
+        drawing.add(Line(left, y, left + plot_w, y, strokeColor=grid, strokeWidth=0.2))
+        drawing.add(String(left - 3, y - 2, f"{tick:.0f}", fontName='Helvetica', fontSize=6, textAnchor='end'))
+    drawing.add(String(left + plot_w / 2, 2, "Tempo [min]", fontName='Helvetica', fontSize=7, textAnchor='middle'))
+    drawing.add(String(2, bottom + plot_h + 1, "Potenza [W]", fontName='Helvetica', fontSize=7))
+    return drawing
+
+
+def _build_table(columns: List[str], cells: List[List[str]]) -> Table:
+    """Tabella con intestazione ripetuta a ogni pagina"""
+    table = Table([columns] + cells, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 7),
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 7),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#333333')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
+        ('LINEBELOW', (0, 1), (-1, -1), 0.25, colors.HexColor('#dddddd')),
+        ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ]))
+    return table
+
+
+def render_pdf_report(df: pd.DataFrame, efforts: List[Tuple[int, int, float]],
+                      sprints: List[Dict[str, Any]], ftp: float, weight: float,
+                      output_path: str, params_str: str) -> bool:
+    """
+    Genera il report PDF vettoriale (grafico + tabelle) senza GUI.
+
+    Args:
+        df: DataFrame con dati attività
+        efforts: Lista efforts (start, end, avg_power)
+        sprints: Lista sprints {start, end, avg}
+        ftp: Functional Threshold Power
+        weight: Peso atleta
+        output_path: Percorso output PDF
+        params_str: Stringa parametri configurazione
+
+    Returns:
+        True se successo, False se errore
+    """
+    try:
+        logger.info(f"Inizio generazione PDF vettoriale: {output_path}")
+
+        load = RideLoad.from_dataframe(df, ftp) if len(df) else None
+        ride_line = ""
+        if load is not None:
+            ride = load.ride_metrics()
+            ride_line = (f"<br/>NP: <b>{ride['np']:.0f} W</b> | xPower: <b>{ride['xpower']:.0f} W</b> | "
+                         f"IF: <b>{ride['if_']:.2f}</b> | TSS: <b>{ride['tss']:.0f}</b>")
+
+        styles = getSampleStyleSheet()
+        small = ParagraphStyle('params', parent=styles['Normal'], fontSize=8, textColor=colors.HexColor('#666666'))
+        story = [
+            Paragraph("Effort Analysis Report", styles['Title']),
+            Paragraph(f"{params_str}<br/>FTP: <b>{ftp:.0f} W</b> | Weight: <b>{weight:.1f} kg</b>{ride_line}", small),
+            Spacer(1, 8),
+        ]
+        if len(df):
+            story += [_build_chart(df, efforts, sprints, ftp), Spacer(1, 8)]
+
+        if efforts:
+            story += [Paragraph("Efforts Table", styles['Heading2']),
+                      _build_table(EFFORT_COLUMNS, _effort_cells(build_effort_rows(df, efforts, ftp, weight, load)))]
+        if sprints:
+            story += [Paragraph("Sprints Table", styles['Heading2']),
+                      _build_table(SPRINT_COLUMNS, _sprint_cells(build_sprint_rows(df, sprints, weight)))]
+
+        def _footer(canvas, doc):
+            canvas.setFont('Helvetica', 6)
+            canvas.setFillColor(colors.HexColor('#888888'))
+            canvas.drawCentredString(A4[0] / 2, 0.5 * cm, "Generated by bFactor PEFFORT Engine")
+
+        doc = SimpleDocTemplate(output_path, pagesize=A4, leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN,
+                                topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN)
+        doc.build(story, onFirstPage=_footer, onLaterPages=_footer)
+
+        logger.info(f"PDF generato con successo: {output_path}")
+        return True
+
+    except IOError as e:
+        logger.error(f"Errore I/O durante scrittura PDF: {e}", exc_info=True)
+        return False
+    except Exception as e:
+        logger.error(f"Errore generazione PDF: {e}", exc_info=True)
+        return False
+
+
+# ============================================================================
+# EXPORT BATCH (processi worker)
+# ============================================================================
+
+def analyze_and_export_pdf(fit_path: str, config: AnalysisConfig, output_path: str) -> bool:
+    """
+    Analisi completa di un FIT + report PDF: unità di lavoro dei processi worker.
+
+    Args:
+        fit_path: Percorso del file FIT
+        config: Configurazione analisi (atleta, effort, sprint)
+        output_path: Percorso output PDF
+
+    Returns:
+        True se il PDF è stato generato
+    """
+    from .peffort_engine import parse_fit, analyze_ride
+
+    ec = config.effort_config
+    sc = config.sprint_config
+    ftp = config.athlete.ftp
+
+    # Pulizia all'origine, come la GUI: le metriche del PDF usano la potenza pulita
+    df = parse_fit(fit_path, quality=config.quality_config)
+    efforts, sprints = analyze_ride(df, config)
+
+    params_str = (
+        f"Efforts: Win {ec.window_seconds}s, Mrg {ec.merge_power_diff_percent}% | "
+        f"Sprints: Win {sc.window_seconds}s, >{sc.min_power:.0f}W"
+    )
+    return render_pdf_report(df, efforts, sprints, ftp, config.athlete.weight, output_path, params_str)
+
+
+def export_pdf_reports(fit_paths: List[str], config: AnalysisConfig, output_dir: str,
+                       max_workers: Optional[int] = None) -> Dict[str, bool]:
+    """
+    Export PDF di più uscite in parallelo (un processo per FIT).
+
+    Args:
+        fit_paths: Lista file FIT
+        config: Configurazione analisi comune
+        output_dir: Cartella di destinazione (<nome FIT>.pdf)
+        max_workers: Numero processi (None = numero di CPU)
+
+    Returns:
+        Dict percorso FIT -> esito
+    """
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    results: Dict[str, bool] = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(analyze_and_export_pdf, fit_path, config,
+                        str(out_dir / f"{Path(fit_path).stem}.pdf")): fit_path
+            for fit_path in fit_paths
+        }
+        for future in as_completed(futures):
+            fit_path = futures[future]
+            try:
+                results[fit_path] = future.result()
+            except Exception as e:
+                logger.error(f"Export PDF fallito per {Path(fit_path).name}: {e}")
+                results[fit_path] = False
+
+    ok = sum(results.values())
+    logger.info(f"Export PDF batch: {ok}/{len(fit_paths)} report generati")
+    return results
@@ -0,0 +1,349 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+SEASON MMP - MMP di stagione da una cartella di file FIT
+Scansione parallela, MMP per uscita in cache SQLite per hash di contenuto, migliori punti per durata con data
+"""
+
+from typing import List, Tuple, Dict, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import logging
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from .mmp_envelope import MMP_DURATIONS, ride_mmp
+from .inspection_store import fast_content_hash
+from .peffort_config import QualityConfig
+
+logger = logging.getLogger(__name__)
+
+# Colonne della tabella lunga uscita x durata
+SEASON_COLUMNS = ['ride_id', 'file', 'date', 'duration', 'power']
+# Migliori uscite per durata passate all'Omniselector
+DEFAULT_POINTS_PER_DURATION = 3
+# Hash per query IN sulla cache
+SQL_BATCH_SIZE = 500
+# Versione di parse + pulizia + MMP per uscita: incrementarla invalida MMP e FIT illeggibili in cache
+MMP_CACHE_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ride_mmp (
+    content_hash TEXT PRIMARY KEY,
+    start_time INTEGER NOT NULL,
+    durations BLOB NOT NULL,
+    mmp BLOB NOT NULL,
+    created TEXT NOT NULL,
+    variant TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS ride_failures (
+    content_hash TEXT PRIMARY KEY,
+    error TEXT NOT NULL,
+    created TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Colonne aggiunte dopo la prima versione dello schema: (tabella, colonna, definizione)
+_ADDED_COLUMNS = (
+    ('ride_mmp', 'variant', "TEXT NOT NULL DEFAULT ''"),
+    ('ride_failures', 'version', "INTEGER NOT NULL DEFAULT 0"),
+)
+
+
+def cache_variant(quality: QualityConfig) -> str:
+    """
+    Chiave del calcolo MMP: versione del codice + digest dei campi di QualityConfig.
+
+    Gli MMP dipendono dalla pulizia della potenza: cambiando le soglie le
+    uscite in cache non corrispondono più e vengono ricalcolate.
+    """
+    fields = json.dumps(asdict(quality), sort_keys=True)
+    return f"v{MMP_CACHE_VERSION}:{hashlib.sha1(fields.encode()).hexdigest()[:16]}"
+
+
+class RideMmpCache:
+    """
+    Cache SQLite degli MMP per uscita.
+
+    Le uscite sono indicizzate per hash di contenuto (un FIT rinominato o
+    copiato non viene rianalizzato); l'hash di un file è ricalcolato solo se
+    dimensione o mtime cambiano. Ogni MMP è salvato con la griglia di durate
+    e la variante di calcolo (cache_variant: versione + soglie di pulizia):
+    cambiando l'una o l'altra le uscite vengono ricalcolate. Anche i FIT
+    illeggibili sono registrati per hash e versione, così non vengono riletti
+    a ogni scan ma si riprovano dopo un aggiornamento del codice.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: Percorso del file SQLite (creato se non esiste)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Database creati con lo schema precedente: le righe esistenti non corrispondono a nessuna variante
+            for table, column, definition in _ADDED_COLUMNS:
+                if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Nuova connessione (una per operazione: sicura tra thread)"""
+        return sqlite3.connect(str(self.db_path), timeout=10)
+
+    def content_hashes(self, fit_paths: Sequence[Path]) -> Dict[Path, str]:
+        """
+        Hash di contenuto dei FIT, ricalcolati solo per i file nuovi o modificati.
+
+        Args:
+            fit_paths: Percorsi (assoluti) dei FIT
+
+        Returns:
+            Dict percorso -> hash
+        """
+        with self._connect() as conn:
+            cached = {row[0]: row[1:] for row in conn.execute(
+                "SELECT path, size, mtime_ns, content_hash FROM file_hashes")}
+            hashes, updates = {}, []
+            for path in fit_paths:
+                stat = path.stat()
+                entry = cached.get(str(path))
+                if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                    hashes[path] = entry[2]
+                    continue
+                hashes[path] = fast_content_hash(str(path))
+                updates.append((str(path), stat.st_size, stat.st_mtime_ns, hashes[path]))
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                updates
+            )
+        return hashes
+
+    def get_many(self, content_hashes: Sequence[str], durations: Sequence[int],
+                 variant: str) -> Dict[str, Tuple[np.datetime64, np.ndarray]]:
+        """
+        MMP in cache calcolati sulla stessa griglia di durate e con la stessa variante.
+
+        Returns:
+            Dict hash -> (data inizio uscita, MMP)
+        """
+        grid = np.asarray(durations, dtype=np.int64).tobytes()
+        keys = list(content_hashes)
+        found = {}
+        with self._connect() as conn:
+            # A blocchi: limite dei parametri per query di SQLite
+            for i in range(0, len(keys), SQL_BATCH_SIZE):
+                batch = keys[i:i + SQL_BATCH_SIZE]
+                rows = conn.execute(
+                    "SELECT content_hash, start_time, mmp FROM ride_mmp "
+                    f"WHERE durations = ? AND variant = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    [grid, variant] + batch
+                )
+                for content_hash, start_time, mmp_blob in rows:
+                    found[content_hash] = (np.datetime64(start_time, 's'),
+                                           np.frombuffer(mmp_blob, dtype=np.float64).copy())
+        return found
+
+    def put_many(self, records: Sequence[Tuple[str, np.datetime64, np.ndarray]],
+                 durations: Sequence[int], variant: str) -> None:
+        """Salva in un'unica transazione gli MMP (hash, data inizio, MMP) della variante"""
+        grid = np.asarray(durations, dtype=np.int64).tobytes()
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ride_mmp (content_hash, start_time, durations, mmp, created, variant) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(h, int(ts.astype('datetime64[s]').astype(np.int64)), grid,
+                  np.asarray(mmp, dtype=np.float64).tobytes(), now, variant) for h, ts, mmp in records]
+            )
+            # Un FIT riletto con successo non è più illeggibile
+            conn.executemany("DELETE FROM ride_failures WHERE content_hash = ?", [(h,) for h, _, _ in records])
+
+    def failed_hashes(self, content_hashes: Sequence[str]) -> Dict[str, str]:
+        """
+        Contenuti risultati illeggibili con la versione corrente (MMP_CACHE_VERSION).
+
+        Returns:
+            Dict hash -> messaggio d'errore
+        """
+        keys = list(content_hashes)
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), SQL_BATCH_SIZE):
+                batch = keys[i:i + SQL_BATCH_SIZE]
+                found.update(conn.execute(
+                    "SELECT content_hash, error FROM ride_failures "
+                    f"WHERE version = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    [MMP_CACHE_VERSION] + batch
+                ))
+        return found
+
+    def put_failures(self, records: Sequence[Tuple[str, str]]) -> None:
+        """Registra in un'unica transazione i FIT illeggibili (hash, errore)"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ride_failures (content_hash, error, created, version) VALUES (?, ?, ?, ?)",
+                [(h, error, now, MMP_CACHE_VERSION) for h, error in records]
+            )
+
+
+def get_ride_mmp_cache() -> RideMmpCache:
+    """Cache condivisa degli MMP per uscita, nella cartella Database di PEFFORT"""
+    from .inspection_core import get_database_path
+
+    return RideMmpCache(get_database_path() / "ride_mmp.sqlite")
+
+
+def _fit_ride_mmp(fit_path: str, durations: Sequence[int],
+                  quality: QualityConfig) -> Tuple[np.datetime64, np.ndarray]:
+    """Unità di lavoro dei processi worker: parse del FIT con pulizia della potenza + MMP"""
+    from .peffort_engine import parse_fit
+
+    df = parse_fit(fit_path, quality=quality)
+    start = np.datetime64(pd.Timestamp(df['time'].iloc[0]).tz_localize(None), 's')
+    return start, ride_mmp(df, durations)
+
+
+def list_fit_files(folder: str, recursive: bool = True) -> List[Path]:
+    """File .fit (maiuscole o minuscole) della cartella, ordinati per percorso"""
+    root = Path(folder)
+    if not root.is_dir():
+        raise ValueError(f"Cartella non trovata: {folder}")
+    candidates = root.rglob("*") if recursive else root.glob("*")
+    return sorted(p.resolve() for p in candidates if p.is_file() and p.suffix.lower() == ".fit")
+
+
+def scan_season_mmp(folder: str, cache: Optional[RideMmpCache] = None,
+                    durations: Sequence[int] = MMP_DURATIONS, max_workers: Optional[int] = None,
+                    recursive: bool = True, quality: Optional[QualityConfig] = None,
+                    retry_failures: bool = False) -> pd.DataFrame:
+    """
+    MMP di tutte le uscite di una cartella FIT.
+
+    Le uscite già in cache (stesso contenuto, stessa griglia di durate) non
+    vengono rilette: solo i FIT nuovi sono analizzati, in parallelo su un
+    pool di processi, e i loro MMP aggiunti alla cache in una transazione.
+    La potenza è pulita con clean_ride prima dell'MMP. I FIT illeggibili sono
+    segnalati nel log una volta, registrati in cache e saltati negli scan
+    successivi (fino a un cambio di MMP_CACHE_VERSION o con retry_failures).
+
+    Args:
+        folder: Cartella con i FIT della stagione
+        cache: Cache degli MMP (None = get_ride_mmp_cache())
+        durations: Durate MMP [s]
+        max_workers: Numero processi (None = numero di CPU, 1 = tutto nel processo corrente)
+        recursive: Include le sottocartelle
+        quality: Soglie di pulizia della potenza (None = QualityConfig())
+        retry_failures: Rilegge anche i FIT già risultati illeggibili
+
+    Returns:
+        DataFrame con colonne SEASON_COLUMNS, una riga per uscita e durata coperta
+
+    Raises:
+        ValueError: se la cartella non esiste
+    """
+    cache = cache or get_ride_mmp_cache()
+    quality = quality or QualityConfig()
+    variant = cache_variant(quality)
+    durations = np.asarray(durations, dtype=int)
+    fit_paths = list_fit_files(folder, recursive)
+
+    hashes = cache.content_hashes(fit_paths)
+    known = cache.get_many(set(hashes.values()), durations, variant)
+    failed = {} if retry_failures else cache.failed_hashes(set(hashes.values()) - set(known))
+    # Un file per contenuto: copie dello stesso FIT analizzate una volta
+    pending: Dict[str, Path] = {}
+    for path, content_hash in hashes.items():
+        if content_hash not in known and content_hash not in failed:
+            pending.setdefault(content_hash, path)
+
+    computed, failures = [], []
+    if pending:
+        if max_workers == 1 or len(pending) == 1:
+            for content_hash, path in pending.items():
+                try:
+                    computed.append((content_hash, *_fit_ride_mmp(str(path), durations, quality)))
+                except Exception as e:
+                    logger.error(f"MMP fallito per {path.name}: {e}")
+                    failures.append((content_hash, str(e)))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(_fit_ride_mmp, str(path), durations, quality): content_hash
+                           for content_hash, path in pending.items()}
+                for future in as_completed(futures):
+                    content_hash = futures[future]
+                    try:
+                        computed.append((content_hash, *future.result()))
+                    except Exception as e:
+                        logger.error(f"MMP fallito per {pending[content_hash].name}: {e}")
+                        failures.append((content_hash, str(e)))
+        cache.put_many(computed, durations, variant)
+        cache.put_failures(failures)
+        known.update({h: (ts, mmp) for h, ts, mmp in computed})
+
+    logger.info(f"Season MMP: {len(fit_paths)} FIT, {len(computed)} analizzati, "
+                f"{len(fit_paths) - len(pending)} dalla cache, {len(failed) + len(failures)} illeggibili")
+
+    # Tabella lunga uscita x durata (una riga per contenuto, primo file in ordine)
+    rides = {}
+    for path, content_hash in hashes.items():
+        if content_hash in known and content_hash not in rides:
+            rides[content_hash] = path
+    if not rides:
+        return pd.DataFrame(columns=SEASON_COLUMNS)
+    mmps = np.vstack([known[h][1] for h in rides])
+    n_rides, n_durations = mmps.shape
+    season = pd.DataFrame({
+        'ride_id': np.repeat(list(rides), n_durations),
+        'file': np.repeat([p.name for p in rides.values()], n_durations),
+        'date': np.repeat(np.asarray([known[h][0] for h in rides], dtype='datetime64[s]'), n_durations),
+        'duration': np.tile(durations, n_rides),
+        'power': mmps.ravel(),
+    })
+    return season[season['power'].notna()].sort_values(['date', 'duration'], ignore_index=True)
+
+
+def season_best_points(season: pd.DataFrame, per_duration: int = DEFAULT_POINTS_PER_DURATION,
+                       start=None, end=None) -> pd.DataFrame:
+    """
+    Migliori uscite per ogni durata, con la data in cui sono state ottenute.
+
+    Args:
+        season: Tabella di scan_season_mmp
+        per_duration: Uscite da tenere per durata (1 = curva best-power)
+        start: Data iniziale inclusa (None = nessun limite)
+        end: Data finale esclusa (None = nessun limite)
+
+    Returns:
+        DataFrame con colonne SEASON_COLUMNS, ordinato per durata e potenza decrescente
+    """
+    if per_duration < 1:
+        raise ValueError(f"Punti per durata non validi: {per_duration}")
+    mask = np.ones(len(season), dtype=bool)
+    if start is not None:
+        mask &= season['date'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= season['date'] < pd.Timestamp(end)
+    ranked = season[mask].sort_values(['duration', 'power'], ascending=[True, False])
+    return ranked.groupby('duration', sort=False).head(per_duration).reset_index(drop=True)
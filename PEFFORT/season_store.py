@@ -0,0 +1,507 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+SEASON STORE - Archivio colonnare append-only di uscite, effort e sprint
+Una cartella per parte (tabella/mese) con un .npy memory-mapped per colonna,
+catalogo SQLite indicizzato per atleta e data con gli intervalli di righe di ogni atleta
+"""
+
+from typing import List, Tuple, Dict, Any, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import logging
+import operator
+import os
+import shutil
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TABLES = ('rides', 'efforts', 'sprints')
+
+# Colonna temporale usata per partizioni e indice
+DATE_COLUMN = 'date'
+
+FILTER_OPS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    athlete TEXT NOT NULL,
+    month TEXT NOT NULL,
+    path TEXT NOT NULL,
+    row_start INTEGER NOT NULL,
+    row_end INTEGER NOT NULL,
+    date_min INTEGER NOT NULL,
+    date_max INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_parts_athlete_date ON parts(tbl, athlete, date_min, date_max);
+CREATE INDEX IF NOT EXISTS idx_parts_date ON parts(tbl, date_min, date_max);
+"""
+
+
+def _missing_column(like: np.ndarray, n_rows: int) -> np.ndarray:
+    """
+    Valori mancanti per una colonna assente in una parte (schemi diversi tra parti).
+
+    NaN per le colonne numeriche, NaT per le date, stringa vuota per il testo:
+    il risultato si concatena con le parti che hanno la colonna senza object.
+    """
+    kind = np.asarray(like).dtype.kind
+    if kind == 'M':
+        return np.full(n_rows, np.datetime64('NaT'), dtype=like.dtype)
+    if kind in 'US':
+        return np.full(n_rows, '', dtype=like.dtype)
+    return np.full(n_rows, np.nan)
+
+
+def _to_epoch(value) -> int:
+    """Data (str, datetime, Timestamp) -> secondi epoch"""
+    return int(pd.Timestamp(value).value // 1_000_000_000)
+
+
+class SeasonStore:
+    """
+    Archivio colonnare delle analisi di stagione.
+
+    Ogni append scrive una nuova parte immutabile per (tabella, mese) con le
+    righe ordinate per atleta e data; il catalogo registra per ogni atleta
+    l'intervallo di righe e di date nella parte, così una query legge solo le
+    righe che intersecano atleti e periodo richiesti. compact() unisce le parti
+    di un mese (tutti gli atleti) in una sola, riducendo i file da aprire.
+    Le colonne sono caricate in memory-map e filtrate vettorialmente.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Cartella radice dell'archivio (creata se non esiste)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connessione al catalogo"""
+        return sqlite3.connect(str(self.root / "catalog.sqlite"), timeout=10)
+
+    # ========================================================================
+    # SCRITTURA
+    # ========================================================================
+
+    def _write_part(self, table: str, month: str, columns: Dict[str, np.ndarray]) -> Path:
+        """Scrive una parte in una cartella temporanea e la pubblica con rename atomico"""
+        partition = self.root / table / month
+        partition.mkdir(parents=True, exist_ok=True)
+        name = f"part-{time.time_ns()}-{os.getpid()}"
+        tmp_dir = partition / f".{name}"
+        tmp_dir.mkdir()
+        for col, values in columns.items():
+            np.save(tmp_dir / f"{col}.npy", values, allow_pickle=False)
+        final_dir = partition / name
+        os.replace(tmp_dir, final_dir)
+        return final_dir
+
+    def append(self, table: str, athlete: str, columns: Dict[str, Any]) -> int:
+        """
+        Aggiunge righe a una tabella per un atleta.
+
+        Args:
+            table: 'rides', 'efforts' o 'sprints'
+            athlete: Identificativo atleta
+            columns: Dict colonna -> array (stessa lunghezza); richiede la colonna 'date'
+
+        Returns:
+            Numero di righe scritte
+        """
+        if table not in TABLES:
+            raise ValueError(f"Tabella non valida: {table}")
+        if DATE_COLUMN not in columns:
+            raise ValueError(f"Colonna '{DATE_COLUMN}' obbligatoria")
+
+        arrays = {col: np.asarray(values) for col, values in columns.items()}
+        arrays[DATE_COLUMN] = arrays[DATE_COLUMN].astype('datetime64[s]')
+        lengths = {len(v) for v in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError("Le colonne hanno lunghezze diverse")
+        n_rows = lengths.pop()
+        if n_rows == 0:
+            return 0
+
+        # Una parte per mese, righe ordinate per data
+        dates = arrays[DATE_COLUMN]
+        months = dates.astype('datetime64[M]')
+        order = np.argsort(dates, kind='stable')
+        records = []
+        for month in np.unique(months):
+            idx = order[months[order] == month]
+            part_cols = {col: values[idx] for col, values in arrays.items()}
+            part_dates = part_cols[DATE_COLUMN].astype(np.int64)
+            path = self._write_part(table, str(month), part_cols)
+            records.append((table, athlete, str(month), str(path.relative_to(self.root)),
+                            0, len(idx), int(part_dates.min()), int(part_dates.max())))
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO parts (tbl, athlete, month, path, row_start, row_end, date_min, date_max) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                records
+            )
+        logger.debug(f"Season store: {n_rows} righe in {table}/{athlete} ({len(records)} parti)")
+        return n_rows
+
+    def append_ride(self, athlete: str, tables: Dict[str, Dict[str, np.ndarray]]) -> None:
+        """Aggiunge le tabelle prodotte da summarize_ride (rides, efforts, sprints)"""
+        for table, columns in tables.items():
+            self.append(table, athlete, columns)
+
+    # ========================================================================
+    # LETTURA
+    # ========================================================================
+
+    def _select_parts(self, table: str, athletes: Optional[Sequence[str]],
+                      start: Optional[int], end: Optional[int]) -> List[Tuple[str, str, int, int]]:
+        """Intervalli (atleta, parte, riga iniziale, riga finale) che intersecano atleti e [start, end)"""
+        sql = "SELECT athlete, path, row_start, row_end FROM parts WHERE tbl = ?"
+        params: List[Any] = [table]
+        if athletes is not None:
+            sql += f" AND athlete IN ({','.join('?' * len(athletes))})"
+            params += list(athletes)
+        if start is not None:
+            sql += " AND date_max >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND date_min < ?"
+            params.append(end)
+        with self._connect() as conn:
+            return conn.execute(sql + " ORDER BY path, row_start", params).fetchall()
+
+    def query(self, table: str, athletes: Optional[Sequence[str]] = None,
+              start=None, end=None, filters: Optional[List[Tuple[str, str, Any]]] = None,
+              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Righe di una tabella filtrate per atleta, periodo e predicati sulle colonne.
+
+        Args:
+            table: 'rides', 'efforts' o 'sprints'
+            athletes: Atleti da includere (None = tutti)
+            start: Data iniziale inclusa (None = nessun limite)
+            end: Data finale esclusa (None = nessun limite)
+            filters: Lista (colonna, operatore, valore), es. [('perc_ftp', '>', 120)]
+            columns: Colonne da restituire (None = tutte)
+
+        Returns:
+            DataFrame con colonna 'athlete' + colonne richieste
+        """
+        if table not in TABLES:
+            raise ValueError(f"Tabella non valida: {table}")
+        for _, op, _ in filters or []:
+            if op not in FILTER_OPS:
+                raise ValueError(f"Operatore non supportato: {op}")
+
+        start_s = _to_epoch(start) if start is not None else None
+        end_s = _to_epoch(end) if end is not None else None
+
+        # Intervalli di righe raggruppati per parte: ogni file aperto una sola volta
+        by_part: Dict[str, List[Tuple[str, int, int]]] = {}
+        for athlete, rel_path, row_start, row_end in self._select_parts(table, athletes, start_s, end_s):
+            by_part.setdefault(rel_path, []).append((athlete, row_start, row_end))
+
+        chunks: List[Dict[str, np.ndarray]] = []
+        for rel_path, ranges in by_part.items():
+            part_dir = self.root / rel_path
+            available = {p.stem for p in part_dir.glob("*.npy")}
+            needed = set(columns or []) | {col for col, _, _ in filters or []} | {DATE_COLUMN}
+            if columns is None:
+                needed |= available
+            # Parti scritte con schemi diversi: si leggono solo le colonne presenti
+            data = {col: np.load(part_dir / f"{col}.npy", mmap_mode='r') for col in needed & available}
+
+            rows = np.concatenate([np.arange(a, b) for _, a, b in ranges])
+            owners = np.repeat(np.asarray([athlete for athlete, _, _ in ranges], dtype=object),
+                               [b - a for _, a, b in ranges])
+
+            dates = data[DATE_COLUMN][rows]
+            mask = np.ones(len(rows), dtype=bool)
+            if start_s is not None:
+                mask &= dates >= np.datetime64(start_s, 's')
+            if end_s is not None:
+                mask &= dates < np.datetime64(end_s, 's')
+            for col, op, value in filters or []:
+                # Colonna assente nella parte: NaN, nessuna riga soddisfa il confronto
+                values = data[col][rows] if col in data else np.full(len(rows), np.nan)
+                mask &= FILTER_OPS[op](values, value)
+            if not mask.any():
+                continue
+
+            rows = rows[mask]
+            out_cols = columns if columns is not None else sorted(data)
+            chunk = {col: np.asarray(data[col][rows]) for col in out_cols if col in data}
+            chunk['athlete'] = owners[mask]
+            chunks.append(chunk)
+
+        if not chunks:
+            return pd.DataFrame(columns=['athlete'] + list(columns or []))
+        # Unione delle colonne di tutte le parti, valori mancanti dove una parte non le ha
+        names = ['athlete'] + (list(columns) if columns is not None
+                               else sorted(set().union(*chunks) - {'athlete'}))
+        result = {}
+        for col in names:
+            like = next((c[col] for c in chunks if col in c), np.empty(0))
+            result[col] = np.concatenate([c[col] if col in c else _missing_column(like, len(c['athlete']))
+                                          for c in chunks])
+        return pd.DataFrame(result)
+
+    def athletes(self) -> List[str]:
+        """Atleti presenti nell'archivio"""
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT athlete FROM parts ORDER BY athlete")]
+
+    # ========================================================================
+    # MANUTENZIONE
+    # ========================================================================
+
+    def compact(self, table: Optional[str] = None) -> int:
+        """
+        Unisce tutte le parti di un mese (tutti gli atleti) in una sola parte,
+        ordinata per atleta e data.
+
+        Returns:
+            Numero di mesi compattati
+        """
+        tables = [table] if table else list(TABLES)
+        with self._connect() as conn:
+            groups = conn.execute(
+                f"SELECT tbl, month FROM parts WHERE tbl IN ({','.join('?' * len(tables))}) "
+                "GROUP BY tbl, month HAVING COUNT(DISTINCT path) > 1",
+                tables
+            ).fetchall()
+
+        for tbl, month in groups:
+            with self._connect() as conn:
+                entries = conn.execute(
+                    "SELECT id, athlete, path, row_start, row_end FROM parts "
+                    "WHERE tbl = ? AND month = ? ORDER BY athlete, date_min",
+                    (tbl, month)
+                ).fetchall()
+
+            # Unione delle colonne delle parti: le colonne assenti in una parte
+            # vengono riempite con valori mancanti, nessun dato è scartato
+            dirs = {path: self.root / path for _, _, path, _, _ in entries}
+            loaded = {path: {p.stem: np.load(p, mmap_mode='r') for p in d.glob("*.npy")}
+                      for path, d in dirs.items()}
+            cols = set().union(*loaded.values())
+            likes = {col: next(part[col] for part in loaded.values() if col in part) for col in cols}
+
+            merged: Dict[str, List[np.ndarray]] = {col: [] for col in cols}
+            records = []
+            offset = 0
+            for athlete in dict.fromkeys(athlete for _, athlete, _, _, _ in entries):
+                pieces = {col: [] for col in cols}
+                for _, owner, path, row_start, row_end in entries:
+                    if owner == athlete:
+                        for col in cols:
+                            part = loaded[path]
+                            pieces[col].append(np.asarray(part[col][row_start:row_end]) if col in part
+                                               else _missing_column(likes[col], row_end - row_start))
+                athlete_cols = {col: np.concatenate(v) for col, v in pieces.items()}
+                order = np.argsort(athlete_cols[DATE_COLUMN], kind='stable')
+                for col in cols:
+                    merged[col].append(athlete_cols[col][order])
+                dates = athlete_cols[DATE_COLUMN].astype(np.int64)
+                records.append([athlete, offset, offset + len(dates), int(dates.min()), int(dates.max())])
+                offset += len(dates)
+
+            new_dir = self._write_part(tbl, month, {col: np.concatenate(v) for col, v in merged.items()})
+            rel_path = str(new_dir.relative_to(self.root))
+            with self._connect() as conn:
+                conn.execute(f"DELETE FROM parts WHERE id IN ({','.join('?' * len(entries))})",
+                             [entry[0] for entry in entries])
+                conn.executemany(
+                    "INSERT INTO parts (tbl, athlete, month, path, row_start, row_end, date_min, date_max) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(tbl, a, month, rel_path, r0, r1, d0, d1) for a, r0, r1, d0, d1 in records]
+                )
+            loaded.clear()
+            for d in dirs.values():
+                shutil.rmtree(d, ignore_errors=True)
+
+        logger.info(f"Season store: {len(groups)} mesi compattati")
+        return len(groups)
+
+
+# ============================================================================
+# RIEPILOGO USCITA E INGESTIONE BATCH
+# ============================================================================
+
+def summarize_ride(df: pd.DataFrame, efforts: List[Tuple[int, int, float]],
+                   sprints: List[Dict[str, Any]], ftp: float, weight: float,
+                   ride_id: str, cp: Optional[float] = None,
+                   w_prime: Optional[float] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Colonne di rides/efforts/sprints per una uscita analizzata.
+
+    Args:
+        df: DataFrame da parse_fit (colonne time, time_sec, power, ...)
+        efforts: Lista efforts (start, end, avg_power)
+        sprints: Lista sprints {start, end, avg}
+        ftp: Functional Threshold Power
+        weight: Peso atleta
+        ride_id: Identificativo univoco dell'uscita (es. hash del FIT)
+        cp: Critical Power [W] (opzionale, con w_prime riempie le colonne W'bal, altrimenti NaN)
+        w_prime: W' [J]
+
+    Returns:
+        Dict tabella -> dict colonna -> array
+    """
+    from .report_pdf import build_effort_rows, build_sprint_rows
+    from .load_metrics import RideLoad
+
+    ride_start = np.datetime64(pd.Timestamp(df['time'].iloc[0]).tz_localize(None), 's')
+    time_sec = df['time_sec'].to_numpy(dtype=float)
+    power = df['power'].to_numpy(dtype=float)
+    dt = np.diff(time_sec, prepend=time_sec[0])
+    work = np.where((dt > 0) & (dt < 30), power * dt, 0.0)
+
+    load = RideLoad(time_sec, power, ftp)
+    ride_load = load.ride_metrics()
+    effort_rows = build_effort_rows(df, efforts, ftp, weight, load)
+    sprint_rows = build_sprint_rows(df, sprints, weight)
+
+    def offsets(rows):
+        return ride_start + np.asarray([r['start_time'] for r in rows], dtype=float).astype('timedelta64[s]')
+
+    tables = {
+        'rides': {
+            'ride_id': np.asarray([ride_id]),
+            DATE_COLUMN: np.asarray([ride_start]),
+            'duration': np.asarray([time_sec[-1] - time_sec[0]]),
+            'distance_km': np.asarray([float(df['distance_km'].iloc[-1]) if 'distance_km' in df.columns else 0.0]),
+            'avg_power': np.asarray([float(power.mean())]),
+            'energy_kj': np.asarray([float(work.sum()) / 1000]),
+            'np': np.asarray([ride_load['np']]),
+            'xpower': np.asarray([ride_load['xpower']]),
+            'if_': np.asarray([ride_load['if_']]),
+            'tss': np.asarray([ride_load['tss']]),
+            'n_efforts': np.asarray([len(efforts)]),
+            'n_sprints': np.asarray([len(sprints)]),
+            'ftp': np.asarray([float(ftp)]),
+            'weight': np.asarray([float(weight)]),
+        },
+        'efforts': {
+            'ride_id': np.full(len(effort_rows), ride_id),
+            DATE_COLUMN: offsets(effort_rows),
+            'start_sec': np.asarray([r['start_time'] for r in effort_rows], dtype=float),
+            'duration': np.asarray([r['duration'] for r in effort_rows], dtype=np.int64),
+            'avg_power': np.asarray([r['avg_power'] for r in effort_rows], dtype=float),
+            'w_kg': np.asarray([r['w_kg'] for r in effort_rows], dtype=float),
+            'perc_ftp': np.asarray([r['perc_ftp'] for r in effort_rows], dtype=float),
+            'best_5s': np.asarray([r['best_5s'] for r in effort_rows], dtype=np.int64),
+            'hr_mean': np.asarray([r['hr_mean'] or 0 for r in effort_rows], dtype=float),
+            'vam': np.asarray([r['vam'] for r in effort_rows], dtype=float),
+            'avg_grade': np.asarray([r['avg_grade'] for r in effort_rows], dtype=float),
+            'energy_kj': np.asarray([r['energy_kj'] for r in effort_rows], dtype=float),
+            'np': np.asarray([r['np'] for r in effort_rows], dtype=float),
+            'tss': np.asarray([r['tss'] for r in effort_rows], dtype=float),
+        },
+        'sprints': {
+            'ride_id': np.full(len(sprint_rows), ride_id),
+            DATE_COLUMN: offsets(sprint_rows),
+            'start_sec': np.asarray([r['start_time'] for r in sprint_rows], dtype=float),
+            'duration': np.asarray([r['duration'] for r in sprint_rows], dtype=np.int64),
+            'avg_power': np.asarray([r['avg_power'] for r in sprint_rows], dtype=float),
+            'max_power': np.asarray([r['max_power'] for r in sprint_rows], dtype=float),
+            'w_kg': np.asarray([r['w_kg'] for r in sprint_rows], dtype=float),
+            'hr_max': np.asarray([r['hr_max'] for r in sprint_rows], dtype=float),
+            'max_speed': np.asarray([r['max_speed'] for r in sprint_rows], dtype=float),
+        },
+    }
+
+    # Colonne W'bal sempre presenti (NaN senza CP/W'): schema fisso per tabella
+    # anche se il profilo atleta riceve CP a stagione in corso
+    tables['rides']['wbal_min'] = np.full(1, np.nan)
+    tables['efforts']['wbal_min'] = np.full(len(effort_rows), np.nan)
+    if cp is not None and w_prime is not None:
+        from .wbal_engine import compute_wbal, effort_wbal_min
+
+        wbal = compute_wbal(time_sec, power, cp, w_prime)
+        tables['rides']['wbal_min'] = np.asarray([float(wbal.min())])
+        tables['efforts']['wbal_min'] = effort_wbal_min(wbal, efforts)
+    return tables
+
+
+def _summarize_fit(fit_path: str, config, ride_id: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """Unità di lavoro dei processi worker: parse + analisi + riepilogo"""
+    from .peffort_engine import parse_fit, analyze_ride
+
+    # Pulizia all'origine: medie, NP/TSS ed energia scritti nell'archivio usano la potenza pulita
+    df = parse_fit(fit_path, quality=config.quality_config)
+    efforts, sprints = analyze_ride(df, config)
+    athlete = config.athlete
+    return summarize_ride(df, efforts, sprints, athlete.ftp, athlete.weight, ride_id,
+                          cp=athlete.cp, w_prime=athlete.w_prime)
+
+
+def ingest_fit_files(store: SeasonStore, fit_paths: List[str], athlete: str, config,
+                     max_workers: Optional[int] = None) -> int:
+    """
+    Analizza in parallelo i FIT di un atleta e li aggiunge all'archivio.
+
+    Le uscite già presenti (stesso hash di contenuto) vengono saltate; le
+    tabelle dei worker sono concatenate e scritte con un append per tabella.
+
+    Args:
+        store: Archivio di destinazione
+        fit_paths: Lista file FIT
+        athlete: Identificativo atleta
+        config: AnalysisConfig dell'atleta
+        max_workers: Numero processi (None = numero di CPU)
+
+    Returns:
+        Numero di uscite aggiunte
+    """
+    from .inspection_store import fast_content_hash
+
+    # Id già in archivio o in coda: copie dello stesso FIT analizzate una volta
+    seen = set(store.query('rides', athletes=[athlete], columns=['ride_id'])['ride_id'])
+    pending = {}
+    for fit_path in fit_paths:
+        ride_id = fast_content_hash(fit_path)
+        if ride_id not in seen:
+            seen.add(ride_id)
+            pending[fit_path] = ride_id
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_summarize_fit, path, config, ride_id): path
+                   for path, ride_id in pending.items()}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Analisi fallita per {Path(futures[future]).name}: {e}")
+
+    for table in TABLES:
+        parts = [r[table] for r in results if len(r[table][DATE_COLUMN])]
+        if parts:
+            store.append(table, athlete, {col: np.concatenate([p[col] for p in parts]) for col in parts[0]})
+
+    logger.info(f"Season store: {len(results)}/{len(fit_paths)} uscite aggiunte per {athlete}")
+    return len(results)
@@ -0,0 +1,369 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+SEGMENT INDEX - Indice spaziale delle tracce GPS di una libreria di uscite
+Griglia metrica su tracce semplificate: passaggi su un segmento di riferimento senza scansione completa
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Tuple, Dict, Optional
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+# Lato cella della griglia [m]
+DEFAULT_CELL_M = 250.0
+# Distanza minima tra punti consecutivi della traccia semplificata [m]
+DEFAULT_SPACING_M = 10.0
+# Offset per impacchettare (cx, cy) in una chiave int64
+_KEY_SHIFT = 1 << 31
+
+MATCH_COLUMNS = ['ride_id', 'start_idx', 'end_idx', 'length_m', 'start_offset_m', 'end_offset_m']
+
+
+def haversine_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distanza ortodromica [m] tra coppie di punti in gradi (vettorizzata)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def simplify_track(lat: np.ndarray, lon: np.ndarray,
+                   spacing_m: float = DEFAULT_SPACING_M) -> Dict[str, np.ndarray]:
+    """
+    Traccia semplificata: un punto ogni spacing_m metri di percorso.
+
+    I campioni senza GPS vengono scartati; ogni punto conserva l'indice del
+    campione originale, così i passaggi trovati tornano indici del DataFrame.
+
+    Returns:
+        Dict con lat, lon, idx (indice originale), cumdist (distanza percorsa [m])
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    if len(valid) == 0:
+        return {'lat': np.zeros(0), 'lon': np.zeros(0), 'idx': np.zeros(0, np.int64), 'cumdist': np.zeros(0)}
+
+    vlat, vlon = lat[valid], lon[valid]
+    step = haversine_m(vlat[:-1], vlon[:-1], vlat[1:], vlon[1:])
+    cumdist = np.concatenate(([0.0], np.cumsum(step)))
+    # Primo punto di ogni tratto da spacing_m metri
+    bucket = np.floor(cumdist / spacing_m).astype(np.int64)
+    keep = np.concatenate(([True], np.diff(bucket) > 0))
+    return {'lat': vlat[keep], 'lon': vlon[keep], 'idx': valid[keep].astype(np.int64), 'cumdist': cumdist[keep]}
+
+
+def _passes(cumdist: np.ndarray, dist: np.ndarray, orig_idx: np.ndarray,
+            max_gap_m: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Raggruppa i punti vicini a un checkpoint in passaggi distinti.
+
+    Args:
+        cumdist, dist, orig_idx: Hit di una sola uscita ordinati per cumdist
+
+    Returns:
+        (cumdist, distanza, indice originale) del punto più vicino di ogni passaggio
+    """
+    breaks = np.flatnonzero(np.diff(cumdist) > max_gap_m) + 1
+    starts = np.concatenate(([0], breaks))
+    best = np.asarray([s + int(np.argmin(d)) for s, d in zip(starts, np.split(dist, breaks))], dtype=np.int64)
+    return cumdist[best], dist[best], orig_idx[best]
+
+
+class SegmentIndex:
+    """
+    Indice spaziale a griglia delle tracce di più uscite.
+
+    Ogni punto delle tracce semplificate finisce in una cella di DEFAULT_CELL_M
+    metri (proiezione equirettangolare attorno alla prima traccia); le celle
+    sono una colonna ordinata, quindi i punti vicini a una coordinata si
+    trovano con searchsorted sulle poche celle coperte dal raggio di ricerca.
+
+    Un passaggio sul segmento di riferimento deve toccare in ordine tutti i
+    checkpoint del segmento, con una distanza percorsa compatibile con la sua
+    lunghezza: le uscite candidate sono solo quelle presenti in tutte le celle
+    dei checkpoint.
+    """
+
+    def __init__(self, cell_m: float = DEFAULT_CELL_M, spacing_m: float = DEFAULT_SPACING_M):
+        """
+        Args:
+            cell_m: Lato cella [m]
+            spacing_m: Passo della semplificazione tracce [m]
+        """
+        if cell_m <= 0 or spacing_m <= 0:
+            raise ValueError("cell_m e spacing_m devono essere > 0")
+        self.cell_m = float(cell_m)
+        self.spacing_m = float(spacing_m)
+        self.origin: Optional[Tuple[float, float]] = None
+        self.ride_ids: List[str] = []
+        self._tracks: List[Dict[str, np.ndarray]] = []
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.ride_ids)
+
+    def _project(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Coordinate metriche equirettangolari rispetto all'origine"""
+        lat0, lon0 = self.origin
+        x = np.radians(np.asarray(lon, dtype=float) - lon0) * EARTH_RADIUS_M * np.cos(np.radians(lat0))
+        y = np.radians(np.asarray(lat, dtype=float) - lat0) * EARTH_RADIUS_M
+        return x, y
+
+    def _cell_keys(self, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return (cx.astype(np.int64) + _KEY_SHIFT) * (2 * _KEY_SHIFT) + (cy.astype(np.int64) + _KEY_SHIFT)
+
+    # ==========================================================================
+    # COSTRUZIONE
+    # ==========================================================================
+
+    def add_track(self, ride_id: str, track: Dict[str, np.ndarray]) -> None:
+        """Aggiunge una traccia già semplificata (output di simplify_track)"""
+        if len(track['lat']) == 0:
+            logger.debug(f"Uscita {ride_id} senza GPS: ignorata")
+            return
+        if self.origin is None:
+            self.origin = (float(track['lat'][0]), float(track['lon'][0]))
+        self.ride_ids.append(ride_id)
+        self._tracks.append(track)
+        self._columns = None
+
+    def add_ride(self, ride_id: str, df: pd.DataFrame) -> None:
+        """Aggiunge un'uscita da parse_fit (position_lat/position_long in gradi)"""
+        self.add_track(ride_id, simplify_track(df['position_lat'].values, df['position_long'].values,
+                                               self.spacing_m))
+
+    def _build(self) -> Dict[str, np.ndarray]:
+        """Colonne di tutti i punti ordinate per cella (ricostruite dopo nuove tracce)"""
+        if self._columns is not None:
+            return self._columns
+        if not self._tracks:
+            self._columns = {name: np.zeros(0) for name in ('key', 'ride', 'lat', 'lon', 'idx', 'cumdist')}
+            return self._columns
+
+        lat = np.concatenate([t['lat'] for t in self._tracks])
+        lon = np.concatenate([t['lon'] for t in self._tracks])
+        x, y = self._project(lat, lon)
+        key = self._cell_keys(np.floor(x / self.cell_m), np.floor(y / self.cell_m))
+        ride = np.repeat(np.arange(len(self._tracks)), [len(t['lat']) for t in self._tracks])
+        # Ordine stabile: dentro una cella i punti restano per uscita e percorso
+        order = np.argsort(key, kind='stable')
+        self._columns = {
+            'key': key[order],
+            'ride': ride[order],
+            'lat': lat[order],
+            'lon': lon[order],
+            'idx': np.concatenate([t['idx'] for t in self._tracks])[order],
+            'cumdist': np.concatenate([t['cumdist'] for t in self._tracks])[order],
+        }
+        logger.info(f"Indice spaziale: {len(key)} punti, {len(self.ride_ids)} uscite")
+        return self._columns
+
+    # ==========================================================================
+    # INTERROGAZIONE
+    # ==========================================================================
+
+    def points_near(self, lat: float, lon: float, radius_m: float) -> Dict[str, np.ndarray]:
+        """
+        Punti di tutte le tracce entro radius_m da una coordinata.
+
+        Returns:
+            Dict con ride, idx, cumdist, dist ordinati per (uscita, cumdist)
+        """
+        cols = self._build()
+        if self.origin is None:
+            return {'ride': np.zeros(0, np.int64), 'idx': np.zeros(0, np.int64),
+                    'cumdist': np.zeros(0), 'dist': np.zeros(0)}
+
+        x, y = self._project(np.array([lat]), np.array([lon]))
+        cx = np.arange(np.floor((x[0] - radius_m) / self.cell_m), np.floor((x[0] + radius_m) / self.cell_m) + 1)
+        cy = np.arange(np.floor((y[0] - radius_m) / self.cell_m), np.floor((y[0] + radius_m) / self.cell_m) + 1)
+        keys = self._cell_keys(*(g.ravel() for g in np.meshgrid(cx, cy)))
+        lo = np.searchsorted(cols['key'], keys, side='left')
+        hi = np.searchsorted(cols['key'], keys, side='right')
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)]) if len(keys) else np.zeros(0, np.int64)
+        rows = rows.astype(np.int64)
+
+        dist = haversine_m(lat, lon, cols['lat'][rows], cols['lon'][rows])
+        rows, dist = rows[dist <= radius_m], dist[dist <= radius_m]
+        order = np.lexsort((cols['cumdist'][rows], cols['ride'][rows]))
+        rows, dist = rows[order], dist[order]
+        return {'ride': cols['ride'][rows].astype(np.int64), 'idx': cols['idx'][rows].astype(np.int64),
+                'cumdist': cols['cumdist'][rows], 'dist': dist}
+
+    def find_traversals(self, ref_lat: np.ndarray, ref_lon: np.ndarray, radius_m: float = 30.0,
+                        length_tolerance: float = 0.15, n_checkpoints: int = 8) -> pd.DataFrame:
+        """
+        Tutti i passaggi delle uscite indicizzate sul segmento di riferimento.
+
+        Args:
+            ref_lat, ref_lon: Traccia del segmento (es. slice di un'uscita) [gradi]
+            radius_m: Distanza massima dai checkpoint del segmento [m]
+            length_tolerance: Scarto relativo ammesso sulla lunghezza percorsa
+            n_checkpoints: Checkpoint intermedi da toccare in ordine
+
+        Returns:
+            DataFrame (colonne MATCH_COLUMNS) con start_idx/end_idx (end esclusivo)
+            riferiti al DataFrame di parse_fit di ciascuna uscita
+        """
+        ref = simplify_track(ref_lat, ref_lon, self.spacing_m)
+        if len(ref['lat']) < 2 or ref['cumdist'][-1] <= 0:
+            raise ValueError("Segmento di riferimento senza coordinate GPS sufficienti")
+        length = float(ref['cumdist'][-1])
+
+        # Checkpoint equispaziati sul percorso (il primo è lo start, l'ultimo l'arrivo)
+        fractions = np.linspace(0, 1, max(n_checkpoints, 0) + 2)
+        at = np.minimum(np.searchsorted(ref['cumdist'], fractions * length), len(ref['lat']) - 1)
+        hits = [self.points_near(ref['lat'][i], ref['lon'][i], radius_m) for i in at]
+
+        candidates = set(np.unique(hits[0]['ride']))
+        for h in hits[1:]:
+            candidates &= set(np.unique(h['ride']))
+
+        slack = length_tolerance * length + radius_m
+        max_gap = 2 * radius_m + self.spacing_m
+        rows = []
+        for ride in sorted(candidates):
+            per_ride = []
+            for h in hits:
+                lo, hi = np.searchsorted(h['ride'], [ride, ride + 1])
+                per_ride.append((h['cumdist'][lo:hi], h['dist'][lo:hi], h['idx'][lo:hi]))
+
+            start_cd, start_dist, start_idx = _passes(*per_ride[0], max_gap)
+            end_cd, end_dist, end_idx = _passes(*per_ride[-1], max_gap)
+            free_from = -np.inf
+            for s_cd, s_dist, s_idx in zip(start_cd, start_dist, start_idx):
+                if s_cd < free_from:
+                    continue
+                span = end_cd - s_cd
+                ok = np.flatnonzero((span >= length * (1 - length_tolerance)) & (span <= length * (1 + length_tolerance)))
+                if len(ok) == 0:
+                    continue
+                e = ok[0]
+                # Ogni checkpoint intermedio toccato vicino alla sua progressiva
+                inside = True
+                for f, (cd, _, _) in zip(fractions[1:-1], per_ride[1:-1]):
+                    expected = s_cd + f * span[e]
+                    lo, hi = np.searchsorted(cd, [expected - slack, expected + slack])
+                    if hi <= lo:
+                        inside = False
+                        break
+                if not inside:
+                    continue
+                rows.append((self.ride_ids[ride], int(s_idx), int(end_idx[e]) + 1, float(span[e]),
+                             float(s_dist), float(end_dist[e])))
+                # Su un circuito l'arrivo di un giro e la partenza del successivo
+                # sono lo stesso passaggio: basta non ripartire prima di esso
+                free_from = end_cd[e] - max_gap
+
+        logger.info(f"Segmento {length:.0f} m: {len(rows)} passaggi su {len(candidates)} uscite candidate")
+        return pd.DataFrame(rows, columns=MATCH_COLUMNS)
+
+    # ==========================================================================
+    # PERSISTENZA
+    # ==========================================================================
+
+    def save(self, path: str) -> None:
+        """Salva tracce semplificate e parametri in un .npz"""
+        counts = np.asarray([len(t['lat']) for t in self._tracks], dtype=np.int64)
+        np.savez(path,
+                 params=np.asarray([self.cell_m, self.spacing_m]),
+                 origin=np.asarray(self.origin if self.origin else (np.nan, np.nan)),
+                 ride_ids=np.asarray(self.ride_ids, dtype=str),
+                 counts=counts,
+                 **{name: np.concatenate([t[name] for t in self._tracks]) if self._tracks else np.zeros(0)
+                    for name in ('lat', 'lon', 'idx', 'cumdist')})
+
+    @classmethod
+    def load(cls, path: str) -> 'SegmentIndex':
+        """Ricarica un indice salvato con save()"""
+        # NpzFile rilegge l'array a ogni accesso: si carica tutto una volta
+        with np.load(path) as npz:
+            data = {name: npz[name] for name in npz.files}
+        cell_m, spacing_m = data['params']
+        index = cls(cell_m, spacing_m)
+        if not np.isnan(data['origin'][0]):
+            index.origin = tuple(float(v) for v in data['origin'])
+        data['idx'] = data['idx'].astype(np.int64)
+        bounds = np.concatenate(([0], np.cumsum(data['counts'])))
+        for i, ride_id in enumerate(data['ride_ids']):
+            s, e = bounds[i], bounds[i + 1]
+            index.ride_ids.append(str(ride_id))
+            index._tracks.append({name: data[name][s:e] for name in ('lat', 'lon', 'idx', 'cumdist')})
+        return index
+
+
+def traversal_efforts(df: pd.DataFrame, matches: pd.DataFrame, ride_id: str) -> List[Tuple[int, int, float]]:
+    """
+    Passaggi di un'uscita nel formato efforts (start, end, avg_power).
+
+    Il risultato va direttamente a RideLoad.effort_metrics, InspectionManager
+    e alle tabelle effort come un qualunque effort rilevato.
+    """
+    power = np.nan_to_num(df['power'].to_numpy(dtype=float))
+    cum = np.concatenate(([0.0], np.cumsum(power)))
+    rows = matches[matches['ride_id'] == ride_id]
+    return [(int(s), int(e), float((cum[e] - cum[s]) / (e - s)))
+            for s, e in zip(rows['start_idx'], rows['end_idx']) if e > s]
+
+
+def _simplify_fit(fit_path: str, spacing_m: float) -> Dict[str, np.ndarray]:
+    """Unità di lavoro dei processi worker: parse + semplificazione traccia"""
+    from .peffort_engine import parse_fit
+
+    df = parse_fit(fit_path)
+    return simplify_track(df['position_lat'].values, df['position_long'].values, spacing_m)
+
+
+def build_segment_index(fit_paths: List[str], index: Optional[SegmentIndex] = None,
+                        max_workers: Optional[int] = None) -> SegmentIndex:
+    """
+    Indicizza in parallelo una libreria di FIT (ride_id = hash di contenuto).
+
+    Args:
+        fit_paths: Lista file FIT
+        index: Indice da estendere (None = nuovo); le uscite già presenti sono saltate
+        max_workers: Numero processi (None = numero di CPU)
+
+    Returns:
+        L'indice aggiornato
+    """
+    from .inspection_store import fast_content_hash
+
+    # Non "index or ...": un indice vuoto è falso per __len__ e andrebbe perso
+    if index is None:
+        index = SegmentIndex()
+    # Id già indicizzati o in coda: copie dello stesso FIT analizzate una volta
+    seen = set(index.ride_ids)
+    pending = {}
+    for fit_path in fit_paths:
+        ride_id = fast_content_hash(fit_path)
+        if ride_id not in seen:
+            seen.add(ride_id)
+            pending[fit_path] = ride_id
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_simplify_fit, path, index.spacing_m): path for path in pending}
+        results = {}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logger.error(f"Indicizzazione fallita per {Path(path).name}: {e}")
+
+    # Ordine di inserimento deterministico (quello della lista in input)
+    for path, ride_id in pending.items():
+        if path in results:
+            index.add_track(ride_id, results[path])
+    return index
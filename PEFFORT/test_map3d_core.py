@@ -0,0 +1,134 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""Regression test: prepare_efforts_data vettoriale vs implementazione a loop originale"""
+
+import json
+import numpy as np
+import pandas as pd
+
+from PEFFORT.map3d_core import (
+    export_traccia_geojson,
+    prepare_efforts_data,
+    calculate_effort_parameters,
+    calculate_cumulative_joules
+)
+from PEFFORT.peffort_engine import get_zone_color
+
+
+def _legacy_cumulative_joules(time_sec, power_all, ftp):
+    """Loop originale per il calcolo dei Joules cumulativi"""
+    joules_cumulative = np.zeros(len(power_all))
+    joules_over_cp_cumulative = np.zeros(len(power_all))
+    for i in range(1, len(power_all)):
+        dt = time_sec[i] - time_sec[i-1]
+        if dt > 0 and dt < 30:
+            joules_cumulative[i] = joules_cumulative[i-1] + power_all[i] * dt
+            if power_all[i] >= ftp:
+                joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1] + power_all[i] * dt
+            else:
+                joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1]
+        else:
+            joules_cumulative[i] = joules_cumulative[i-1]
+            joules_over_cp_cumulative[i] = joules_over_cp_cumulative[i-1]
+    return joules_cumulative, joules_over_cp_cumulative
+
+
+def _legacy_prepare_efforts_data(df, efforts, ftp, weight, geojson_data, orig_indices,
+                                 alt_values, dist_km_values):
+    """Implementazione originale con doppia scansione lineare per effort"""
+    time_sec = df['time_sec'].values
+    power_all = df['power'].values
+    joules_cumulative, joules_over_cp_cumulative = _legacy_cumulative_joules(time_sec, power_all, ftp)
+
+    efforts_list = []
+    coords = geojson_data['features'][0]['geometry']['coordinates']
+    for s, e, avg in efforts:
+        pos_start = 0
+        for idx_f, idx_orig in enumerate(orig_indices):
+            if idx_orig >= s:
+                pos_start = idx_f
+                break
+        pos_end = len(orig_indices) - 1
+        for idx_f, idx_orig in enumerate(orig_indices):
+            if idx_orig >= e:
+                pos_end = idx_f
+                break
+        if pos_end < pos_start:
+            pos_end = pos_start + 1
+        if pos_end >= len(coords):
+            pos_end = len(coords) - 1
+
+        segment_coords = coords[pos_start:pos_end+1]
+        segment_alt = alt_values[pos_start:pos_end+1].tolist() if pos_end < len(alt_values) else []
+        segment_dist = dist_km_values[pos_start:pos_end+1].tolist() if pos_end < len(dist_km_values) else []
+        params = calculate_effort_parameters(s, e, avg, df, alt_values, dist_km_values,
+                                             ftp, weight, joules_cumulative, joules_over_cp_cumulative)
+        if len(segment_coords) > 0:
+            effort_dict = {
+                'pos': int(pos_start),
+                'start': int(pos_start),
+                'end': int(pos_end),
+                'avg': float(avg),
+                'color': get_zone_color(avg, ftp),
+                'segment': segment_coords,
+                'altitude': segment_alt,
+                'distance': segment_dist,
+                'distance_km': float(segment_dist[-1] - segment_dist[0]) if len(segment_dist) > 1 else 0,
+            }
+            effort_dict.update(params)
+            efforts_list.append(effort_dict)
+    return json.dumps(efforts_list)
+
+
+def _make_ride(n=5000, seed=7):
+    """Uscita sintetica con buchi GPS e una pausa > 30s"""
+    rng = np.random.default_rng(seed)
+    time_sec = np.arange(n, dtype=float)
+    time_sec[n // 2:] += 120  # pausa
+    power = np.clip(220 + 120 * np.sin(np.arange(n) / 90) + rng.normal(0, 40, n), 0, None).astype(int)
+    df = pd.DataFrame({
+        'time_sec': time_sec,
+        'power': power,
+        'heartrate': rng.integers(120, 180, n),
+        'cadence': rng.integers(0, 110, n),
+        'grade': rng.normal(3, 2, n),
+        'altitude': 200 + np.cumsum(rng.normal(0.1, 0.3, n)),
+        'distance': np.arange(n) * 8.5,
+        'distance_km': np.arange(n) * 0.0085,
+        'position_lat': 45 + np.arange(n) * 1e-5,
+        'position_long': 11 + np.arange(n) * 1e-5,
+    })
+    # Punti senza GPS (tunnel, inizio registrazione)
+    df.loc[0:30, ['position_lat', 'position_long']] = np.nan
+    df.loc[1200:1350, ['position_lat', 'position_long']] = np.nan
+    return df
+
+
+def test_cumulative_joules_matches_loop():
+    df = _make_ride()
+    new = calculate_cumulative_joules(df['time_sec'].values, df['power'].values, 280)
+    old = _legacy_cumulative_joules(df['time_sec'].values, df['power'].values, 280)
+    np.testing.assert_array_equal(new[0], old[0])
+    np.testing.assert_array_equal(new[1], old[1])
+
+
+def test_prepare_efforts_data_matches_legacy_output():
+    df = _make_ride()
+    df_geom = df.dropna(subset=['position_lat', 'position_long'])
+    geojson_data, orig_indices = export_traccia_geojson(df_geom)
+    alt_values = df['altitude'].values
+    dist_km_values = df['distance_km'].values
+    efforts = [
+        (10, 200, 300.0),       # inizio prima del primo punto GPS
+        (1100, 1300, 310.0),    # fine dentro il buco GPS
+        (1250, 1400, 290.0),    # inizio dentro il buco GPS
+        (2400, 2700, 350.0),    # a cavallo della pausa
+        (4800, 5000, 400.0),    # fine oltre l'ultimo indice
+    ]
+    args = (df, efforts, 280, 70, geojson_data, orig_indices, alt_values, dist_km_values)
+    assert prepare_efforts_data(*args) == _legacy_prepare_efforts_data(*args)
@@ -0,0 +1,74 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""Regression test: code a due stack e finestre dell'inviluppo vs massimo a forza bruta"""
+
+import numpy as np
+
+from PEFFORT.mmp_envelope import SeasonEnvelope, _WindowMaxQueue
+
+N_DURATIONS = 6
+
+
+def _brute_force(rides):
+    """Massimo per durata sulle uscite (ts, valori, indice); a parità vince la più recente"""
+    values = np.full(N_DURATIONS, np.nan)
+    idx = np.full(N_DURATIONS, -1)
+    for _, mmp, ride_idx in rides:
+        better = ~np.isnan(mmp) & (np.isnan(values) | (mmp >= values))
+        values = np.where(better, mmp, values)
+        idx = np.where(better, ride_idx, idx)
+    return values, idx
+
+
+def _random_mmp(rng):
+    """Valori interi (molte parità) con qualche durata non coperta"""
+    mmp = rng.integers(200, 210, N_DURATIONS).astype(float)
+    mmp[rng.random(N_DURATIONS) < 0.2] = np.nan
+    return mmp
+
+
+def test_window_queue_matches_brute_force():
+    rng = np.random.default_rng(0)
+    queue = _WindowMaxQueue(N_DURATIONS)
+    content = []
+    for step in range(400):
+        if content and rng.random() < 0.4:
+            queue.pop()
+            content.pop(0)
+        else:
+            mmp = _random_mmp(rng)
+            queue.push(np.datetime64(step, 'D'), mmp, step)
+            content.append((step, mmp, step))
+        assert len(queue) == len(content)
+        values, idx = queue.envelope()
+        expected_values, expected_idx = _brute_force(content)
+        np.testing.assert_array_equal(values, expected_values)
+        np.testing.assert_array_equal(idx, expected_idx)
+
+
+def test_season_windows_match_brute_force():
+    rng = np.random.default_rng(1)
+    durations = np.arange(1, N_DURATIONS + 1)
+    envelope = SeasonEnvelope(durations, windows_days=(7, 30))
+    start = np.datetime64('2026-01-01T08:00:00')
+    rides = []
+    for i, offset in enumerate(np.cumsum(rng.integers(0, 4, 120))):
+        ts = start + np.timedelta64(int(offset), 'D')
+        mmp = _random_mmp(rng)
+        envelope.add_ride(f"r{i}", ts, mmp)
+        rides.append((ts, mmp, i))
+
+        for days in (7, 30):
+            cutoff = ts - np.timedelta64(days, 'D')
+            in_window = [r for r in rides if cutoff < r[0] <= ts]
+            expected_values, expected_idx = _brute_force(in_window)
+            result = envelope.envelope(days)
+            covered = ~np.isnan(expected_values)
+            np.testing.assert_array_equal(result['duration'].to_numpy(), durations[covered])
+            np.testing.assert_array_equal(result['power'].to_numpy(), expected_values[covered])
+            assert list(result['ride_id']) == [f"r{k}" for k in expected_idx[covered]]
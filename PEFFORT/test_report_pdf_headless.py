@@ -0,0 +1,47 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""Regression test: report PDF e batch importabili senza PySide6 (worker headless)"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Interprete pulito: PySide6 bloccato come su una macchina senza librerie X/GL
+_HEADLESS_SCRIPT = textwrap.dedent("""
+    import sys
+
+    class _BlockQt:
+        def find_spec(self, name, path=None, target=None):
+            if name == 'PySide6' or name.startswith('PySide6.'):
+                raise ImportError(f"{name} non disponibile")
+
+    sys.meta_path.insert(0, _BlockQt())
+
+    import PEFFORT
+    from PEFFORT.report_pdf import analyze_and_export_pdf, export_pdf_reports
+    from PEFFORT.season_store import SeasonStore
+
+    assert not any(m.startswith('PySide6') for m in sys.modules), "PySide6 importato"
+    try:
+        PEFFORT.EffortAnalyzer
+    except ImportError:
+        pass
+    else:
+        raise AssertionError("EffortAnalyzer importato senza PySide6")
+    print('headless ok')
+""")
+
+
+def test_report_pdf_imports_without_pyside6():
+    result = subprocess.run([sys.executable, '-c', _HEADLESS_SCRIPT], cwd=REPO_ROOT,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert 'headless ok' in result.stdout
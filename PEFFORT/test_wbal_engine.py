@@ -0,0 +1,65 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""Regression test: W'bal con ricorrenza affine vettoriale vs loop per campione"""
+
+import numpy as np
+
+from PEFFORT.synthetic_ride import synthetic_ride
+from PEFFORT.wbal_engine import compute_wbal, integral_tau
+
+CP = 280.0
+W_PRIME = 20000.0
+
+
+def _ride():
+    """Uscita sintetica con una pausa (dt irregolare) per esercitare il recupero lungo"""
+    df = synthetic_ride(0.5, ftp=CP, seed=7)
+    time_sec = df['time_sec'].to_numpy(dtype=float, copy=True)
+    time_sec[900:] += 600
+    return time_sec, df['power'].to_numpy(dtype=float)
+
+
+def _legacy_differential(time_sec, power, cp, w_prime):
+    """Loop originale: spesa sopra CP, recupero esponenziale proporzionale a CP - P"""
+    wbal = np.empty(len(power))
+    expended = 0.0
+    wbal[0] = w_prime
+    for k in range(len(power) - 1):
+        dt = time_sec[k + 1] - time_sec[k]
+        if power[k] > cp:
+            expended += (power[k] - cp) * dt
+        else:
+            expended *= np.exp(-(cp - power[k]) * dt / w_prime)
+        wbal[k + 1] = w_prime - expended
+    return wbal
+
+
+def _legacy_integral(time_sec, power, cp, w_prime):
+    """Somma integrale Skiba 2012: ogni spesa decade con tau dal suo istante"""
+    tau = integral_tau(power, cp)
+    wbal = np.empty(len(power))
+    for k in range(len(power)):
+        expended = 0.0
+        for j in range(k):
+            spent = max(power[j] - cp, 0.0) * (time_sec[j + 1] - time_sec[j])
+            expended += spent * np.exp(-(time_sec[k] - time_sec[j + 1]) / tau)
+        wbal[k] = w_prime - expended
+    return wbal
+
+
+def test_differential_matches_loop():
+    time_sec, power = _ride()
+    np.testing.assert_allclose(compute_wbal(time_sec, power, CP, W_PRIME, 'differential'),
+                               _legacy_differential(time_sec, power, CP, W_PRIME), rtol=0, atol=1e-6)
+
+
+def test_integral_matches_direct_sum():
+    time_sec, power = _ride()
+    time_sec, power = time_sec[:1200], power[:1200]
+    np.testing.assert_allclose(compute_wbal(time_sec, power, CP, W_PRIME, 'integral'),
+                               _legacy_integral(time_sec, power, CP, W_PRIME), rtol=0, atol=1e-6)
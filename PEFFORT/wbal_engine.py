@@ -0,0 +1,127 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+W'BAL ENGINE - Bilancio W' sull'intera uscita (CP/W' da omniPD)
+Forma differenziale (Skiba 2015 / Froncioni-Clarke) e integrale (Skiba 2012), vettorizzate
+"""
+
+from typing import List, Tuple, Dict, Any
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WBAL_METHODS = ('differential', 'integral')
+# Ampiezza massima dell'esponente accumulato per segmento (exp(500) resta finito)
+_MAX_LOG_SPAN = 500.0
+
+
+def _affine_recurrence(decay: np.ndarray, inflow: np.ndarray, x0: float) -> np.ndarray:
+    """
+    Risolve x[k+1] = exp(-decay[k]) * x[k] + inflow[k] senza loop per campione.
+
+    Con R = somma cumulativa di decay: x[k] = exp(-R[k]) * (x0 + sum_{j<k} inflow[j] * exp(R[j+1])).
+    La serie è spezzata in segmenti dove R cresce al massimo di _MAX_LOG_SPAN,
+    così gli esponenziali non vanno in overflow.
+
+    Returns:
+        Array x di lunghezza len(decay) + 1 (x[0] = x0)
+    """
+    # exp(-50) ~ 2e-22: oltre è recupero completo, e il limite evita overflow su pause lunghe
+    decay = np.minimum(decay, 50.0)
+    n = len(decay)
+    out = np.empty(n + 1)
+    out[0] = x0
+    cum = np.concatenate(([0.0], np.cumsum(decay)))
+    segment = np.floor(cum[:-1] / _MAX_LOG_SPAN).astype(np.int64)
+    bounds = np.flatnonzero(np.diff(segment)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [n]))
+
+    x = x0
+    for s, e in zip(starts, ends):
+        rel = cum[s:e + 1] - cum[s]
+        acc = np.concatenate(([0.0], np.cumsum(inflow[s:e] * np.exp(rel[1:]))))
+        out[s:e + 1] = np.exp(-rel) * (x + acc)
+        x = out[e]
+    return out
+
+
+def integral_tau(power: np.ndarray, cp: float) -> float:
+    """Costante di tempo di recupero Skiba 2012: 546 * exp(-0.01 * D_CP) + 316 [s]"""
+    below = power[power < cp]
+    d_cp = float(cp - below.mean()) if len(below) else 0.0
+    return 546 * np.exp(-0.01 * d_cp) + 316
+
+
+def compute_wbal(time_sec: np.ndarray, power: np.ndarray, cp: float, w_prime: float,
+                 method: str = 'differential') -> np.ndarray:
+    """
+    W'bal per campione.
+
+    Args:
+        time_sec: Tempi [s]
+        power: Potenza [W]
+        cp: Critical Power [W]
+        w_prime: W' [J]
+        method: 'differential' (recupero proporzionale a CP - P) o 'integral' (tau costante)
+
+    Returns:
+        W'bal [J] all'istante di ogni campione (il campione k agisce sull'intervallo k -> k+1)
+    """
+    if method not in WBAL_METHODS:
+        raise ValueError(f"Metodo W'bal non valido: {method}")
+    if cp <= 0 or w_prime <= 0:
+        raise ValueError(f"CP e W' devono essere > 0 (CP={cp}, W'={w_prime})")
+
+    t = np.asarray(time_sec, dtype=float)
+    p = np.nan_to_num(np.asarray(power, dtype=float))
+    if len(t) < 2:
+        return np.full(len(t), float(w_prime))
+
+    dt = np.diff(t)
+    p_step = p[:-1]
+    inflow = np.maximum(p_step - cp, 0.0) * dt
+
+    if method == 'differential':
+        # W' speso: cresce sopra CP, decade esponenzialmente sotto CP
+        decay = np.maximum(cp - p_step, 0.0) * dt / w_prime
+    else:
+        decay = dt / integral_tau(p, cp)
+
+    expended = _affine_recurrence(decay, inflow, 0.0)
+    return w_prime - expended
+
+
+def effort_wbal_min(wbal: np.ndarray, efforts: List[Tuple[int, int, float]]) -> np.ndarray:
+    """W'bal minimo di ogni effort (end esclusivo)"""
+    return np.asarray([float(wbal[s:e].min()) if e > s else np.nan for s, e, _ in efforts])
+
+
+def wbal_from_model(df: pd.DataFrame, model: Dict[str, Any], efforts: List[Tuple[int, int, float]] = (),
+                    method: str = 'differential') -> Dict[str, Any]:
+    """
+    W'bal dell'uscita con CP/W' del risultato di calculate_omnipd_model.
+
+    Args:
+        df: DataFrame da parse_fit (time_sec, power)
+        model: Dict con chiavi 'CP' e 'W_prime'
+        efforts: Lista efforts (start, end, avg_power)
+        method: 'differential' o 'integral'
+
+    Returns:
+        Dict con wbal (per campione), wbal_min (uscita), effort_min (per effort)
+    """
+    wbal = compute_wbal(df['time_sec'].values, df['power'].values,
+                        float(model['CP']), float(model['W_prime']), method)
+    return {
+        'wbal': wbal,
+        'wbal_min': float(wbal.min()) if len(wbal) else float(model['W_prime']),
+        'effort_min': effort_wbal_min(wbal, list(efforts)),
+    }
@@ -12,30 +12,49 @@ omniPD_calculator - Modulo di calcolo potenza-durata per bFactor
 from .gui_omniPD import OmniPDAnalyzer
 from .core_omniPD import (
     calculate_omnipd_model,
+    calculate_omnipd_model_robust,
     ompd_power,
     ompd_power_short,
+    ompd_jacobian,
     w_eff,
+    time_to_exhaustion,
+    PowerDurationTable,
+    data_hash,
+    OmniPDFitCache,
     load_data_from_file,
     extract_data_from_rows,
     convert_time_minutes_to_seconds
 )
+from .batch_omniPD import fit_omnipd_batch
+from .bootstrap_omniPD import bootstrap_omnipd
+from .surface_omniPD import rmse_surface
 from .widgets_omniPD import CSVColumnDialog, MmpRow
-from .plotting_omniPD import plot_ompd_curve, plot_residuals, plot_weff
+from .plotting_omniPD import plot_ompd_curve, plot_residuals, plot_weff, plot_error_surface
 from .events_omniPD import OmniPDEventHandler
 
 __all__ = [
     'OmniPDAnalyzer',
     'calculate_omnipd_model',
+    'calculate_omnipd_model_robust',
     'ompd_power',
     'ompd_power_short',
+    'ompd_jacobian',
     'w_eff',
+    'time_to_exhaustion',
+    'PowerDurationTable',
+    'data_hash',
+    'OmniPDFitCache',
     'load_data_from_file',
     'extract_data_from_rows',
     'convert_time_minutes_to_seconds',
+    'fit_omnipd_batch',
+    'bootstrap_omnipd',
+    'rmse_surface',
     'CSVColumnDialog',
     'MmpRow',
     'plot_ompd_curve',
     'plot_residuals',
     'plot_weff',
+    'plot_error_surface',
     'OmniPDEventHandler',
 ]
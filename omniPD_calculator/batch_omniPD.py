@@ -0,0 +1,266 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+OmniPD Batch - Fit del modello OmniPD su molti atleti
+Dataset piccoli risolti in un unico least-squares impilato, gli altri in un pool di processi
+
+Uso: python -m omniPD_calculator.batch_omniPD squadra/*.csv --output parametri.csv
+"""
+import argparse
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .core_omniPD import (
+    calculate_omnipd_model,
+    initial_guess_and_bounds,
+    load_data_from_file,
+    ompd_jacobian,
+    ompd_power,
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Dataset fino a questo numero di punti vanno nel solve impilato
+STACK_MAX_POINTS = 60
+# Atleti per blocco impilato (un blocco = un task del pool)
+STACK_CHUNK_SIZE = 256
+# Iterazioni massime e tolleranza relativa del Levenberg-Marquardt impilato
+STACK_MAX_ITER = 200
+STACK_TOL = 1e-10
+
+BATCH_COLUMNS = ['athlete', 'n_points', 'CP', 'W_prime', 'Pmax', 'A', 'RMSE', 'MAE', 'method', 'error']
+
+
+def _result_row(athlete: str, t: NDArray[np.float64], p: NDArray[np.float64],
+                params: NDArray[np.float64], method: str) -> Dict[str, Any]:
+    """Riga del DataFrame risultati con errori calcolati sui punti dell'atleta"""
+    residuals = p - ompd_power(t, *params)
+    return {
+        'athlete': athlete, 'n_points': len(t),
+        'CP': params[0], 'W_prime': params[1], 'Pmax': params[2], 'A': params[3],
+        'RMSE': float(np.sqrt(np.mean(residuals ** 2))), 'MAE': float(np.mean(np.abs(residuals))),
+        'method': method, 'error': None,
+    }
+
+
+def _error_row(athlete: str, n_points: int, error: str) -> Dict[str, Any]:
+    """Riga per un fit fallito (parametri NaN)"""
+    row = {col: np.nan for col in BATCH_COLUMNS}
+    row.update({'athlete': athlete, 'n_points': n_points, 'method': None, 'error': error})
+    return row
+
+
+def stacked_levenberg_marquardt(t_all: NDArray[np.float64], p_all: NDArray[np.float64], sizes: NDArray[np.int64],
+                                x0: NDArray[np.float64], lower: NDArray[np.float64], upper: NDArray[np.float64],
+                                max_iter: int = STACK_MAX_ITER,
+                                tol: float = STACK_TOL) -> Tuple[NDArray[np.float64], NDArray[np.bool_]]:
+    """
+    Levenberg-Marquardt vettorizzato su molti problemi OmniPD indipendenti.
+
+    I punti di tutti i problemi sono concatenati (sizes punti ciascuno, in
+    blocchi contigui): a ogni iterazione modello e Jacobiana analitica si
+    valutano una volta sola, le equazioni normali 4x4 di ciascun problema si
+    sommano con reduceat e si risolvono in blocco. Ogni problema ha il proprio
+    smorzamento e il proprio criterio di arresto; i bounds sono gestiti per
+    proiezione (le variabili ferme su un bound con gradiente uscente restano
+    bloccate nel passo).
+
+    Args:
+        t_all, p_all: Punti concatenati
+        sizes: Numero di punti di ciascun problema
+        x0: Parametri iniziali (n_problemi, 4)
+        lower, upper: Bounds (n_problemi, 4)
+        max_iter: Iterazioni massime
+        tol: Tolleranza relativa su costo e passo
+
+    Returns:
+        Tuple (parametri (n_problemi, 4), maschera convergenza)
+    """
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    owner = np.repeat(np.arange(len(sizes)), sizes)
+    x = np.clip(np.array(x0, dtype=float), lower, upper)
+
+    def cost(params):
+        # Passi fino a W' = 0 danno costo NaN e vengono rifiutati
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            r = ompd_power(t_all, *params[owner].T) - p_all
+            return r, 0.5 * np.add.reduceat(r ** 2, offsets)
+
+    r, f = cost(x)
+    damping = np.full(len(sizes), 1e-3)
+    active = np.ones(len(sizes), dtype=bool)
+    eye = np.eye(4)
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        J = ompd_jacobian(t_all, *x[owner].T)
+        JtJ = np.add.reduceat(J[:, :, None] * J[:, None, :], offsets)
+        g = np.add.reduceat(J * r[:, None], offsets)
+
+        # Variabili su un bound con gradiente che spinge fuori: escluse dal passo
+        fixed = ((x <= lower) & (g > 0)) | ((x >= upper) & (g < 0))
+        free = ~fixed
+        diag = np.diagonal(JtJ, axis1=1, axis2=2)
+        H = JtJ * (free[:, :, None] & free[:, None, :])
+        H = H + eye * (damping[:, None] * np.maximum(diag, 1e-12) * free + fixed)[:, :, None]
+        step = -np.linalg.solve(H, (g * free)[:, :, None])[:, :, 0]
+        step[~active] = 0.0
+
+        x_new = np.clip(x + step, lower, upper)
+        r_new, f_new = cost(x_new)
+        accept = active & (f_new <= f)
+        small_step = np.linalg.norm(x_new - x, axis=1) <= tol * (tol + np.linalg.norm(x, axis=1))
+        small_gain = (f - f_new) <= tol * np.maximum(f, 1e-300)
+
+        x[accept] = x_new[accept]
+        f = np.where(accept, f_new, f)
+        r = np.where(accept[owner], r_new, r)
+        damping = np.where(accept, np.maximum(damping / 3, 1e-12), damping * 4)
+        active &= ~((accept & (small_gain | small_step)) | (damping > 1e12))
+        if not active.any():
+            break
+    logger.debug(f"LM impilato: {len(sizes)} problemi, {iterations} iterazioni, "
+                 f"{int(active.sum())} non convergenti")
+    return x, ~active
+
+
+def fit_stacked(datasets: Sequence[Tuple[str, NDArray[np.float64], NDArray[np.float64]]]) -> List[Dict[str, Any]]:
+    """
+    Fit simultaneo di più atleti con stacked_levenberg_marquardt.
+
+    Stesso guess iniziale e stessi bounds di calculate_omnipd_model. I
+    problemi che non convergono entro STACK_MAX_ITER sono rifatti con il fit
+    singolo (method 'single').
+
+    Args:
+        datasets: Sequenza di (atleta, t, P), ciascuno con almeno 4 punti
+
+    Returns:
+        Lista di righe risultato (stesso ordine di datasets)
+    """
+    sizes = np.array([len(t) for _, t, _ in datasets])
+    t_all = np.concatenate([t for _, t, _ in datasets]).astype(float)
+    p_all = np.concatenate([p for _, _, p in datasets]).astype(float)
+
+    guesses = [initial_guess_and_bounds(p) for _, _, p in datasets]
+    x0 = np.array([g for g, _ in guesses])
+    lower = np.array([lo for _, (lo, _) in guesses])
+    upper = np.array([hi for _, (_, hi) in guesses])
+    params, converged = stacked_levenberg_marquardt(t_all, p_all, sizes, x0, lower, upper)
+    if not converged.all():
+        logger.info(f"Solve impilato: {int((~converged).sum())} problemi non convergenti, ripiego sul fit singolo")
+
+    rows = []
+    for i, (name, t, p) in enumerate(datasets):
+        if converged[i]:
+            rows.append(_result_row(name, t, p, params[i], 'stacked'))
+        else:
+            rows.extend(_fit_single(name, t, p))
+    return rows
+
+
+def _fit_single(athlete: str, t: NDArray[np.float64], p: NDArray[np.float64]) -> List[Dict[str, Any]]:
+    """Worker: fit singolo con calculate_omnipd_model"""
+    try:
+        result = calculate_omnipd_model(t, p)
+        return [_result_row(athlete, np.asarray(t, float), np.asarray(p, float), result['params'], 'single')]
+    except ValueError as e:
+        return [_error_row(athlete, len(t), str(e))]
+
+
+def _fit_chunk(chunk: Sequence[Tuple[str, NDArray[np.float64], NDArray[np.float64]]]) -> List[Dict[str, Any]]:
+    """Worker: blocco impilato, con ripiego sui fit singoli se il solve congiunto fallisce"""
+    try:
+        return fit_stacked(chunk)
+    except Exception as e:
+        logger.warning(f"Solve impilato fallito ({e}): fit singoli per {len(chunk)} atleti")
+        return [row for name, t, p in chunk for row in _fit_single(name, t, p)]
+
+
+def fit_omnipd_batch(datasets: Mapping[str, Tuple[NDArray[np.float64], NDArray[np.float64]]],
+                     max_workers: Optional[int] = None,
+                     stack_max_points: int = STACK_MAX_POINTS) -> pd.DataFrame:
+    """
+    Fit OmniPD di molti atleti.
+
+    Args:
+        datasets: Dizionario atleta -> (t_data, p_data)
+        max_workers: Numero processi (None = numero di CPU, 1 = tutto nel processo corrente)
+        stack_max_points: Dataset fino a questo numero di punti vanno nel solve impilato
+
+    Returns:
+        DataFrame con colonne BATCH_COLUMNS (un atleta per riga, nell'ordine di input);
+        i fit falliti hanno parametri NaN e il messaggio in 'error'
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    small, large = [], []
+    for athlete, (t, p) in datasets.items():
+        t = np.asarray(t, dtype=float)
+        p = np.asarray(p, dtype=float)
+        valid = np.isfinite(t) & np.isfinite(p) & (t > 0)
+        t, p = t[valid], p[valid]
+        if len(t) < 4:
+            rows[athlete] = _error_row(athlete, len(t), "Dati insufficienti: servono almeno 4 punti")
+        elif len(t) <= stack_max_points:
+            small.append((athlete, t, p))
+        else:
+            large.append((athlete, t, p))
+
+    tasks = [(_fit_chunk, (small[i:i + STACK_CHUNK_SIZE],)) for i in range(0, len(small), STACK_CHUNK_SIZE)]
+    tasks += [(_fit_single, item) for item in large]
+    logger.info(f"Fit batch: {len(small)} atleti impilati, {len(large)} fit singoli, {len(tasks)} task")
+
+    if max_workers == 1 or len(tasks) <= 1:
+        for fn, args in tasks:
+            rows.update((row['athlete'], row) for row in fn(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(fn, *args) for fn, args in tasks]
+            for future in as_completed(futures):
+                rows.update((row['athlete'], row) for row in future.result())
+
+    return pd.DataFrame([rows[athlete] for athlete in datasets], columns=BATCH_COLUMNS)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point da riga di comando: un file CSV/XLSX/XLSM per atleta"""
+    parser = argparse.ArgumentParser(description="Fit OmniPD batch (un file per atleta)")
+    parser.add_argument('files', nargs='+', help="File MMP (nome file = atleta)")
+    parser.add_argument('--time-col', type=int, default=0)
+    parser.add_argument('--power-col', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', help="CSV dei parametri (default: solo stampa)")
+    args = parser.parse_args(argv)
+
+    datasets, failed = {}, []
+    for file_path in args.files:
+        try:
+            datasets[Path(file_path).stem] = load_data_from_file(file_path, args.time_col, args.power_col)
+        except ValueError as e:
+            failed.append(_error_row(Path(file_path).stem, 0, str(e)))
+
+    results = fit_omnipd_batch(datasets, max_workers=args.workers)
+    if failed:
+        results = pd.concat([results, pd.DataFrame(failed, columns=BATCH_COLUMNS)], ignore_index=True)
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        logger.info(f"Parametri salvati: {args.output}")
+    return 1 if results['error'].notna().any() else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
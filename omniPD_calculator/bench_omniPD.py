@@ -0,0 +1,115 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+BENCHMARK OmniPD - Fit con differenze finite, Jacobiana analitica e parametri logaritmici
+Valutazioni, latenza e scarto dei parametri su dataset di riferimento (JSON lines)
+
+Uso: python -m omniPD_calculator.bench_omniPD --sizes 8 14 37 155 --noise 0 0.01 0.03
+"""
+
+from typing import List, Dict, Any, Optional, Sequence
+import argparse
+import json
+import logging
+import sys
+import time
+import numpy as np
+
+from .core_omniPD import calculate_omnipd_model, ompd_power
+
+logger = logging.getLogger(__name__)
+
+# Parametri dell'atleta di riferimento (CP, W', Pmax, A)
+REFERENCE_PARAMS = (280.0, 20000.0, 1100.0, 6.0)
+DEFAULT_SIZES = (8, 14, 37, 155)
+DEFAULT_NOISE = (0.0, 0.01, 0.03)
+DEFAULT_OUTPUT = 'bench_omnipd.txt'
+VARIANTS = {
+    'numeric': {'analytic_jacobian': False, 'log_params': False},
+    'analytic': {'analytic_jacobian': True, 'log_params': False},
+    'analytic_log': {'analytic_jacobian': True, 'log_params': True},
+}
+
+
+def reference_dataset(n_points: int, noise: float = 0.0, seed: int = 0):
+    """
+    Punti MMP sintetici da REFERENCE_PARAMS su durate log-spaziate 1 s - 2 h.
+
+    Args:
+        n_points: Numero di durate
+        noise: Rumore gaussiano relativo sulla potenza (es. 0.01 = 1%)
+        seed: Seme del generatore
+
+    Returns:
+        Tuple (t, P)
+    """
+    rng = np.random.default_rng(seed)
+    t = np.unique(np.round(np.geomspace(1, 7200, n_points)))
+    P = ompd_power(t, *REFERENCE_PARAMS) * (1 + rng.normal(0, noise, len(t)))
+    return t, P
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, noise_levels: Sequence[float] = DEFAULT_NOISE,
+                   repeat: int = 20, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Confronta le varianti di fit su ogni dataset.
+
+    Lo scarto dei parametri è relativo alla variante 'numeric' (comportamento storico).
+
+    Returns:
+        Lista di record (uno per variante, dimensione e rumore)
+    """
+    records = []
+    for noise in noise_levels:
+        for n in sizes:
+            t, P = reference_dataset(n, noise, seed)
+            baseline = None
+            for name, options in VARIANTS.items():
+                times = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    result = calculate_omnipd_model(t, P, **options)
+                    times.append(time.perf_counter() - t0)
+                params = np.asarray(result['params'], dtype=float)
+                if baseline is None:
+                    baseline = params
+                record = {
+                    'benchmark': name, 'points': len(t), 'noise': noise, 'repeat': repeat,
+                    'nfev': result['nfev'], 'njev': result['njev'],
+                    'best_s': min(times), 'median_s': float(np.median(times)),
+                    'max_param_rel_diff': float(np.max(np.abs(params - baseline) / np.abs(baseline).clip(1e-12))),
+                    'RMSE': float(result['RMSE']),
+                }
+                records.append(record)
+                print(f"{name:13s} n={len(t):4d} noise={noise:<5g} nfev={record['nfev']:3d} "
+                      f"njev={record['njev']:3d} median {record['median_s'] * 1000:7.2f} ms  "
+                      f"dparam {record['max_param_rel_diff']:.1e}  RMSE {record['RMSE']:.3f}")
+    return records
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point da riga di comando"""
+    parser = argparse.ArgumentParser(description="Benchmark fit OmniPD")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--noise', type=float, nargs='+', default=list(DEFAULT_NOISE))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    records = run_benchmarks(args.sizes, args.noise, args.repeat, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    logger.info(f"Risultati benchmark salvati: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+OmniPD Bootstrap - Intervalli di confidenza dei parametri e bande della curva
+Ricampionamento dei residui o dei punti, fit in blocco con warm start, distribuito sui core
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .core_omniPD import calculate_omnipd_model, fit_bounds, initial_guess_and_bounds, ompd_power
+from .batch_omniPD import stacked_levenberg_marquardt
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_METHODS = ('residual', 'case')
+PARAM_NAMES = ('CP', 'W_prime', 'Pmax', 'A')
+# Ricampionamenti per task del pool
+BOOTSTRAP_CHUNK_SIZE = 250
+# Sotto questo numero di ricampionamenti x punti l'avvio del pool costa più del lavoro: tutto nel processo
+BOOTSTRAP_POOL_MIN_ELEMENTS = 50_000
+
+
+def _resample_chunk(t_data: NDArray[np.float64], p_data: NDArray[np.float64], p_pred: NDArray[np.float64],
+                    residuals: NDArray[np.float64], base_params: NDArray[np.float64], method: str,
+                    n_resamples: int, seed: np.random.SeedSequence) -> NDArray[np.float64]:
+    """
+    Worker: genera n_resamples dataset e li fitta in un solo LM impilato.
+
+    Ogni ricampionamento parte dai parametri del fit base (warm start) e usa
+    i bounds che calculate_omnipd_model userebbe sul dataset ricampionato.
+
+    Returns:
+        Parametri (n, 4); le righe non valide sono NaN
+    """
+    rng = np.random.default_rng(seed)
+    n = len(t_data)
+    if method == 'residual':
+        # Residui riscalati per i gradi di libertà persi nel fit
+        scale = np.sqrt(n / (n - 4)) if n > 4 else 1.0
+        idx = rng.integers(0, n, (n_resamples, n))
+        t_all = np.tile(t_data, n_resamples)
+        p_all = (p_pred[None, :] + scale * residuals[idx]).ravel()
+        valid = np.ones(n_resamples, dtype=bool)
+    else:
+        idx = rng.integers(0, n, (n_resamples, n))
+        t_all = t_data[idx].ravel()
+        p_all = p_data[idx].ravel()
+        # Servono almeno 4 durate distinte per identificare i 4 parametri
+        sorted_t = np.sort(t_data[idx], axis=1)
+        valid = (np.diff(sorted_t, axis=1) > 0).sum(axis=1) + 1 >= 4
+
+    lower, upper = fit_bounds(p_all.reshape(n_resamples, n).max(axis=1))
+    x0 = np.tile(base_params, (n_resamples, 1))
+
+    params, converged = stacked_levenberg_marquardt(t_all, p_all, np.full(n_resamples, n), x0, lower, upper)
+    params[~(valid & converged)] = np.nan
+    return params
+
+
+def bootstrap_omnipd(t_data: NDArray[np.float64], p_data: NDArray[np.float64], n_resamples: int = 1000,
+                     method: str = 'residual', confidence: float = 0.95, seed: Optional[int] = None,
+                     max_workers: Optional[int] = None, t_grid: Optional[NDArray[np.float64]] = None,
+                     base_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Intervalli di confidenza bootstrap (percentile) per CP, W', Pmax e A.
+
+    Args:
+        t_data: Array di tempi (secondi)
+        p_data: Array di potenze (Watt)
+        n_resamples: Numero di ricampionamenti
+        method: 'residual' (curva del fit + residui ricampionati) o 'case' (punti ricampionati)
+        confidence: Livello di confidenza (es. 0.95)
+        seed: Seme per risultati riproducibili
+        max_workers: Numero processi (None = numero di CPU, 1 = tutto nel processo corrente);
+            sotto BOOTSTRAP_POOL_MIN_ELEMENTS ricampionamenti x punti si resta nel processo
+        t_grid: Tempi della banda della curva (default: 1 s - 2 h log-spaziati)
+        base_result: Risultato di calculate_omnipd_model già disponibile (evita un fit)
+
+    Returns:
+        Dict con chiavi:
+        - params: parametri del fit base
+        - samples: parametri dei ricampionamenti validi (n_validi, 4)
+        - CI: {nome parametro: (inferiore, superiore)}
+        - t_grid, band_lower, band_upper: banda di confidenza della curva
+        - n_valid, method, confidence
+
+    Raises:
+        ValueError: se metodo non valido, dati insufficienti o nessun ricampionamento valido
+    """
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(f"Metodo bootstrap non valido: {method} (ammessi: {', '.join(BOOTSTRAP_METHODS)})")
+    if not 0 < confidence < 1:
+        raise ValueError(f"Livello di confidenza non valido: {confidence}")
+    if n_resamples < 1:
+        raise ValueError(f"Numero di ricampionamenti non valido: {n_resamples}")
+
+    t_data = np.asarray(t_data, dtype=float)
+    p_data = np.asarray(p_data, dtype=float)
+    base = base_result or calculate_omnipd_model(t_data, p_data)
+    base_params = np.clip(np.asarray(base['params'], dtype=float), *initial_guess_and_bounds(p_data)[1])
+    p_pred = ompd_power(t_data, *base['params'])
+    residuals = p_data - p_pred
+
+    chunks = [min(BOOTSTRAP_CHUNK_SIZE, n_resamples - i) for i in range(0, n_resamples, BOOTSTRAP_CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(t_data, p_data, p_pred, residuals, base_params, method, size, s) for size, s in zip(chunks, seeds)]
+    workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+    if n_resamples * len(t_data) < BOOTSTRAP_POOL_MIN_ELEMENTS:
+        workers = 1
+    if workers <= 1:
+        results = [_resample_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_resample_chunk, *zip(*args)))
+
+    samples = np.vstack(results)
+    samples = samples[np.isfinite(samples).all(axis=1)]
+    if len(samples) == 0:
+        raise ValueError("Bootstrap fallito: nessun ricampionamento valido")
+    if len(samples) < n_resamples:
+        logger.warning(f"Bootstrap: {n_resamples - len(samples)} ricampionamenti scartati")
+
+    alpha = (1 - confidence) / 2 * 100
+    low, high = np.percentile(samples, [alpha, 100 - alpha], axis=0)
+
+    if t_grid is None:
+        t_grid = np.logspace(0, np.log10(7200), 200)
+    t_grid = np.asarray(t_grid, dtype=float)
+    curves = ompd_power(t_grid[None, :], *(samples.T[:, :, None]))
+    band_lower, band_upper = np.percentile(curves, [alpha, 100 - alpha], axis=0)
+
+    logger.info(f"Bootstrap {method}: {len(samples)}/{n_resamples} ricampionamenti, CI {confidence:.0%} "
+                f"CP [{low[0]:.0f}, {high[0]:.0f}] W, W' [{low[1]:.0f}, {high[1]:.0f}] J")
+    return {
+        'params': np.asarray(base['params'], dtype=float),
+        'samples': samples,
+        'CI': {name: (float(lo), float(hi)) for name, lo, hi in zip(PARAM_NAMES, low, high)},
+        't_grid': t_grid,
+        'band_lower': band_lower,
+        'band_upper': band_upper,
+        'n_valid': len(samples),
+        'method': method,
+        'confidence': confidence,
+    }
@@ -9,21 +9,33 @@
 OmniPD Core - Modello matematico e funzioni di utilità
 """
 import os
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Any, Optional, Iterable
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from scipy.optimize import curve_fit
+from scipy.optimize import curve_fit, least_squares
 from numpy.typing import NDArray
 
+from shared.table_loader import read_two_columns
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
 # Costante globale
 TCPMAX = 1800  # secondi
 
+# Loss robuste di scipy.optimize.least_squares ammesse dal fit robusto
+ROBUST_LOSSES = ('soft_l1', 'huber', 'cauchy', 'arctan')
+# Scala minima dei residui (W) per la loss robusta: evita di trattare come outlier
+# ogni scostamento su dataset quasi perfetti
+ROBUST_MIN_SCALE = 2.0
+# Punti con peso sotto questa soglia sono segnalati come outlier
+ROBUST_OUTLIER_WEIGHT = 0.3
+
 
 def ompd_power(t: NDArray[np.float64] | float, CP: float, W_prime: float, Pmax: float, A: float) -> NDArray[np.float64] | float:
     """
@@ -51,6 +63,31 @@ def ompd_power_short(t: NDArray[np.float64] | float, CP: float, W_prime: float,
     return (W_prime / t) * (1 - np.exp(-t * (Pmax - CP) / W_prime)) + CP
 
 
+def ompd_jacobian(t: NDArray[np.float64] | float, CP: float, W_prime: float, Pmax: float, A: float) -> NDArray[np.float64]:
+    """
+    Jacobiana analitica di ompd_power rispetto a (CP, W_prime, Pmax, A).
+    
+    Con E = exp(-t (Pmax - CP) / W'):
+    dP/dCP = 1 - E, dP/dW' = (1 - E) / t - E (Pmax - CP) / W', dP/dPmax = E,
+    dP/dA = 0 per t <= TCPMAX e -ln(t / TCPMAX) oltre.
+    
+    Args:
+        t: Tempo in secondi (scalare o array)
+        CP, W_prime, Pmax, A: Parametri del modello
+    
+    Returns:
+        Matrice (len(t), 4)
+    """
+    t = np.atleast_1d(np.array(t, dtype=float))
+    E = np.exp(-t * (Pmax - CP) / W_prime)
+    jac = np.empty((len(t), 4))
+    jac[:, 0] = 1 - E
+    jac[:, 1] = (1 - E) / t - E * (Pmax - CP) / W_prime
+    jac[:, 2] = E
+    jac[:, 3] = np.where(t <= TCPMAX, 0.0, -np.log(t / TCPMAX))
+    return jac
+
+
 def w_eff(t: NDArray[np.float64] | float, W_prime: float, CP: float, Pmax: float) -> NDArray[np.float64] | float:
     """W' efficace utilizzato nel tempo."""
     return W_prime * (1 - np.exp(-t * (Pmax - CP) / W_prime))
@@ -75,13 +112,57 @@ def _format_time_label(seconds: float) -> str:
     return f"{minutes}m" if secs == 0 else f"{minutes}m{secs}s"
 
 
-def calculate_omnipd_model(t_data: NDArray[np.float64], p_data: NDArray[np.float64]) -> Dict[str, Any]:
+def fit_bounds(p_max: NDArray[np.float64]) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Bounds fisici [CP, W', Pmax, A] in funzione della potenza massima dei dati.
+    
+    Vettorizzata: con un array di n potenze massime restituisce n righe di
+    bounds (usata dal bootstrap per i dataset ricampionati).
+    
+    Args:
+        p_max: Potenza massima (Watt), scalare o array (n,)
+    
+    Returns:
+        Tuple (lower, upper), ciascuno di forma (..., 4)
+    """
+    p_max = np.asarray(p_max, dtype=float)
+    zeros = np.zeros_like(p_max)
+    lower = np.stack([zeros, zeros, p_max, zeros], axis=-1)
+    upper = np.stack([p_max * 0.95, p_max * 1000, p_max * 1.5, np.full_like(p_max, 10.0)], axis=-1)
+    return lower, upper
+
+
+def initial_guess_and_bounds(p_data: NDArray[np.float64]) -> Tuple[List[float], Tuple[List[float], List[float]]]:
+    """
+    Guess iniziale e bounds fisici del fit, condivisi da fit singolo e batch.
+    
+    Args:
+        p_data: Array di potenze (Watt)
+    
+    Returns:
+        Tuple (initial_guess [CP, W', Pmax, A], (lower, upper))
+    """
+    p_max = float(np.max(p_data))
+    # Guess iniziale con bounds realistici
+    initial_guess = [float(np.percentile(p_data, 30)), 20000.0, p_max, 5.0]
+    lower, upper = fit_bounds(p_max)
+    return initial_guess, (lower.tolist(), upper.tolist())
+
+
+def calculate_omnipd_model(t_data: NDArray[np.float64], p_data: NDArray[np.float64],
+                           analytic_jacobian: bool = True, log_params: bool = False,
+                           initial_params: Optional[Iterable[float]] = None) -> Dict[str, Any]:
     """
     Calcola i parametri del modello OmniPD con gli errori.
     
     Args:
         t_data: Array di tempi (secondi)
         p_data: Array di potenze (Watt)
+        analytic_jacobian: Usa ompd_jacobian invece delle differenze finite
+        log_params: Ottimizza sui logaritmi dei parametri (scale di CP, W' e A
+            molto diverse; utile su dataset mal condizionati)
+        initial_params: Punto di partenza [CP, W', Pmax, A] al posto del guess
+            (warm start da un fit precedente; riportato dentro i bounds)
     
     Returns:
         Dict con chiavi:
@@ -91,6 +172,9 @@ def calculate_omnipd_model(t_data: NDArray[np.float64], p_data: NDArray[np.float
         - residuals: residui
         - RMSE: errore quadratico medio
         - MAE: errore medio assoluto
+        - nfev: valutazioni del modello (incluse quelle delle differenze finite)
+        - njev: valutazioni della Jacobiana analitica
+        - covariance: matrice di covarianza 4x4 stimata da curve_fit
     
     Raises:
         ValueError: se dati insufficienti o fitting fallisce
@@ -104,38 +188,59 @@ def calculate_omnipd_model(t_data: NDArray[np.float64], p_data: NDArray[np.float
         logger.error("Dati insufficienti: servono almeno 4 punti")
         raise ValueError("Dati insufficienti: servono almeno 4 punti")
     
-    # Guess iniziale con bounds realistici
-    CP_guess = np.percentile(p_data, 30)
-    W_prime_guess = 20000
-    Pmax_guess = p_data.max()
-    A_guess = 5
-    
-    initial_guess = [CP_guess, W_prime_guess, Pmax_guess, A_guess]
-    
-    # Bounds fisici realistici
-    pmax_max = p_data.max() * 1.5
-    w_prime_max = p_data.max() * 1000
-    bounds = (
-        [0, 0, p_data.max(), 0],
-        [p_data.max() * 0.95, w_prime_max, pmax_max, 10]
-    )
+    initial_guess, bounds = initial_guess_and_bounds(p_data)
+    if initial_params is not None:
+        initial_guess = list(np.clip(np.asarray(list(initial_params), dtype=float), *bounds))
+    CP_guess, W_prime_guess, Pmax_guess, A_guess = initial_guess
     
     logger.debug(f"Initial guess: CP={CP_guess:.0f}, W'={W_prime_guess:.0f}, Pmax={Pmax_guess:.0f}, A={A_guess:.2f}")
     
+    model, jac = ompd_power, (ompd_jacobian if analytic_jacobian else '2-point')
+    if log_params:
+        # Parametri theta = ln(p): dP/dtheta = p * dP/dp
+        def model(t, *theta):
+            return ompd_power(t, *np.exp(theta))
+
+        if analytic_jacobian:
+            def jac(t, *theta):
+                params = np.exp(theta)
+                return ompd_jacobian(t, *params) * params
+
+        with np.errstate(divide='ignore'):
+            # Un warm start su un bound nullo (es. A = 0) non ha logaritmo finito
+            initial_guess = list(np.log(np.maximum(initial_guess, 1e-6)))
+            bounds = (list(np.log(bounds[0])), list(np.log(bounds[1])))
+
+    # Conteggio valutazioni reali (curve_fit non conta quelle delle differenze finite)
+    calls = {'model': 0, 'jac': 0}
+
+    def counted_model(t, *params):
+        calls['model'] += 1
+        return model(t, *params)
+
+    def counted_jac(t, *params):
+        calls['jac'] += 1
+        return jac(t, *params)
+    
     # Fitting del modello COMPLETO - ottimizzato per performance
     try:
-        popt, _ = curve_fit(
-            ompd_power, 
+        popt, pcov = curve_fit(
+            counted_model, 
             t_data, 
             p_data, 
             p0=initial_guess, 
+            jac=counted_jac if callable(jac) else jac,
             maxfev=5000,  # Ridotto da 20000 per migliore performance (equilibrio accuracy/speed)
             bounds=bounds,
             ftol=1e-5,  # Tolleranza funzione
             xtol=1e-5,  # Tolleranza parametri
             gtol=1e-5   # Tolleranza gradiente
         )
-        logger.debug(f"Curve_fit converged with params: {popt}")
+        if log_params:
+            popt = np.exp(popt)
+            # Covarianza riportata ai parametri fisici: cov_p = diag(p) cov_theta diag(p)
+            pcov = pcov * np.outer(popt, popt)
+        logger.debug(f"Curve_fit converged with params: {popt} ({calls['model']} valutazioni modello)")
     except Exception as e:
         logger.error(f"Fitting fallito: {str(e)}", exc_info=True)
         raise ValueError(f"Fitting fallito: {str(e)}")
@@ -159,10 +264,372 @@ def calculate_omnipd_model(t_data: NDArray[np.float64], p_data: NDArray[np.float
         'P_pred': P_pred,
         'residuals': residuals,
         'RMSE': RMSE,
-        'MAE': MAE
+        'MAE': MAE,
+        'nfev': calls['model'],
+        'njev': calls['jac'],
+        'covariance': pcov
+    }
+
+
+def robust_loss_weights(residuals: NDArray[np.float64], loss: str, f_scale: float) -> NDArray[np.float64]:
+    """
+    Pesi per punto equivalenti alla loss robusta (pesi IRLS rho'(z), z = (r/f_scale)^2).
+    
+    Args:
+        residuals: Residui del fit
+        loss: Una di ROBUST_LOSSES
+        f_scale: Scala dei residui della loss
+    
+    Returns:
+        Pesi in (0, 1]: 1 = punto pienamente considerato, -> 0 = outlier
+    """
+    z = (np.asarray(residuals, dtype=float) / f_scale) ** 2
+    if loss == 'soft_l1':
+        return 1 / np.sqrt(1 + z)
+    if loss == 'huber':
+        return np.where(z <= 1, 1.0, 1 / np.sqrt(np.maximum(z, 1)))
+    if loss == 'cauchy':
+        return 1 / (1 + z)
+    if loss == 'arctan':
+        return 1 / (1 + z ** 2)
+    raise ValueError(f"Loss non valida: {loss} (ammesse: {', '.join(ROBUST_LOSSES)})")
+
+
+def calculate_omnipd_model_robust(t_data: NDArray[np.float64], p_data: NDArray[np.float64],
+                                  loss: str = 'soft_l1', f_scale: Optional[float] = None,
+                                  initial_params: Optional[Iterable[float]] = None) -> Dict[str, Any]:
+    """
+    Fit OmniPD resistente ai punti sub-massimali (loss robusta, Jacobiana analitica).
+    
+    Parte dal fit ai minimi quadrati (o da initial_params) e rifitta con
+    least_squares e la loss richiesta: i punti lontani dalla curva pesano
+    meno, così i valori MMP non massimali non trascinano in basso CP. La
+    scala dei residui, se non data, è la MAD normalizzata dei residui
+    (almeno ROBUST_MIN_SCALE W), ristimata una volta dopo il primo fit robusto.
+    
+    Args:
+        t_data: Array di tempi (secondi)
+        p_data: Array di potenze (Watt)
+        loss: Una di ROBUST_LOSSES
+        f_scale: Scala dei residui in W (None = stima robusta)
+        initial_params: Punto di partenza [CP, W', Pmax, A] al posto del fit iniziale
+    
+    Returns:
+        Dict con le chiavi di calculate_omnipd_model (senza covariance) più:
+        - weights: peso di ciascun punto nel fit finale
+        - outliers: maschera dei punti con peso < ROBUST_OUTLIER_WEIGHT
+        - loss, f_scale: loss e scala usate
+    
+    Raises:
+        ValueError: se loss non valida, dati insufficienti o fitting fallisce
+    """
+    if loss not in ROBUST_LOSSES:
+        raise ValueError(f"Loss non valida: {loss} (ammesse: {', '.join(ROBUST_LOSSES)})")
+    
+    t_data = np.array(t_data, dtype=float)
+    p_data = np.array(p_data, dtype=float)
+    if len(t_data) < 4:
+        logger.error("Dati insufficienti: servono almeno 4 punti")
+        raise ValueError("Dati insufficienti: servono almeno 4 punti")
+    
+    _, bounds = initial_guess_and_bounds(p_data)
+    if initial_params is None:
+        start = calculate_omnipd_model(t_data, p_data)
+        x0, residuals = start['params'], start['residuals']
+    else:
+        x0 = np.asarray(list(initial_params), dtype=float)
+        residuals = p_data - ompd_power(t_data, *x0)
+    x0 = np.clip(x0, *bounds)
+    
+    # Senza scala fissata: stima dai residui del fit iniziale, poi una seconda
+    # passata con la scala ristimata dai residui robusti (meno gonfiata dagli outlier)
+    passes = [f_scale] if f_scale is not None else [None, None]
+    nfev = njev = 0
+    for scale in passes:
+        if scale is None:
+            mad = np.median(np.abs(residuals - np.median(residuals)))
+            scale = max(1.4826 * mad, ROBUST_MIN_SCALE)
+        try:
+            solution = least_squares(
+                lambda x: ompd_power(t_data, *x) - p_data,
+                x0,
+                jac=lambda x: ompd_jacobian(t_data, *x),
+                bounds=bounds,
+                loss=loss,
+                f_scale=scale,
+                x_scale='jac',
+                ftol=1e-8,
+                xtol=1e-8,
+                gtol=1e-8,
+                max_nfev=2000
+            )
+        except Exception as e:
+            logger.error(f"Fitting robusto fallito: {str(e)}", exc_info=True)
+            raise ValueError(f"Fitting robusto fallito: {str(e)}")
+        x0 = solution.x
+        residuals = -solution.fun
+        nfev += solution.nfev
+        njev += solution.njev
+    f_scale = scale
+    
+    popt = solution.x
+    CP, W_prime, Pmax, A = popt
+    P_pred = ompd_power(t_data, CP, W_prime, Pmax, A)
+    residuals = p_data - P_pred
+    weights = robust_loss_weights(residuals, loss, f_scale)
+    RMSE = np.sqrt(np.mean(residuals**2))
+    MAE = np.mean(np.abs(residuals))
+    outliers = weights < ROBUST_OUTLIER_WEIGHT
+    
+    logger.info(f"Fitting robusto ({loss}, scala {f_scale:.1f}W): CP={CP:.0f}W, W'={W_prime:.0f}J, "
+                f"Pmax={Pmax:.0f}W, A={A:.2f}, {int(outliers.sum())}/{len(t_data)} outlier")
+    
+    return {
+        'params': popt,
+        'CP': CP,
+        'W_prime': W_prime,
+        'Pmax': Pmax,
+        'A': A,
+        'P_pred': P_pred,
+        'residuals': residuals,
+        'RMSE': RMSE,
+        'MAE': MAE,
+        'nfev': nfev,
+        'njev': njev,
+        'weights': weights,
+        'outliers': outliers,
+        'loss': loss,
+        'f_scale': f_scale
     }
 
 
+def data_hash(t_data: NDArray[np.float64], p_data: NDArray[np.float64]) -> str:
+    """
+    Hash dei punti (t, P) indipendente dall'ordine delle righe.
+    
+    Args:
+        t_data: Array di tempi (secondi)
+        p_data: Array di potenze (Watt)
+    
+    Returns:
+        Digest esadecimale SHA-1
+    """
+    points = np.column_stack([np.asarray(t_data, dtype=float), np.asarray(p_data, dtype=float)])
+    points = points[np.lexsort((points[:, 1], points[:, 0]))]
+    return hashlib.sha1(np.ascontiguousarray(points).tobytes()).hexdigest()
+
+
+class OmniPDFitCache:
+    """
+    Cache dei risultati di calculate_omnipd_model con warm start.
+    
+    Un dataset già visto (stesso hash di data_hash) restituisce il risultato
+    memorizzato senza rifare il fit. Se invece differisce dall'ultimo fit per
+    al massimo max_changed punti, il fit parte dall'ottimo precedente e
+    converge in poche iterazioni; altrimenti riparte dal guess standard.
+    """
+    
+    def __init__(self, max_entries: int = 32, max_changed: int = 3):
+        """
+        Args:
+            max_entries: Risultati tenuti in cache (i meno recenti vengono scartati)
+            max_changed: Punti aggiunti/modificati/rimossi oltre cui non si fa warm start
+        """
+        self.max_entries = max_entries
+        self.max_changed = max_changed
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._last_points: Optional[set] = None
+        self._last_params: Optional[NDArray[np.float64]] = None
+        self.hits = 0
+        self.warm_starts = 0
+        self.cold_starts = 0
+    
+    def clear(self) -> None:
+        """Svuota cache e punto di warm start"""
+        self._results.clear()
+        self._last_points = None
+        self._last_params = None
+    
+    def fit(self, t_data: NDArray[np.float64], p_data: NDArray[np.float64]) -> Dict[str, Any]:
+        """
+        Risultato di calculate_omnipd_model per (t, P), dalla cache o da un nuovo fit.
+        
+        Returns:
+            Copia del dict risultato (modificarla non altera la cache)
+        
+        Raises:
+            ValueError: se dati insufficienti o fitting fallisce
+        """
+        t_data = np.asarray(t_data, dtype=float)
+        p_data = np.asarray(p_data, dtype=float)
+        key = data_hash(t_data, p_data)
+        points = set(zip(t_data.tolist(), p_data.tolist()))
+        
+        if key in self._results:
+            self.hits += 1
+            self._results.move_to_end(key)
+            result = self._results[key]
+            logger.debug(f"Fit OmniPD da cache ({key[:8]})")
+        else:
+            initial_params = None
+            # Un punto modificato compare due volte nella differenza simmetrica (vecchio e nuovo)
+            if self._last_points is not None and len(points ^ self._last_points) <= 2 * self.max_changed:
+                initial_params = self._last_params
+            result = calculate_omnipd_model(t_data, p_data, initial_params=initial_params)
+            if initial_params is None:
+                self.cold_starts += 1
+            else:
+                self.warm_starts += 1
+                logger.debug(f"Fit OmniPD con warm start: {result['nfev']} valutazioni")
+            self._results[key] = result
+            if len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        
+        self._last_points = points
+        self._last_params = np.asarray(result['params'], dtype=float)
+        return dict(result)
+
+
+# ============================================================================
+# INVERSE MODEL - Durata sostenibile per una potenza e tabelle di lookup
+# ============================================================================
+
+# Durata massima considerata dal solver inverso [s] (oltre: potenza non raggiungibile)
+INVERSE_T_MAX = 1e7
+
+
+def _ompd_power_and_slope(t: NDArray[np.float64], CP: float, W_prime: float, Pmax: float,
+                          A: float) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Potenza del modello e derivata dP/d(ln t) sugli stessi tempi"""
+    E = np.exp(-t * (Pmax - CP) / W_prime)
+    power = (W_prime / t) * (1 - E) + CP
+    # d/dt [(W'/t)(1 - E)] = -(W'/t^2)(1 - E) + E (Pmax - CP) / t, moltiplicata per t
+    slope = -(W_prime / t) * (1 - E) + E * (Pmax - CP)
+    long_branch = t > TCPMAX
+    power = np.where(long_branch, power - A * np.log(t / TCPMAX), power)
+    slope = np.where(long_branch, slope - A, slope)
+    return power, slope
+
+
+def time_to_exhaustion(power: NDArray[np.float64] | float, CP: float, W_prime: float, Pmax: float, A: float,
+                       tol: float = 1e-10, max_iter: int = 60) -> NDArray[np.float64]:
+    """
+    Durata t per cui ompd_power(t) = power (inverso del modello, vettorizzato).
+    
+    La curva è monotona decrescente: ogni potenza ha un solo tempo. Il ramo
+    si sceglie confrontando con P(TCPMAX), poi si itera Newton in ln t dentro
+    un intervallo [lo, hi] che si restringe a ogni passo; un passo Newton che
+    esce dall'intervallo è sostituito dalla bisezione, così la convergenza è
+    garantita anche dove la curva è quasi piatta.
+    
+    Args:
+        power: Potenze target in Watt (scalare o array)
+        CP, W_prime, Pmax, A: Parametri del modello
+        tol: Tolleranza relativa sul tempo
+        max_iter: Iterazioni massime
+    
+    Returns:
+        Array di durate in secondi: 0 per power >= Pmax, inf se la potenza
+        non si raggiunge entro INVERSE_T_MAX (es. power <= CP con A = 0),
+        NaN per target NaN (come PowerDurationTable.duration)
+    """
+    target = np.atleast_1d(np.asarray(power, dtype=float))
+    result = np.full(target.shape, np.inf)
+    result[target >= Pmax] = 0.0
+    result[np.isnan(target)] = np.nan
+    todo = np.isfinite(target) & (target < Pmax)
+    if not todo.any():
+        return result
+    
+    p_tcp = float(ompd_power(TCPMAX, CP, W_prime, Pmax, A))
+    p_end = float(ompd_power(INVERSE_T_MAX, CP, W_prime, Pmax, A))
+    todo &= target > p_end
+    p = target[todo]
+    
+    # Intervalli iniziali in ln t per ramo
+    short = p >= p_tcp
+    lo = np.where(short, np.log(1e-6), np.log(TCPMAX))
+    hi = np.where(short, np.log(TCPMAX), np.log(INVERSE_T_MAX))
+    # Punto di partenza: inverso della sola parte W'/t + CP, dentro l'intervallo
+    u = np.clip(np.log(W_prime / np.maximum(p - CP, 1e-9)), lo, hi)
+    
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(max_iter):
+            f, slope = _ompd_power_and_slope(np.exp(u), CP, W_prime, Pmax, A)
+            f = f - p
+            # P decrescente: f > 0 vuol dire tempo troppo corto
+            lo = np.where(f > 0, u, lo)
+            hi = np.where(f > 0, hi, u)
+            u_newton = u - f / slope
+            inside = np.isfinite(u_newton) & (u_newton > lo) & (u_newton < hi)
+            u_next = np.where(inside, u_newton, 0.5 * (lo + hi))
+            done = np.abs(u_next - u) <= tol
+            u = u_next
+            if done.all():
+                break
+    
+    result[todo] = np.exp(u)
+    return result
+
+
+class PowerDurationTable:
+    """
+    Tabelle precalcolate potenza-durata e durata-potenza di un fit OmniPD.
+    
+    La curva è campionata su una griglia log densa; le query interpolano
+    linearmente in ln t con np.interp (ricerca binaria in C), quindi un
+    intero stream di un'uscita si valuta in pochi microsecondi per punto.
+    Fuori dalla griglia si ricade sul modello esatto.
+    """
+    
+    def __init__(self, CP: float, W_prime: float, Pmax: float, A: float,
+                 t_min: float = 1.0, t_max: float = 86400.0, n_points: int = 4096):
+        """
+        Args:
+            CP, W_prime, Pmax, A: Parametri del modello
+            t_min, t_max: Intervallo della griglia [s]
+            n_points: Punti della griglia
+        """
+        if not 0 < t_min < t_max:
+            raise ValueError(f"Intervallo non valido: {t_min} - {t_max}")
+        self.params = (CP, W_prime, Pmax, A)
+        self.log_t = np.linspace(np.log(t_min), np.log(t_max), n_points)
+        self.t = np.exp(self.log_t)
+        self.p = np.asarray(ompd_power(self.t, *self.params), dtype=float)
+        # Stesse tabelle in ordine di potenza crescente per l'interpolazione inversa
+        self._p_ascending = self.p[::-1]
+        self._log_t_descending = self.log_t[::-1]
+    
+    @classmethod
+    def from_result(cls, result: Dict[str, Any], **kwargs) -> 'PowerDurationTable':
+        """Tabella dai parametri di un risultato di calculate_omnipd_model"""
+        return cls(*np.asarray(result['params'], dtype=float), **kwargs)
+    
+    def power(self, t: NDArray[np.float64] | float) -> NDArray[np.float64]:
+        """Potenza sostenibile per le durate t [s]"""
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        with np.errstate(divide='ignore'):
+            out = np.interp(np.log(t), self.log_t, self.p)
+        outside = (t < self.t[0]) | (t > self.t[-1])
+        if outside.any():
+            out[outside] = ompd_power(t[outside], *self.params)
+        return out
+    
+    def duration(self, power: NDArray[np.float64] | float) -> NDArray[np.float64]:
+        """Durata sostenibile [s] per le potenze date (stesse convenzioni di time_to_exhaustion)"""
+        power = np.atleast_1d(np.asarray(power, dtype=float))
+        out = np.exp(np.interp(power, self._p_ascending, self._log_t_descending))
+        outside = (power > self.p[0]) | (power < self.p[-1])
+        if outside.any():
+            out[outside] = time_to_exhaustion(power[outside], *self.params)
+        return out
+    
+    def is_feasible(self, durations: NDArray[np.float64] | float,
+                    powers: NDArray[np.float64] | float) -> NDArray[np.bool_]:
+        """True dove la potenza media richiesta per la durata è sotto la curva"""
+        return np.asarray(powers, dtype=float) <= self.power(durations)
+
+
 # ============================================================================
 # DATA HANDLING - Funzioni per I/O file e gestione dati
 # ============================================================================
@@ -244,26 +711,14 @@ def load_data_from_file(file_path: str | Path, time_col_idx: int = 0, power_col_
     ext = os.path.splitext(file_path)[1].lower()
     
     try:
-        if ext == ".xlsm":
-            try:
-                df = pd.read_excel(file_path, sheet_name="Summary Sheet", 
-                                 usecols="A:B", header=None)
-            except ValueError:
-                df = pd.read_excel(file_path, sheet_name=0, 
-                                 usecols="A:B", header=None)
-        elif ext == ".xlsx":
-            df = pd.read_excel(file_path, usecols="A:B", header=None)
-        elif ext == ".csv":
-            df = pd.read_csv(file_path, sep=None, engine="python")
-        else:
+        if ext not in (".xlsm", ".xlsx", ".csv"):
             logger.error(f"Formato file non supportato: {ext}")
             raise ValueError(f"Formato file non supportato: {ext}")
         
-        # Estrai le colonne selezionate
-        df_selected = df.iloc[:, [time_col_idx, power_col_idx]]
+        # Solo le due colonne selezionate (workbook in streaming, CSV con parser C)
+        df_selected = read_two_columns(file_path, time_col_idx, power_col_idx)
         
         # Pulizia e conversione dati
-        df_selected.columns = ["t", "P"]
         df_selected["t"] = pd.to_numeric(df_selected["t"], errors="coerce")
         df_selected["P"] = pd.to_numeric(df_selected["P"], errors="coerce")
         df_selected = df_selected.dropna()
@@ -10,8 +10,7 @@ OmniPD Events - Handler per interazioni con i grafici (hover, click, ecc.)
 """
 
 import logging
-import numpy as np
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from .gui_omniPD import OmniPDAnalyzer
@@ -20,10 +19,29 @@ try:
     from .core_omniPD import ompd_power, _format_time_label
 except ImportError:
     from omniPD_calculator.core_omniPD import ompd_power, _format_time_label
+from shared.hover import BlitHover
 
 logger = logging.getLogger(__name__)
 
 
+# Stili delle annotazioni di hover
+CURVE_ANNOTATION = dict(
+    xytext=(5, 5),
+    bbox=dict(boxstyle='round,pad=0.5', facecolor='#7c3aed', alpha=0.8, edgecolor='white', linewidth=1),
+    fontsize=8, color='white', weight='bold'
+)
+POINT_ANNOTATION = dict(
+    xytext=(5, -20),
+    bbox=dict(boxstyle='round,pad=0.5', facecolor='#4ade80', alpha=0.8, edgecolor='white', linewidth=1),
+    fontsize=8, color='black', weight='bold'
+)
+RESIDUAL_ANNOTATION = dict(
+    xytext=(5, 10),
+    bbox=dict(boxstyle='round,pad=0.5', facecolor='red', alpha=0.8, edgecolor='white', linewidth=1),
+    fontsize=8, color='white', weight='bold'
+)
+
+
 class OmniPDEventHandler:
     """Gestore degli eventi di interazione per i grafici OmniPD"""
     
@@ -35,119 +53,49 @@ class OmniPDEventHandler:
             analyzer: istanza di OmniPDAnalyzer
         """
         self.analyzer = analyzer
+        self.ompd_hover: Optional[BlitHover] = None
+        self.residuals_hover: Optional[BlitHover] = None
     
     def connect_ompd_hover(self) -> None:
-        """Connette gli eventi di hover per il grafico OmPD"""
-        if self.analyzer.cid_ompd is not None:
-            self.analyzer.canvas1.mpl_disconnect(self.analyzer.cid_ompd)
-        
-        self.analyzer.cid_ompd = self.analyzer.canvas1.mpl_connect(
-            'motion_notify_event', self._on_ompd_hover
-        )
-    
-    def _on_ompd_hover(self, event) -> None:
-        """Gestisce il movimento del mouse sul grafico OmPD"""
-        if event.inaxes != self.analyzer.ax1 or self.analyzer.params is None:
-            if self.analyzer.hover_ann_points is not None:
-                self.analyzer.hover_ann_points.remove()
-                self.analyzer.hover_ann_points = None
-            if self.analyzer.ann_curve is not None:
-                self.analyzer.ann_curve.remove()
-                self.analyzer.ann_curve = None
-            self.analyzer.canvas1.draw_idle()
-            return
+        """
+        Collega l'hover del grafico OmPD per il fit corrente.
         
-        x_mouse = event.xdata
-        if x_mouse is None:
+        La curva è precalcolata una volta qui (non a ogni movimento del mouse);
+        chiamare dopo ogni ridisegno del grafico.
+        """
+        a = self.analyzer
+        if self.ompd_hover is not None:
+            self.ompd_hover.disconnect()
+            self.ompd_hover = None
+        if a.params is None or a.x_data is None:
             return
         
-        CP, W_prime, Pmax, A = self.analyzer.params
-        
-        if self.analyzer.ann_curve is not None:
-            self.analyzer.ann_curve.remove()
-            self.analyzer.ann_curve = None
-        
-        try:
-            y_curve = ompd_power(x_mouse, CP, W_prime, Pmax, A)
-            self.analyzer.ann_curve = self.analyzer.ax1.annotate(
-                f"{_format_time_label(x_mouse)}\n{int(y_curve)}W",
-                xy=(x_mouse, y_curve),
-                xytext=(5, 5),
-                textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='#7c3aed', alpha=0.8, edgecolor='white', linewidth=1),
-                fontsize=8,
-                color='white',
-                weight='bold'
-            )
-        except (ValueError, TypeError, RuntimeError) as e:
-            logger.warning(f"Hover annotation failed: {e}")
-        
-        if self.analyzer.hover_ann_points is not None:
-            self.analyzer.hover_ann_points.remove()
-            self.analyzer.hover_ann_points = None
-        
-        distances = np.abs(self.analyzer.x_data - x_mouse)
-        closest_idx = np.argmin(distances)
-        closest_dist = distances[closest_idx]
-        
-        if closest_dist < max(self.analyzer.x_data) * 0.05:
-            x_point = self.analyzer.x_data[closest_idx]
-            y_point = self.analyzer.y_data[closest_idx]
-            self.analyzer.hover_ann_points = self.analyzer.ax1.annotate(
-                f"MMP: {_format_time_label(x_point)} @ {int(y_point)}W",
-                xy=(x_point, y_point),
-                xytext=(5, -20),
-                textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='#4ade80', alpha=0.8, edgecolor='white', linewidth=1),
-                fontsize=8,
-                color='black',
-                weight='bold'
-            )
-        
-        self.analyzer.canvas1.draw_idle()
-    
-    def connect_residuals_hover(self) -> None:
-        """Connette gli eventi di hover per il grafico residui"""
-        if self.analyzer.cid_residuals is not None:
-            self.analyzer.canvas2.mpl_disconnect(self.analyzer.cid_residuals)
-        
-        self.analyzer.cid_residuals = self.analyzer.canvas2.mpl_connect(
-            'motion_notify_event', self._on_residuals_hover
+        CP, W_prime, Pmax, A = a.params
+        self.ompd_hover = BlitHover(
+            a.canvas1, a.ax1, a.x_data, a.y_data,
+            point_label=lambda x, y: f"MMP: {_format_time_label(x)} @ {int(y)}W",
+            point_style=POINT_ANNOTATION,
+            curve=lambda t: ompd_power(t, CP, W_prime, Pmax, A),
+            curve_label=lambda x, y: f"{_format_time_label(x)}\n{int(y)}W",
+            curve_style=CURVE_ANNOTATION,
         )
+        a.cid_ompd = self.ompd_hover.motion_cid
+        a.ann_curve = self.ompd_hover.curve_ann
+        a.hover_ann_points = self.ompd_hover.point_ann
     
-    def _on_residuals_hover(self, event) -> None:
-        """Gestisce il movimento del mouse sul grafico residui"""
-        if event.inaxes != self.analyzer.ax2:
-            if self.analyzer.hover_ann_residuals is not None:
-                self.analyzer.hover_ann_residuals.remove()
-                self.analyzer.hover_ann_residuals = None
-            self.analyzer.canvas2.draw_idle()
-            return
-        
-        x_mouse = event.xdata
-        if x_mouse is None:
+    def connect_residuals_hover(self) -> None:
+        """Collega l'hover del grafico residui (solo punti, stessa ricerca con searchsorted)"""
+        a = self.analyzer
+        if self.residuals_hover is not None:
+            self.residuals_hover.disconnect()
+            self.residuals_hover = None
+        if a.residuals is None or a.x_data is None:
             return
         
-        if self.analyzer.hover_ann_residuals is not None:
-            self.analyzer.hover_ann_residuals.remove()
-            self.analyzer.hover_ann_residuals = None
-        
-        distances = np.abs(self.analyzer.x_data - x_mouse)
-        closest_idx = np.argmin(distances)
-        closest_dist = distances[closest_idx]
-        
-        if closest_dist < max(self.analyzer.x_data) * 0.05:
-            x_point = self.analyzer.x_data[closest_idx]
-            y_residual = self.analyzer.residuals[closest_idx]
-            self.analyzer.hover_ann_residuals = self.analyzer.ax2.annotate(
-                f"{_format_time_label(x_point)}\nResidual: {int(y_residual)}W",
-                xy=(x_point, y_residual),
-                xytext=(5, 10),
-                textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='red', alpha=0.8, edgecolor='white', linewidth=1),
-                fontsize=8,
-                color='white',
-                weight='bold'
-            )
-        
-        self.analyzer.canvas2.draw_idle()
+        self.residuals_hover = BlitHover(
+            a.canvas2, a.ax2, a.x_data, a.residuals,
+            point_label=lambda x, y: f"{_format_time_label(x)}\nResidual: {int(y)}W",
+            point_style=RESIDUAL_ANNOTATION,
+        )
+        a.cid_residuals = self.residuals_hover.motion_cid
+        a.hover_ann_residuals = self.residuals_hover.point_ann
@@ -8,38 +8,49 @@
 """
 OmniPD GUI - Interfaccia grafica (pura presentazione)
 """
-import pandas as pd
+import numpy as np
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFrame, QScrollArea,
                              QMessageBox, QTabWidget, QFileDialog,
-                             QDialog, QComboBox, QGridLayout)
+                             QDialog, QComboBox, QGridLayout, QCheckBox)
 from PySide6.QtCore import Qt, QThread, Signal
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 
+from shared.table_loader import read_csv_columns
+
 # Import dei moduli separati
 try:
     from .core_omniPD import (
         calculate_omnipd_model, 
+        OmniPDFitCache,
+        data_hash,
         load_data_from_file,
         extract_data_from_rows,
         convert_time_minutes_to_seconds
     )
+    from .bootstrap_omniPD import bootstrap_omnipd
+    from .surface_omniPD import rmse_surface
     from .widgets_omniPD import CSVColumnDialog, MmpRow
-    from .plotting_omniPD import format_plot, plot_ompd_curve, plot_residuals, plot_weff
+    from .plotting_omniPD import format_plot, plot_ompd_curve, plot_residuals, plot_weff, plot_error_surface
     from .events_omniPD import OmniPDEventHandler
 except ImportError:
     # Fallback per esecuzione diretta
     from omniPD_calculator.core_omniPD import (
         calculate_omnipd_model, 
+        OmniPDFitCache,
+        data_hash,
         load_data_from_file,
         extract_data_from_rows,
         convert_time_minutes_to_seconds
     )
+    from omniPD_calculator.bootstrap_omniPD import bootstrap_omnipd
+    from omniPD_calculator.surface_omniPD import rmse_surface
     from omniPD_calculator.widgets_omniPD import CSVColumnDialog, MmpRow
-    from omniPD_calculator.plotting_omniPD import format_plot, plot_ompd_curve, plot_residuals, plot_weff
+    from omniPD_calculator.plotting_omniPD import (format_plot, plot_ompd_curve, plot_residuals, plot_weff,
+                                                   plot_error_surface)
     from omniPD_calculator.events_omniPD import OmniPDEventHandler
 
 try:
@@ -51,6 +62,28 @@ except ImportError:
         return "background-color: #061f17; color: white;"
 
 
+# Ricampionamenti per le bande di confidenza
+BOOTSTRAP_RESAMPLES = 1000
+
+
+def run_bootstrap(x_data, y_data, result):
+    """Bande bootstrap sull'intervallo del grafico OmPD (None se il ricampionamento fallisce)"""
+    t_max = max(max(x_data) * 1.2, 5400)
+    try:
+        return bootstrap_omnipd(x_data, y_data, BOOTSTRAP_RESAMPLES, base_result=result,
+                                t_grid=np.logspace(0, np.log10(t_max), 300))
+    except ValueError:
+        return None
+
+
+def run_error_surface(x_data, y_data, result):
+    """Superficie RMSE CP x W' attorno al fit (None se i dati non la consentono)"""
+    try:
+        return rmse_surface(x_data, y_data, result['params'])
+    except ValueError:
+        return None
+
+
 # Worker thread per calcoli lunghi
 class OmniPDCalculationWorker(QThread):
     """Thread worker per eseguire i calcoli OmniPD senza bloccare l'UI"""
@@ -58,14 +91,21 @@ class OmniPDCalculationWorker(QThread):
     error = Signal(str)
     result_ready = Signal(dict)
     
-    def __init__(self, x_data, y_data):
+    def __init__(self, x_data, y_data, bootstrap=False, fit_cache=None):
         super().__init__()
         self.x_data = x_data
         self.y_data = y_data
+        self.bootstrap = bootstrap
+        self.fit_cache = fit_cache
     
     def run(self):
         try:
-            result = calculate_omnipd_model(self.x_data, self.y_data)
+            if self.fit_cache is not None:
+                result = self.fit_cache.fit(self.x_data, self.y_data)
+            else:
+                result = calculate_omnipd_model(self.x_data, self.y_data)
+            if self.bootstrap:
+                result['bootstrap'] = run_bootstrap(self.x_data, self.y_data, result)
             self.result_ready.emit(result)
             self.finished.emit()
         except Exception as e:
@@ -90,6 +130,13 @@ class OmniPDAnalyzer(QWidget):
         self.residuals = None
         self.RMSE = None
         self.MAE = None
+        self.bootstrap = None
+        # Superficie d'errore: calcolata solo quando il suo tab è visibile, per dataset (data_hash)
+        self.surface = None
+        self.surface_key = None
+        
+        # Cache dei fit: dataset già visti e warm start dopo piccole modifiche
+        self.fit_cache = OmniPDFitCache()
         
         # Worker thread per calcoli
         self.calc_worker = None
@@ -163,6 +210,9 @@ class OmniPDAnalyzer(QWidget):
         self.btn_calc.clicked.connect(self.run_calculation)
         self.sidebar.addWidget(self.btn_calc)
 
+        self.chk_bootstrap = QCheckBox("Intervalli di confidenza (bootstrap)")
+        self.sidebar.addWidget(self.chk_bootstrap)
+
         self.btn_import = QPushButton("📁 IMPORT CSV")
         self.btn_import.clicked.connect(self.import_file)
         self.sidebar.addWidget(self.btn_import)
@@ -260,6 +310,8 @@ class OmniPDAnalyzer(QWidget):
         self._create_ompd_tab()
         self._create_residuals_tab()
         self._create_weff_tab()
+        self._create_surface_tab()
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
         right_layout.addWidget(self.tab_widget)
 
     def _create_ompd_tab(self) -> None:
@@ -322,6 +374,31 @@ class OmniPDAnalyzer(QWidget):
         
         self.tab_widget.addTab(tab3, "W'eff")
 
+    def _create_surface_tab(self) -> None:
+        """Crea tab superficie d'errore"""
+        tab4 = QWidget()
+        layout4 = QVBoxLayout(tab4)
+        
+        colors = TEMI.get(self.current_theme, TEMI["Forest Green"])
+        bg_color = colors.get("bg", "#061f17")
+        
+        self.figure4 = Figure(facecolor=bg_color)
+        self.canvas4 = FigureCanvas(self.figure4)
+        self.ax4 = self.figure4.add_subplot(111)
+        format_plot(self.ax4, self.current_theme)
+        self.figure4.tight_layout(pad=0.5)
+        
+        toolbar4 = NavigationToolbar(self.canvas4, tab4)
+        layout4.addWidget(toolbar4)
+        layout4.addWidget(self.canvas4)
+        
+        self.surface_tab_index = self.tab_widget.addTab(tab4, "Error Surface")
+
+    def _on_tab_changed(self, index: int) -> None:
+        """Disegna la superficie d'errore alla prima apertura del suo tab"""
+        if index == self.surface_tab_index:
+            self.update_surface_plot()
+
     def apply_selected_theme(self, tema_nome):
         """Cambia il tema dell'interfaccia e aggiorna grafici"""
         self.current_theme = tema_nome
@@ -334,6 +411,7 @@ class OmniPDAnalyzer(QWidget):
         self.figure1.set_facecolor(bg_color)
         self.figure2.set_facecolor(bg_color)
         self.figure3.set_facecolor(bg_color)
+        self.figure4.set_facecolor(bg_color)
         
         # Aggiorna gli stili specifici dei widget
         self.update_widget_styles()
@@ -342,6 +420,7 @@ class OmniPDAnalyzer(QWidget):
         self.update_ompd_plot()
         self.update_residuals_plot()
         self.update_weff_plot()
+        self.update_surface_plot()
     
     def update_widget_styles(self):
         """Aggiorna gli stili dei widget in base al tema corrente"""
@@ -438,8 +517,7 @@ class OmniPDAnalyzer(QWidget):
             power_col_idx = 1
             
             if file_path.lower().endswith('.csv'):
-                df_csv = pd.read_csv(file_path, sep=None, engine="python")
-                col_dialog = CSVColumnDialog(self, df_csv.columns.tolist())
+                col_dialog = CSVColumnDialog(self, read_csv_columns(file_path))
                 if col_dialog.exec() == QDialog.Accepted:
                     time_col_idx, power_col_idx = col_dialog.get_selection()
                 else:
@@ -463,13 +541,17 @@ class OmniPDAnalyzer(QWidget):
                 raise ValueError("Dati insufficienti")
             
             # Usa la logica di calcolo dal core
-            result = calculate_omnipd_model(self.x_data, self.y_data)
+            result = self.fit_cache.fit(self.x_data, self.y_data)
+            if self.chk_bootstrap.isChecked():
+                result['bootstrap'] = run_bootstrap(self.x_data, self.y_data, result)
             
             # Estrai i risultati
             self.params = result['params']
             self.residuals = result['residuals']
             self.RMSE = result['RMSE']
             self.MAE = result['MAE']
+            self.bootstrap = result.get('bootstrap')
+            self._invalidate_surface()
             
             CP = result['CP']
             W_prime = result['W_prime']
@@ -488,6 +570,7 @@ class OmniPDAnalyzer(QWidget):
             self.update_ompd_plot()
             self.update_residuals_plot()
             self.update_weff_plot()
+            self.update_surface_plot()
 
         except Exception as e:
             QMessageBox.critical(self, "Errore Calcolo", str(e))
@@ -515,7 +598,8 @@ class OmniPDAnalyzer(QWidget):
             self.btn_calc.setEnabled(False)
             self.btn_calc.setText("⏳ Calcolo in corso...")
             
-            self.calc_worker = OmniPDCalculationWorker(self.x_data, self.y_data)
+            self.calc_worker = OmniPDCalculationWorker(self.x_data, self.y_data, self.chk_bootstrap.isChecked(),
+                                                      self.fit_cache)
             self.calc_thread = QThread()
             self.calc_worker.moveToThread(self.calc_thread)
             
@@ -541,6 +625,8 @@ class OmniPDAnalyzer(QWidget):
             self.residuals = result['residuals']
             self.RMSE = result['RMSE']
             self.MAE = result['MAE']
+            self.bootstrap = result.get('bootstrap')
+            self._invalidate_surface()
             
             CP = result['CP']
             W_prime = result['W_prime']
@@ -559,6 +645,7 @@ class OmniPDAnalyzer(QWidget):
             self.update_ompd_plot()
             self.update_residuals_plot()
             self.update_weff_plot()
+            self.update_surface_plot()
         except Exception as e:
             QMessageBox.critical(self, "Errore", f"Errore nell'elaborazione dei risultati: {str(e)}")
     
@@ -582,7 +669,8 @@ class OmniPDAnalyzer(QWidget):
             self.ax1.set_title("OmniPD Curve", color=TEMI.get(self.current_theme, TEMI["Forest Green"]).get("text", "#f1f5f9"), fontsize=14)
             self.canvas1.draw()
             return
-        plot_ompd_curve(self.ax1, self.x_data, self.y_data, self.params, self.current_theme)
+        plot_ompd_curve(self.ax1, self.x_data, self.y_data, self.params, self.current_theme,
+                        bootstrap=self.bootstrap)
         self.canvas1.draw()
         # Connetti event hover al grafico OmPD
         self.event_handler.connect_ompd_hover()
@@ -610,3 +698,24 @@ class OmniPDAnalyzer(QWidget):
             return
         plot_weff(self.ax3, self.params, self.params[1], self.current_theme)
         self.canvas3.draw()
+
+    def _invalidate_surface(self):
+        """Scarta la superficie se appartiene a un altro dataset"""
+        if self.surface_key != data_hash(self.x_data, self.y_data):
+            self.surface = None
+            self.surface_key = None
+
+    def update_surface_plot(self):
+        """Aggiorna il grafico della superficie d'errore (calcolata qui, solo con il tab visibile)"""
+        if self.params is not None and self.surface_key is None \
+                and self.tab_widget.currentIndex() == self.surface_tab_index:
+            self.surface = run_error_surface(self.x_data, self.y_data, {'params': self.params})
+            self.surface_key = data_hash(self.x_data, self.y_data)
+        if self.params is None or self.surface is None:
+            self.ax4.clear()
+            format_plot(self.ax4, self.current_theme)
+            self.ax4.set_title("OmPD Error Surface (RMSE)", color=TEMI.get(self.current_theme, TEMI["Forest Green"]).get("text", "#f1f5f9"), fontsize=14)
+            self.canvas4.draw()
+            return
+        plot_error_surface(self.ax4, self.surface, self.params, self.current_theme)
+        self.canvas4.draw()
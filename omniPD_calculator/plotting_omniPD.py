@@ -10,7 +10,7 @@ OmniPD Plotting - Funzioni per creazione e aggiornamento grafici
 """
 
 import logging
-from typing import Tuple
+from typing import Tuple, Dict, Any, Optional
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
@@ -49,7 +49,8 @@ def format_plot(ax: Axes, theme: str = "Forest Green") -> None:
 
 
 def plot_ompd_curve(ax: Axes, x_data: NDArray[np.float64], y_data: NDArray[np.float64], 
-                    params: Tuple[float, float, float, float], theme: str = "Forest Green") -> None:
+                    params: Tuple[float, float, float, float], theme: str = "Forest Green",
+                    bootstrap: Optional[Dict[str, Any]] = None) -> None:
     """
     Disegna il grafico OmPD principale con curve e dati inseriti.
     
@@ -59,6 +60,7 @@ def plot_ompd_curve(ax: Axes, x_data: NDArray[np.float64], y_data: NDArray[np.fl
         y_data: Array delle potenze in Watt
         params: Tuple (CP, W_prime, Pmax, A)
         theme: Nome del tema da applicare
+        bootstrap: Risultato di bootstrap_omnipd (banda della curva e intervalli nel riquadro)
     """
     ax.clear()
     format_plot(ax, theme)
@@ -80,6 +82,12 @@ def plot_ompd_curve(ax: Axes, x_data: NDArray[np.float64], y_data: NDArray[np.fl
     t_max = max(max(x_data) * 1.2, 5400)
     t_model = np.logspace(np.log10(1.0), np.log10(t_max), 500)
     
+    # Banda di confidenza bootstrap sotto la curva
+    if bootstrap is not None:
+        ax.fill_between(bootstrap['t_grid'], bootstrap['band_lower'], bootstrap['band_upper'],
+                        color=btn_color, alpha=0.25, linewidth=0, zorder=2,
+                        label=f"CI {bootstrap['confidence']:.0%}")
+    
     # Curva completa - usa btn_color (senza label)
     p_model = ompd_power(t_model, CP, W_prime, Pmax, A)
     ax.plot(t_model, p_model, color=btn_color, 
@@ -116,6 +124,12 @@ def plot_ompd_curve(ax: Axes, x_data: NDArray[np.float64], y_data: NDArray[np.fl
     
     # Parametri nel grafico
     textstr = f"CP={int(round(CP))} W\nW'={int(round(W_prime))} J\nPmax={int(round(Pmax))} W\nA={A:.2f}"
+    if bootstrap is not None:
+        ci = bootstrap['CI']
+        textstr = (f"CP={int(round(CP))} W [{ci['CP'][0]:.0f}-{ci['CP'][1]:.0f}]\n"
+                   f"W'={int(round(W_prime))} J [{ci['W_prime'][0]:.0f}-{ci['W_prime'][1]:.0f}]\n"
+                   f"Pmax={int(round(Pmax))} W [{ci['Pmax'][0]:.0f}-{ci['Pmax'][1]:.0f}]\n"
+                   f"A={A:.2f} [{ci['A'][0]:.2f}-{ci['A'][1]:.2f}]")
     ax.text(0.98, 0.98, textstr, transform=ax.transAxes, 
              fontsize=9, verticalalignment='top', horizontalalignment='right',
              bbox=dict(boxstyle='round', facecolor=text_color, alpha=0.9))
@@ -240,3 +254,44 @@ def plot_weff(ax: Axes, params: Tuple[float, float, float, float], W_prime: floa
              transform=ax.transAxes, fontsize=10,
              verticalalignment='top', horizontalalignment='right',
              bbox=dict(boxstyle='round', facecolor=text_color, alpha=0.9))
+
+
+def plot_error_surface(ax: Axes, surface: Dict[str, Any], params: Tuple[float, float, float, float],
+                       theme: str = "Forest Green") -> None:
+    """
+    Disegna la superficie RMSE su CP x W' come mappa a contorni.
+
+    Args:
+        ax: Matplotlib Axes object
+        surface: Risultato 2-D di rmse_surface
+        params: Tuple (CP, W_prime, Pmax, A) del fit
+        theme: Nome del tema da applicare
+    """
+    ax.clear()
+    format_plot(ax, theme)
+
+    colors = TEMI.get(theme, TEMI["Forest Green"])
+    accent_color = colors.get("accent", "#4ade80")
+    text_color = colors.get("text", "#f1f5f9")
+
+    rmse = surface['rmse']
+    finite = rmse[np.isfinite(rmse)]
+    r_min = max(float(finite.min()), 1e-6)
+    # Livelli logaritmici: la valle vicino al minimo resta leggibile
+    levels = np.geomspace(r_min, max(float(finite.max()), r_min * 1.01), 25)
+    # rmse ha assi (CP, W'): contourf vuole (W', CP) per x = CP
+    ax.contourf(surface['CP'], surface['W_prime'], rmse.T, levels=levels, cmap='viridis_r', extend='max')
+    ax.contour(surface['CP'], surface['W_prime'], rmse.T, levels=levels[::4], colors=text_color,
+               linewidths=0.5, alpha=0.5)
+
+    CP, W_prime = params[0], params[1]
+    ax.plot(CP, W_prime, marker='+', color=accent_color, markersize=14, markeredgewidth=2, label='Fit')
+
+    ax.set_xlabel("CP (W)", color=text_color)
+    ax.set_ylabel("W' (J)", color=text_color)
+    ax.set_title("OmPD Error Surface (RMSE)", color=text_color, fontsize=14)
+    ax.grid(which='major', linestyle='-', linewidth=0.7, alpha=0.3)
+
+    ax.text(0.98, 0.98, f"RMSE min = {surface['best'][4]:.2f} W\nPmax, A profiled",
+            transform=ax.transAxes, fontsize=9, verticalalignment='top', horizontalalignment='right',
+            bbox=dict(boxstyle='round', facecolor=text_color, alpha=0.9))
@@ -0,0 +1,161 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+OmniPD Surface - Superficie d'errore RMSE su griglie di parametri
+Griglia CP x W' (o CP x W' x Pmax) con i parametri restanti profilati, valutazione a blocchi
+"""
+import logging
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .core_omniPD import TCPMAX, initial_guess_and_bounds
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Elementi (celle x punti) valutati per blocco: limita la memoria a poche decine di MB
+MAX_CHUNK_ELEMENTS = 2_000_000
+# Iterazioni Gauss-Newton per profilare Pmax e A in ogni cella
+PROFILE_ITERATIONS = 5
+
+
+def default_surface_grid(params: Sequence[float], n: int = 200, cp_span: float = 0.25,
+                         w_prime_span: float = 0.6) -> Dict[str, NDArray[np.float64]]:
+    """
+    Griglia CP x W' centrata sul fit.
+
+    Args:
+        params: [CP, W', Pmax, A] del fit
+        n: Valori per asse
+        cp_span: Semiampiezza relativa su CP (0.25 = +-25%)
+        w_prime_span: Semiampiezza relativa su W'
+
+    Returns:
+        Dict con 'CP' e 'W_prime'
+    """
+    CP, W_prime = float(params[0]), float(params[1])
+    return {
+        'CP': np.linspace(CP * (1 - cp_span), CP * (1 + cp_span), n),
+        'W_prime': np.linspace(max(W_prime * (1 - w_prime_span), 1.0), W_prime * (1 + w_prime_span), n),
+    }
+
+
+def _profiled_rmse(t: NDArray[np.float64], p: NDArray[np.float64], cp: NDArray[np.float64],
+                   w_prime: NDArray[np.float64], pmax: NDArray[np.float64], a: NDArray[np.float64],
+                   bounds: tuple, profile_pmax: bool, profile_a: bool) -> tuple:
+    """
+    RMSE di un blocco di celle (array 1-D della stessa lunghezza) sui punti (t, p).
+
+    Con profile_pmax Pmax e A si ottimizzano insieme con Gauss-Newton (sistema
+    2x2 per cella, bounds per proiezione); con solo profile_a, A ha la
+    soluzione chiusa dei minimi quadratici lineari, poi riportata nei bounds.
+
+    Returns:
+        Tuple (rmse, pmax, a) per cella
+    """
+    (_, _, pmax_lo, a_lo), (_, _, pmax_hi, a_hi) = bounds
+    cp, w_prime = cp[:, None], w_prime[:, None]
+    log_term = np.where(t > TCPMAX, np.log(t / TCPMAX), 0.0)
+    sum_l2 = max(float(np.sum(log_term ** 2)), 1e-12)
+
+    def residuals(pmax, a):
+        E = np.exp(-t * (pmax[:, None] - cp) / w_prime)
+        return (w_prime / t) * (1 - E) + cp - a[:, None] * log_term - p, E
+
+    if profile_pmax:
+        for _ in range(PROFILE_ITERATIONS):
+            r, E = residuals(pmax, a)
+            # Equazioni normali nelle variabili (Pmax, A): dr/dPmax = E, dr/dA = -L
+            h11 = np.sum(E * E, axis=1) + 1e-12
+            h12 = -(E @ log_term)
+            h22 = sum_l2
+            g1 = np.sum(E * r, axis=1)
+            g2 = -(r @ log_term)
+            det = h11 * h22 - h12 * h12
+            det = np.where(np.abs(det) > 1e-18, det, 1e-18)
+            pmax = np.clip(pmax - (h22 * g1 - h12 * g2) / det, pmax_lo, pmax_hi)
+            a = np.clip(a - (h11 * g2 - h12 * g1) / det, a_lo, a_hi)
+    elif profile_a:
+        r, _ = residuals(pmax, np.zeros_like(a))
+        a = np.clip((r @ log_term) / sum_l2, a_lo, a_hi)
+
+    r, _ = residuals(pmax, a)
+    return np.sqrt(np.mean(r ** 2, axis=1)), pmax, a
+
+
+def rmse_surface(t_data: NDArray[np.float64], p_data: NDArray[np.float64], params: Sequence[float],
+                 cp_grid: Optional[NDArray[np.float64]] = None, w_prime_grid: Optional[NDArray[np.float64]] = None,
+                 pmax_grid: Optional[NDArray[np.float64]] = None, profile: bool = True,
+                 max_chunk_elements: int = MAX_CHUNK_ELEMENTS) -> Dict[str, Any]:
+    """
+    Superficie RMSE del modello OmniPD su una griglia di parametri.
+
+    Griglia 2-D su CP x W' (Pmax e A profilati) o 3-D su CP x W' x Pmax
+    (A profilato). Le celle sono valutate in un'unica espressione numpy
+    vettorizzata, a blocchi di al massimo max_chunk_elements celle x punti.
+
+    Args:
+        t_data: Array di tempi (secondi)
+        p_data: Array di potenze (Watt)
+        params: [CP, W', Pmax, A] del fit (centro di default e partenza del profilo)
+        cp_grid, w_prime_grid: Valori degli assi (default: default_surface_grid)
+        pmax_grid: Terzo asse opzionale
+        profile: False = parametri non in griglia fissi ai valori del fit (sezione)
+        max_chunk_elements: Limite di memoria per blocco
+
+    Returns:
+        Dict con chiavi:
+        - CP, W_prime, Pmax: assi (Pmax None se 2-D)
+        - rmse: array (nCP, nW) o (nCP, nW, nPmax)
+        - Pmax_opt, A_opt: parametri profilati per cella (stessa forma)
+        - best: (CP, W', Pmax, A, RMSE) della cella migliore
+    """
+    t = np.asarray(t_data, dtype=float)
+    p = np.asarray(p_data, dtype=float)
+    if len(t) < 4:
+        raise ValueError("Dati insufficienti: servono almeno 4 punti")
+    defaults = default_surface_grid(params)
+    cp_grid = np.asarray(defaults['CP'] if cp_grid is None else cp_grid, dtype=float)
+    w_prime_grid = np.asarray(defaults['W_prime'] if w_prime_grid is None else w_prime_grid, dtype=float)
+    _, bounds = initial_guess_and_bounds(p)
+
+    axes = [cp_grid, w_prime_grid] + ([np.asarray(pmax_grid, dtype=float)] if pmax_grid is not None else [])
+    shape = tuple(len(ax) for ax in axes)
+    mesh = np.meshgrid(*axes, indexing='ij')
+    cells = [m.ravel() for m in mesh]
+    n_cells = cells[0].size
+    pmax_start = cells[2] if pmax_grid is not None else np.full(n_cells, float(params[2]))
+    a_start = np.full(n_cells, float(params[3]))
+
+    rmse = np.empty(n_cells)
+    pmax_opt = np.empty(n_cells)
+    a_opt = np.empty(n_cells)
+    chunk = max(1, max_chunk_elements // len(t))
+    with np.errstate(over='ignore', invalid='ignore'):
+        for start in range(0, n_cells, chunk):
+            sl = slice(start, start + chunk)
+            rmse[sl], pmax_opt[sl], a_opt[sl] = _profiled_rmse(
+                t, p, cells[0][sl], cells[1][sl], pmax_start[sl].copy(), a_start[sl].copy(), bounds,
+                profile_pmax=profile and pmax_grid is None, profile_a=profile)
+
+    rmse = np.where(np.isfinite(rmse), rmse, np.inf)
+    best = int(np.argmin(rmse))
+    logger.info(f"Superficie RMSE {'x'.join(map(str, shape))} su {len(t)} punti: minimo {rmse[best]:.2f} W "
+                f"a CP={cells[0][best]:.0f} W, W'={cells[1][best]:.0f} J")
+    return {
+        'CP': cp_grid,
+        'W_prime': w_prime_grid,
+        'Pmax': axes[2] if pmax_grid is not None else None,
+        'rmse': rmse.reshape(shape),
+        'Pmax_opt': pmax_opt.reshape(shape),
+        'A_opt': a_opt.reshape(shape),
+        'best': (float(cells[0][best]), float(cells[1][best]), float(pmax_opt[best]), float(a_opt[best]),
+                 float(rmse[best])),
+    }
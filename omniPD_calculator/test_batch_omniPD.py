@@ -0,0 +1,74 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""Regression test: LM impilato vs calculate_omnipd_model e ripiego sul fit singolo"""
+
+import numpy as np
+
+from omniPD_calculator import batch_omniPD
+from omniPD_calculator.batch_omniPD import fit_omnipd_batch, fit_stacked, stacked_levenberg_marquardt
+from omniPD_calculator.core_omniPD import calculate_omnipd_model, initial_guess_and_bounds, ompd_power
+
+# Atleti sintetici: (CP, W', Pmax, A)
+_ATHLETES = [
+    (240, 15000, 900, 20),
+    (280, 20000, 1100, 30),
+    (320, 24000, 1300, 40),
+    (360, 18000, 1500, 25),
+    (300, 28000, 1000, 35),
+]
+
+
+def _datasets(seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.array([1, 5, 15, 30, 60, 120, 180, 300, 600, 1200, 1800, 3600], dtype=float)
+    return [(f"a{i}", t, ompd_power(t, *params) + rng.normal(0, 4, len(t)))
+            for i, params in enumerate(_ATHLETES)]
+
+
+def test_stacked_lm_matches_single_fit():
+    datasets = _datasets()
+    sizes = np.array([len(t) for _, t, _ in datasets])
+    guesses = [initial_guess_and_bounds(p) for _, _, p in datasets]
+    params, converged = stacked_levenberg_marquardt(
+        np.concatenate([t for _, t, _ in datasets]), np.concatenate([p for _, _, p in datasets]), sizes,
+        np.array([g for g, _ in guesses]), np.array([lo for _, (lo, _) in guesses]),
+        np.array([hi for _, (_, hi) in guesses]))
+
+    assert converged.all()
+    for (_, t, p), fitted, (lower, upper) in zip(datasets, params, (b for _, b in guesses)):
+        single = calculate_omnipd_model(t, p)
+        rmse = np.sqrt(np.mean((p - ompd_power(t, *fitted)) ** 2))
+        assert np.all(fitted >= np.array(lower) - 1e-9) and np.all(fitted <= np.array(upper) + 1e-9)
+        assert rmse <= single['RMSE'] * (1 + 1e-4) + 1e-6
+        np.testing.assert_allclose(fitted[:2], single['params'][:2], rtol=1e-3)
+
+
+def test_fit_stacked_rows_match_batch():
+    datasets = _datasets(1)
+    rows = fit_stacked(datasets)
+    batch = fit_omnipd_batch({name: (t, p) for name, t, p in datasets}, max_workers=1)
+
+    assert [r['method'] for r in rows] == ['stacked'] * len(datasets)
+    np.testing.assert_allclose([r['RMSE'] for r in rows], batch['RMSE'].to_numpy(), rtol=1e-9)
+
+
+def test_non_converged_problems_fall_back_to_single_fit(monkeypatch):
+    original = batch_omniPD.stacked_levenberg_marquardt
+
+    def one_iteration(*args, **kwargs):
+        kwargs['max_iter'] = 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(batch_omniPD, 'stacked_levenberg_marquardt', one_iteration)
+    datasets = _datasets(2)
+    rows = fit_stacked(datasets)
+
+    assert [r['method'] for r in rows] == ['single'] * len(datasets)
+    for row, (_, t, p) in zip(rows, datasets):
+        assert row['error'] is None
+        assert np.isclose(row['RMSE'], calculate_omnipd_model(t, p)['RMSE'], rtol=1e-6)
@@ -12,8 +12,10 @@ omniselector - Modulo selector per bFactor
 from .gui_omniselector import OmniSelectorAnalyzer
 from .core_omniselector import (
     calculate_omnipd_model,
+    calculate_omnipd_model_robust,
     ompd_power,
     ompd_power_short,
+    ompd_jacobian,
     w_eff,
     load_data_from_file,
     convert_time_minutes_to_seconds,
@@ -44,6 +46,7 @@ __all__ = [
     'calculate_omnipd_model',
     'ompd_power',
     'ompd_power_short',
+    'ompd_jacobian',
     'w_eff',
     'load_data_from_file',
     'convert_time_minutes_to_seconds',
@@ -8,14 +8,20 @@
 """
 Omniselector Core - Modello matematico e funzioni di utilità
 """
-import os
 import numpy as np
 import pandas as pd
-from scipy.optimize import curve_fit
+from scipy.optimize import curve_fit, least_squares
+
+from shared.table_loader import read_two_columns
 
 # Costante globale
 TCPMAX = 1800  # secondi
 
+# Fit robusto: loss di least_squares, scala minima dei residui (W), soglia di peso degli outlier
+ROBUST_LOSSES = ('soft_l1', 'huber', 'cauchy', 'arctan')
+ROBUST_MIN_SCALE = 2.0
+ROBUST_OUTLIER_WEIGHT = 0.3
+
 
 def ompd_power(t, CP, W_prime, Pmax, A):
     """Modello Omniselector completo con 4 parametri"""
@@ -31,6 +37,18 @@ def ompd_power_short(t, CP, W_prime, Pmax):
     return (W_prime / t) * (1 - np.exp(-t * (Pmax - CP) / W_prime)) + CP
 
 
+def ompd_jacobian(t, CP, W_prime, Pmax, A):
+    """Jacobiana analitica di ompd_power rispetto a (CP, W_prime, Pmax, A)"""
+    t = np.atleast_1d(np.array(t, dtype=float))
+    E = np.exp(-t * (Pmax - CP) / W_prime)
+    jac = np.empty((len(t), 4))
+    jac[:, 0] = 1 - E
+    jac[:, 1] = (1 - E) / t - E * (Pmax - CP) / W_prime
+    jac[:, 2] = E
+    jac[:, 3] = np.where(t <= TCPMAX, 0.0, -np.log(t / TCPMAX))
+    return jac
+
+
 def w_eff(t, W_prime, CP, Pmax):
     """W' efficace nel tempo"""
     return W_prime * (1 - np.exp(-t * (Pmax - CP) / W_prime))
@@ -88,6 +106,7 @@ def calculate_omnipd_model(t_data, p_data):
             t_data, 
             p_data, 
             p0=initial_guess, 
+            jac=ompd_jacobian,
             maxfev=20000,
             bounds=([0, 0, 0, 0], [np.inf, np.inf, np.inf, np.inf])
         )
@@ -115,6 +134,99 @@ def calculate_omnipd_model(t_data, p_data):
     }
 
 
+def robust_loss_weights(residuals, loss, f_scale):
+    """Pesi per punto equivalenti alla loss robusta (rho'(z), z = (r/f_scale)^2), in (0, 1]"""
+    z = (np.asarray(residuals, dtype=float) / f_scale) ** 2
+    if loss == 'soft_l1':
+        return 1 / np.sqrt(1 + z)
+    if loss == 'huber':
+        return np.where(z <= 1, 1.0, 1 / np.sqrt(np.maximum(z, 1)))
+    if loss == 'cauchy':
+        return 1 / (1 + z)
+    if loss == 'arctan':
+        return 1 / (1 + z ** 2)
+    raise ValueError(f"Loss non valida: {loss} (ammesse: {', '.join(ROBUST_LOSSES)})")
+
+
+def calculate_omnipd_model_robust(t_data, p_data, loss='soft_l1', f_scale=None):
+    """
+    Fit robusto del modello Omniselector: i punti sub-massimali pesano meno
+    
+    Un solo fit sostituisce la coppia modello base + modello filtrato: si
+    parte dal fit ai minimi quadrati e si rifitta con least_squares, loss
+    robusta e Jacobiana analitica. Senza f_scale la scala dei residui è la
+    MAD normalizzata (almeno ROBUST_MIN_SCALE W), ristimata dopo la prima passata.
+    
+    Args:
+        t_data: array di tempi (secondi)
+        p_data: array di potenze (Watt)
+        loss: una di ROBUST_LOSSES
+        f_scale: scala dei residui in W (None = stima robusta)
+    
+    Returns:
+        dict con le chiavi di calculate_omnipd_model più:
+        - weights: peso di ciascun punto nel fit finale
+        - outliers: maschera dei punti con peso < ROBUST_OUTLIER_WEIGHT
+        - loss, f_scale: loss e scala usate
+    
+    Raises:
+        ValueError: se loss non valida, dati insufficienti o fitting fallisce
+    """
+    if loss not in ROBUST_LOSSES:
+        raise ValueError(f"Loss non valida: {loss} (ammesse: {', '.join(ROBUST_LOSSES)})")
+    
+    t_data = np.array(t_data, dtype=float)
+    p_data = np.array(p_data, dtype=float)
+    
+    start = calculate_omnipd_model(t_data, p_data)
+    popt, residuals = start['params'], start['residuals']
+    
+    passes = [f_scale] if f_scale is not None else [None, None]
+    for scale in passes:
+        if scale is None:
+            mad = np.median(np.abs(residuals - np.median(residuals)))
+            scale = max(1.4826 * mad, ROBUST_MIN_SCALE)
+        try:
+            solution = least_squares(
+                lambda x: ompd_power(t_data, *x) - p_data,
+                popt,
+                jac=lambda x: ompd_jacobian(t_data, *x),
+                bounds=([0, 0, 0, 0], [np.inf, np.inf, np.inf, np.inf]),
+                loss=loss,
+                f_scale=scale,
+                x_scale='jac',
+                max_nfev=2000
+            )
+        except Exception as e:
+            raise ValueError(f"Fitting robusto fallito: {str(e)}")
+        popt = solution.x
+        residuals = -solution.fun
+    
+    CP, W_prime, Pmax, A = popt
+    
+    # Calcolo errori
+    P_pred = ompd_power(t_data, CP, W_prime, Pmax, A)
+    residuals = p_data - P_pred
+    RMSE = np.sqrt(np.mean(residuals**2))
+    MAE = np.mean(np.abs(residuals))
+    weights = robust_loss_weights(residuals, loss, scale)
+    
+    return {
+        'params': popt,
+        'CP': CP,
+        'W_prime': W_prime,
+        'Pmax': Pmax,
+        'A': A,
+        'P_pred': P_pred,
+        'residuals': residuals,
+        'RMSE': RMSE,
+        'MAE': MAE,
+        'weights': weights,
+        'outliers': weights < ROBUST_OUTLIER_WEIGHT,
+        'loss': loss,
+        'f_scale': scale
+    }
+
 # ============================================================================
 # DATA HANDLING - Funzioni per I/O file e gestione dati
 # ============================================================================
@@ -154,28 +266,11 @@ def load_data_from_file(file_path, time_col_idx=0, power_col_idx=1):
     Raises:
         ValueError: se file non valido o dati insufficienti
     """
-    ext = os.path.splitext(file_path)[1].lower()
-    
     try:
-        if ext == ".xlsm":
-            try:
-                df = pd.read_excel(file_path, sheet_name="Summary Sheet", 
-                                 usecols="A:B", header=None)
-            except ValueError:
-                df = pd.read_excel(file_path, sheet_name=0, 
-                                 usecols="A:B", header=None)
-        elif ext == ".xlsx":
-            df = pd.read_excel(file_path, usecols="A:B", header=None)
-        elif ext == ".csv":
-            df = pd.read_csv(file_path, sep=None, engine="python")
-        else:
-            raise ValueError(f"Formato file non supportato: {ext}")
-        
-        # Estrai le colonne selezionate
-        df_selected = df.iloc[:, [time_col_idx, power_col_idx]]
+        # Solo le due colonne selezionate (workbook in streaming, CSV con parser C)
+        df_selected = read_two_columns(file_path, time_col_idx, power_col_idx)
         
         # Pulizia e conversione dati
-        df_selected.columns = ["t", "P"]
         df_selected["t"] = pd.to_numeric(df_selected["t"], errors="coerce")
         df_selected["P"] = pd.to_numeric(df_selected["P"], errors="coerce")
         df_selected = df_selected.dropna()
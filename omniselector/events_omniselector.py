@@ -9,11 +9,29 @@
 Omniselector Events - Handler per interazioni con i grafici (hover, click, ecc.)
 """
 
-import numpy as np
+from shared.hover import BlitHover
 
 from .core_omniselector import ompd_power, _format_time_label
 
 
+# Stili delle annotazioni di hover
+CURVE_ANNOTATION = dict(
+    xytext=(5, 5),
+    bbox=dict(boxstyle='round,pad=0.5', facecolor='#7c3aed', alpha=0.8, edgecolor='white', linewidth=1),
+    fontsize=8, color='white', weight='bold'
+)
+POINT_ANNOTATION = dict(
+    xytext=(5, -20),
+    bbox=dict(boxstyle='round,pad=0.5', facecolor='#4ade80', alpha=0.8, edgecolor='white', linewidth=1),
+    fontsize=8, color='black', weight='bold'
+)
+RESIDUAL_ANNOTATION = dict(
+    xytext=(5, 10),
+    bbox=dict(boxstyle='round,pad=0.5', facecolor='red', alpha=0.8, edgecolor='white', linewidth=1),
+    fontsize=8, color='white', weight='bold'
+)
+
+
 class OmniSelectorEventHandler:
     """Gestore degli eventi di interazione per i grafici Omniselector"""
     
@@ -25,151 +43,54 @@ class OmniSelectorEventHandler:
             analyzer: istanza di OmniSelectorAnalyzer
         """
         self.analyzer = analyzer
+        self.ompd_hover = None
+        self.residuals_hover = None
     
     def connect_ompd_hover(self):
-        """Connette gli eventi di hover per il grafico Omniselector"""
-        if self.analyzer.cid_ompd is not None:
-            self.analyzer.canvas1.mpl_disconnect(self.analyzer.cid_ompd)
-        
-        self.analyzer.cid_ompd = self.analyzer.canvas1.mpl_connect(
-            'motion_notify_event', self._on_ompd_hover
-        )
-    
-    def _on_ompd_hover(self, event):
-        """Gestisce il movimento del mouse sul grafico Omniselector"""
-        if event.inaxes != self.analyzer.ax1 or self.analyzer.params is None:
-            # Rimuovi annotazioni se fuori dall'asse - con proper error handling
-            if self.analyzer.hover_ann_points is not None:
-                try:
-                    self.analyzer.hover_ann_points.remove()
-                except Exception:
-                    pass
-                self.analyzer.hover_ann_points = None
-            if self.analyzer.ann_curve is not None:
-                try:
-                    self.analyzer.ann_curve.remove()
-                except Exception:
-                    pass
-                self.analyzer.ann_curve = None
-            self.analyzer.canvas1.draw_idle()
-            return
-        
-        # Ottieni coordinate mouse
-        x_mouse = event.xdata
-        if x_mouse is None:
+        """Collega l'hover del grafico Omniselector (curva precalcolata per il fit corrente)"""
+        a = self.analyzer
+        if self.ompd_hover is not None:
+            self.ompd_hover.disconnect()
+            self.ompd_hover = None
+        if a.params is None or a.x_data is None:
             return
         
-        CP, W_prime, Pmax, A = self.analyzer.params
-        
-        # Rimuovi vecchia annotazione sulla curva - safe removal
-        if self.analyzer.ann_curve is not None:
-            try:
-                self.analyzer.ann_curve.remove()
-            except Exception:
-                pass
-            self.analyzer.ann_curve = None
-        
-        # Aggiungi annotazione per la curva nel punto x_mouse
-        try:
-            y_curve = ompd_power(x_mouse, CP, W_prime, Pmax, A)
-            self.analyzer.ann_curve = self.analyzer.ax1.annotate(
-                f"{_format_time_label(x_mouse)}\n{int(y_curve)}W",
-                xy=(x_mouse, y_curve),
-                xytext=(5, 5),
-                textcoords='offset points',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='#7c3aed', alpha=0.8, edgecolor='white', linewidth=1),
-                fontsize=8,
-                color='white',
-                weight='bold'
-            )
-        except Exception:
-            pass
-        
-        # Hover sui punti inseriti - safe removal
-        if self.analyzer.hover_ann_points is not None:
-            try:
-                self.analyzer.hover_ann_points.remove()
-            except Exception:
-                pass
-            self.analyzer.hover_ann_points = None
-        
-        # Trova il punto più vicino al mouse
-        distances = np.abs(self.analyzer.x_data - x_mouse)
-        closest_idx = np.argmin(distances)
-        closest_dist = distances[closest_idx]
-        
-        # Se abbastanza vicino, mostra annotazione
-        if closest_dist < max(self.analyzer.x_data) * 0.05:
-            try:
-                x_point = self.analyzer.x_data[closest_idx]
-                y_point = self.analyzer.y_data[closest_idx]
-                self.analyzer.hover_ann_points = self.analyzer.ax1.annotate(
-                    f"MMP: {_format_time_label(x_point)} @ {int(y_point)}W",
-                    xy=(x_point, y_point),
-                    xytext=(5, -20),
-                    textcoords='offset points',
-                    bbox=dict(boxstyle='round,pad=0.5', facecolor='#4ade80', alpha=0.8, edgecolor='white', linewidth=1),
-                    fontsize=8,
-                    color='black',
-                    weight='bold'
-                )
-            except Exception:
-                pass
-        
-        self.analyzer.canvas1.draw_idle()
-    
-    def connect_residuals_hover(self):
-        """Connette gli eventi di hover per il grafico residui"""
-        if self.analyzer.cid_residuals is not None:
-            self.analyzer.canvas2.mpl_disconnect(self.analyzer.cid_residuals)
-        
-        self.analyzer.cid_residuals = self.analyzer.canvas2.mpl_connect(
-            'motion_notify_event', self._on_residuals_hover
+        CP, W_prime, Pmax, A = a.params
+        # Punti da cartella FIT: data dell'uscita che ha dato il valore
+        dates = {}
+        if a.raw_dates is not None:
+            dates = {(float(x), float(y)): str(d)[:10]
+                     for x, y, d in zip(a.raw_x_data, a.raw_y_data, a.raw_dates)}
+        
+        def point_label(x, y):
+            label = f"MMP: {_format_time_label(x)} @ {int(y)}W"
+            return f"{label}\n{dates[(x, y)]}" if (x, y) in dates else label
+        
+        self.ompd_hover = BlitHover(
+            a.canvas1, a.ax1, a.x_data, a.y_data,
+            point_label=point_label,
+            point_style=POINT_ANNOTATION,
+            curve=lambda t: ompd_power(t, CP, W_prime, Pmax, A),
+            curve_label=lambda x, y: f"{_format_time_label(x)}\n{int(y)}W",
+            curve_style=CURVE_ANNOTATION,
         )
+        a.cid_ompd = self.ompd_hover.motion_cid
+        a.ann_curve = self.ompd_hover.curve_ann
+        a.hover_ann_points = self.ompd_hover.point_ann
     
-    def _on_residuals_hover(self, event):
-        """Gestisce il movimento del mouse sul grafico residui"""
-        if event.inaxes != self.analyzer.ax2:
-            if self.analyzer.hover_ann_residuals is not None:
-                try:
-                    self.analyzer.hover_ann_residuals.remove()
-                except Exception:
-                    pass
-                self.analyzer.hover_ann_residuals = None
-            self.analyzer.canvas2.draw_idle()
-            return
-        
-        x_mouse = event.xdata
-        if x_mouse is None:
+    def connect_residuals_hover(self):
+        """Collega l'hover del grafico residui"""
+        a = self.analyzer
+        if self.residuals_hover is not None:
+            self.residuals_hover.disconnect()
+            self.residuals_hover = None
+        if a.residuals is None or a.x_data is None:
             return
         
-        if self.analyzer.hover_ann_residuals is not None:
-            try:
-                self.analyzer.hover_ann_residuals.remove()
-            except Exception:
-                pass
-            self.analyzer.hover_ann_residuals = None
-        
-        # Trova il punto più vicino
-        distances = np.abs(self.analyzer.x_data - x_mouse)
-        closest_idx = np.argmin(distances)
-        closest_dist = distances[closest_idx]
-        
-        if closest_dist < max(self.analyzer.x_data) * 0.05:
-            try:
-                x_point = self.analyzer.x_data[closest_idx]
-                y_residual = self.analyzer.residuals[closest_idx]
-                self.analyzer.hover_ann_residuals = self.analyzer.ax2.annotate(
-                    f"{_format_time_label(x_point)}\nResidual: {int(y_residual)}W",
-                    xy=(x_point, y_residual),
-                    xytext=(5, 10),
-                    textcoords='offset points',
-                    bbox=dict(boxstyle='round,pad=0.5', facecolor='red', alpha=0.8, edgecolor='white', linewidth=1),
-                    fontsize=8,
-                    color='white',
-                    weight='bold'
-                )
-            except Exception:
-                pass
-        
-        self.analyzer.canvas2.draw_idle()
+        self.residuals_hover = BlitHover(
+            a.canvas2, a.ax2, a.x_data, a.residuals,
+            point_label=lambda x, y: f"{_format_time_label(x)}\nResidual: {int(y)}W",
+            point_style=RESIDUAL_ANNOTATION,
+        )
+        a.cid_residuals = self.residuals_hover.motion_cid
+        a.hover_ann_residuals = self.residuals_hover.point_ann
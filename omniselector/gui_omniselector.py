@@ -9,15 +9,17 @@
 Omniselector GUI - Interfaccia grafica (pura presentazione)
 """
 import numpy as np
-import pandas as pd
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
                              QMessageBox, QFileDialog, QDialog, QTabWidget)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, Signal
+
+from shared.table_loader import read_csv_columns
 
 # Import dei moduli separati
 from .core_omniselector import (
     calculate_omnipd_model, 
+    calculate_omnipd_model_robust,
     load_data_from_file,
     convert_time_minutes_to_seconds,
     apply_data_filters
@@ -47,6 +49,28 @@ except ImportError:
             return "background-color: #061f17; color: white;"
 
 
+# Migliori uscite per durata importate da una cartella FIT
+SEASON_POINTS_PER_DURATION = 3
+
+
+class SeasonImportWorker(QThread):
+    """Thread worker per la scansione MMP di una cartella FIT senza bloccare l'UI"""
+    result_ready = Signal(object)
+    error = Signal(str)
+    
+    def __init__(self, folder):
+        super().__init__()
+        self.folder = folder
+    
+    def run(self):
+        try:
+            from PEFFORT.season_mmp import scan_season_mmp, season_best_points
+            season = scan_season_mmp(self.folder)
+            self.result_ready.emit(season_best_points(season, SEASON_POINTS_PER_DURATION))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
 class OmniSelectorAnalyzer(QWidget):
     def __init__(self, theme=None):
         super().__init__()
@@ -65,6 +89,8 @@ class OmniSelectorAnalyzer(QWidget):
         self.MAE = None
         self.raw_x_data = None
         self.raw_y_data = None
+        self.raw_dates = None  # date delle uscite per i punti importati da cartella FIT
+        self.season_worker = None
         self.percentile_min = 0.0
         self.values_per_window = 1
         self.sprint_value = 10.0  # default sprint value in seconds
@@ -248,8 +274,7 @@ class OmniSelectorAnalyzer(QWidget):
             power_col_idx = 1
             
             if file_path.lower().endswith('.csv'):
-                df_csv = pd.read_csv(file_path, sep=None, engine="python")
-                col_dialog = CSVColumnDialog(self, df_csv.columns.tolist())
+                col_dialog = CSVColumnDialog(self, read_csv_columns(file_path))
                 if col_dialog.exec() == QDialog.Accepted:
                     time_col_idx, power_col_idx = col_dialog.get_selection()
                 else:
@@ -259,6 +284,7 @@ class OmniSelectorAnalyzer(QWidget):
             self.raw_x_data, self.raw_y_data = load_data_from_file(
                 file_path, time_col_idx, power_col_idx
             )
+            self.raw_dates = None
             self.params = None
             self.residuals = None
             self.RMSE = None
@@ -274,6 +300,47 @@ class OmniSelectorAnalyzer(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Errore", f"Errore durante l'importazione:\n{str(e)}")
     
+    def import_season_folder(self):
+        """Importa gli MMP di una cartella di FIT: i migliori punti per durata diventano i raw data."""
+        folder = QFileDialog.getExistingDirectory(self, "Seleziona cartella FIT della stagione")
+        if not folder:
+            return
+        if self.season_worker is not None and self.season_worker.isRunning():
+            return
+        
+        self.btn_import_season.setEnabled(False)
+        self.btn_import_season.setText("⏳ Scansione FIT...")
+        self.season_worker = SeasonImportWorker(folder)
+        self.season_worker.result_ready.connect(self._on_season_loaded)
+        self.season_worker.error.connect(
+            lambda msg: QMessageBox.critical(self, "Errore", f"Errore durante l'importazione:\n{msg}"))
+        self.season_worker.finished.connect(self._on_season_import_finished)
+        self.season_worker.start()
+    
+    def _on_season_loaded(self, points):
+        """Carica i punti MMP di stagione (durata, potenza, data) come raw data"""
+        if len(points) < 4:
+            QMessageBox.critical(self, "Errore", f"Dati insufficienti: {len(points)} punti MMP nella cartella")
+            return
+        self.raw_x_data = points['duration'].to_numpy(dtype=float)
+        self.raw_y_data = points['power'].to_numpy(dtype=float)
+        self.raw_dates = points['date'].to_numpy()
+        self.params = None
+        self.residuals = None
+        self.RMSE = None
+        self.MAE = None
+        self.selected_mask = None
+        self.x_data = None
+        self.y_data = None
+        # Reset modello base per nuovi dati
+        self.base_params = None
+        self.base_residuals = None
+        self.update_ompd_plot()
+    
+    def _on_season_import_finished(self):
+        self.btn_import_season.setEnabled(True)
+        self.btn_import_season.setText("🗂️ Importa Stagione FIT")
+    
     def _calculate_model(self):
         """Calcola il modello Omniselector usando la logica core"""
         try:
@@ -323,6 +390,11 @@ class OmniSelectorAnalyzer(QWidget):
             if len(self.raw_x_data) < 4:
                 raise ValueError(f"Dati insufficienti: {len(self.raw_x_data)} punti (minimo 4)")
             
+            # Fit robusto: pesi per punto al posto del modello base e del filtro
+            if self.chk_robust.isChecked():
+                self._calculate_robust_model()
+                return
+            
             # Se non abbiamo ancora calcolato il modello BASE (su tutti i raw data),
             # fallo ora. Questo modello rimarrà stabile per tutte le elaborazioni successive.
             if self.base_params is None or self.base_residuals is None:
@@ -341,6 +413,31 @@ class OmniSelectorAnalyzer(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Errore Calcolo", f"Errore inaspettato: {str(e)}")
     
+    def _calculate_robust_model(self):
+        """Fit robusto su TUTTI i raw data: i punti con peso basso (sub-massimali)
+        restano fuori dalla selezione, gli altri sono i punti del modello."""
+        result = calculate_omnipd_model_robust(self.raw_x_data, self.raw_y_data)
+        
+        self.selected_mask = ~result['outliers']
+        self.x_data = np.asarray(self.raw_x_data, dtype=float)[self.selected_mask]
+        self.y_data = np.asarray(self.raw_y_data, dtype=float)[self.selected_mask]
+        self.params = result['params']
+        # Errori riportati sui punti selezionati, come nel flusso con filtro
+        self.residuals = result['residuals'][self.selected_mask]
+        self.RMSE = float(np.sqrt(np.mean(self.residuals**2)))
+        self.MAE = float(np.mean(np.abs(self.residuals)))
+        
+        self.lbl_cp.setText(f"CP: {result['CP']:.0f} W")
+        self.lbl_wprime.setText(f"W': {result['W_prime']:.0f} J")
+        self.lbl_pmax.setText(f"Pmax: {result['Pmax']:.0f} W")
+        self.lbl_a.setText(f"A: {result['A']:.2f}")
+        self.lbl_rmse.setText(f"RMSE: {self.RMSE:.2f} W")
+        self.lbl_mae.setText(f"MAE: {self.MAE:.2f} W")
+        
+        self.update_ompd_plot()
+        self.update_residuals_plot()
+        self.update_weff_plot()
+    
     def _calculate_base_model(self):
         """Calcola il modello BASE su TUTTI i raw data (non filtrato).
         Questo modello viene calcolato una sola volta e i suoi residui vengono usati
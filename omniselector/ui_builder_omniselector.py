@@ -11,7 +11,7 @@ Omniselector UI Builder - Funzioni per costruzione interfaccia grafica
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFrame, QComboBox, QGridLayout,
-                             QTabWidget, QScrollArea)
+                             QTabWidget, QScrollArea, QCheckBox)
 from PySide6.QtCore import Qt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
@@ -87,6 +87,11 @@ def _create_data_section(analyzer):
     analyzer.btn_import.clicked.connect(analyzer.import_file)
     layout.addWidget(analyzer.btn_import)
     
+    analyzer.btn_import_season = QPushButton("🗂️ Importa Stagione FIT")
+    analyzer.btn_import_season.setToolTip("MMP di tutte le uscite di una cartella FIT (uscite già viste in cache)")
+    analyzer.btn_import_season.clicked.connect(analyzer.import_season_folder)
+    layout.addWidget(analyzer.btn_import_season)
+    
     section = _create_section("📂 DATI", content)
     analyzer.sidebar.addWidget(section)
 
@@ -286,6 +291,12 @@ def _create_processing_section(analyzer):
     layout = QVBoxLayout(content)
     layout.setSpacing(8)
     
+    # Fit robusto: un solo fit su tutti i punti al posto del filtro per finestre
+    analyzer.chk_robust = QCheckBox("Fit robusto (scarta sub-massimali)")
+    analyzer.chk_robust.setToolTip("Loss soft-L1: i punti sotto la curva pesano meno "
+                                   "e quelli con peso basso sono esclusi")
+    layout.addWidget(analyzer.chk_robust)
+    
     analyzer.btn_calc = QPushButton("⚙️ Elabora Modello")
     analyzer.btn_calc.clicked.connect(analyzer.run_calculation)
     layout.addWidget(analyzer.btn_calc)
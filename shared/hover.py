@@ -0,0 +1,205 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+SHARED HOVER - Annotazioni di hover veloci per i grafici matplotlib della suite
+Curva precalcolata su griglia log, ricerca con searchsorted, artisti persistenti con blitting
+"""
+
+import logging
+import time
+from typing import Callable, Optional, Dict, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Frequenza massima degli aggiornamenti se lo schermo non la riporta [Hz]
+DEFAULT_REFRESH_HZ = 60.0
+# Punti della griglia log su cui si precalcola la curva
+CURVE_GRID_POINTS = 2048
+
+
+def _refresh_rate(canvas) -> float:
+    """Frequenza di refresh dello schermo che ospita il canvas (Qt), altrimenti DEFAULT_REFRESH_HZ"""
+    try:
+        rate = float(canvas.screen().refreshRate())
+        return rate if rate > 0 else DEFAULT_REFRESH_HZ
+    except (AttributeError, TypeError, RuntimeError):
+        return DEFAULT_REFRESH_HZ
+
+
+class BlitHover:
+    """
+    Hover su un Axes: valore della curva sotto il mouse e punto dati più vicino.
+
+    La curva è campionata una volta su una griglia log densa (CURVE_GRID_POINTS
+    punti) e letta con searchsorted + interpolazione; i punti dati sono ordinati
+    una volta e il più vicino si trova confrontando i due vicini di searchsorted.
+    Le due annotazioni sono create una sola volta come artisti animati: a ogni
+    movimento si aggiornano posizione e testo, si ripristina lo sfondo salvato
+    all'ultimo draw e si ridisegnano solo loro (blit), al massimo una volta per
+    refresh dello schermo.
+    """
+
+    def __init__(self, canvas, ax, x_points: np.ndarray, y_points: np.ndarray,
+                 point_label: Callable[[float, float], str], point_style: Dict[str, Any],
+                 curve: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 curve_label: Optional[Callable[[float, float], str]] = None,
+                 curve_style: Optional[Dict[str, Any]] = None,
+                 curve_range: Optional[tuple] = None, max_point_distance: Optional[float] = None):
+        """
+        Da creare subito dopo il draw del grafico.
+
+        Args:
+            canvas: FigureCanvas matplotlib
+            ax: Axes da monitorare
+            x_points, y_points: Punti dati (l'ordine non conta)
+            point_label: Testo dell'annotazione del punto (x, y) -> str
+            point_style: kwargs di annotate per il punto (xytext, bbox, colori...)
+            curve: Funzione vettorizzata t -> y (None = solo punti)
+            curve_label: Testo dell'annotazione della curva (x, y) -> str
+            curve_style: kwargs di annotate per la curva
+            curve_range: Intervallo (t_min, t_max) della griglia (default: limiti x dell'asse)
+            max_point_distance: Distanza massima in x per mostrare il punto
+                (default: 5% del massimo dei punti, come l'hover originale)
+        """
+        self.canvas = canvas
+        self.ax = ax
+        order = np.argsort(np.asarray(x_points, dtype=float))
+        self.x_points = np.asarray(x_points, dtype=float)[order]
+        self.y_points = np.asarray(y_points, dtype=float)[order]
+        self.point_label = point_label
+        self.curve_label = curve_label
+        self.max_point_distance = (max_point_distance if max_point_distance is not None
+                                   else self.x_points.max() * 0.05 if len(self.x_points) else 0.0)
+        self.min_interval = 1.0 / _refresh_rate(canvas)
+        self._last_update = 0.0
+        self._background = None
+
+        self.curve = curve
+        self.t_grid = self.curve_grid = None
+        if curve is not None:
+            t_min, t_max = curve_range or ax.get_xlim()
+            t_min = max(t_min, 1e-3)
+            self.t_grid = np.geomspace(t_min, max(t_max, t_min * 1.001), CURVE_GRID_POINTS)
+            self.curve_grid = np.asarray(curve(self.t_grid), dtype=float)
+
+        self._use_blit = bool(getattr(canvas, 'supports_blit', False))
+        self.point_ann = self._make_annotation(point_style)
+        self.curve_ann = self._make_annotation(curve_style) if curve is not None else None
+
+        if self._use_blit:
+            # Il grafico è appena stato disegnato: lo sfondo è già valido
+            self._background = canvas.copy_from_bbox(canvas.figure.bbox)
+
+        self._cids = [
+            canvas.mpl_connect('draw_event', self._on_draw),
+            canvas.mpl_connect('motion_notify_event', self._on_move),
+            canvas.mpl_connect('axes_leave_event', self._on_leave),
+        ]
+
+    @property
+    def motion_cid(self) -> int:
+        """Connection id dell'evento di movimento (per il codice che disconnette solo quello)"""
+        return self._cids[1]
+
+    def _make_annotation(self, style: Optional[Dict[str, Any]]):
+        """Annotazione persistente e invisibile; animata (esclusa dal draw normale) se si usa il blit"""
+        ann = self.ax.annotate('', xy=(0, 0), textcoords='offset points', **(style or {}))
+        ann.set_animated(self._use_blit)
+        ann.set_visible(False)
+        return ann
+
+    def _artists(self):
+        # Dopo ax.clear() le annotazioni non appartengono più all'asse
+        return [a for a in (self.curve_ann, self.point_ann) if a is not None and a in self.ax.texts]
+
+    def curve_value(self, x: float) -> float:
+        """Valore della curva in x: searchsorted sulla griglia e interpolazione lineare in log t"""
+        grid = self.t_grid
+        if not grid[0] <= x <= grid[-1]:
+            # Fuori dalla griglia (zoom oltre i limiti iniziali): valutazione diretta
+            return float(np.asarray(self.curve(np.array([x])), dtype=float)[0])
+        i = int(np.clip(np.searchsorted(grid, x), 1, len(grid) - 1))
+        t0, t1 = grid[i - 1], grid[i]
+        w = (np.log(x) - np.log(t0)) / (np.log(t1) - np.log(t0))
+        return float(self.curve_grid[i - 1] + w * (self.curve_grid[i] - self.curve_grid[i - 1]))
+
+    def nearest_point(self, x: float) -> Optional[int]:
+        """Indice (nei punti ordinati) del punto più vicino in x, o None se oltre max_point_distance"""
+        n = len(self.x_points)
+        if n == 0:
+            return None
+        i = int(np.searchsorted(self.x_points, x))
+        candidates = [j for j in (i - 1, i) if 0 <= j < n]
+        best = min(candidates, key=lambda j: abs(self.x_points[j] - x))
+        return best if abs(self.x_points[best] - x) < self.max_point_distance else None
+
+    def _on_draw(self, event) -> None:
+        """Dopo ogni draw completo (resize, zoom, tema) salva lo sfondo senza le annotazioni"""
+        if self._use_blit:
+            self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+            # Il canvas sta già per essere mostrato: basta disegnarci sopra le annotazioni
+            for artist in self._artists():
+                if artist.get_visible():
+                    self.ax.draw_artist(artist)
+
+    def _on_move(self, event) -> None:
+        if event.inaxes is not self.ax or event.xdata is None:
+            self._on_leave(event)
+            return
+        now = time.perf_counter()
+        if now - self._last_update < self.min_interval:
+            return
+        self._last_update = now
+
+        x_mouse = event.xdata
+        if self.curve_ann is not None:
+            y_curve = self.curve_value(x_mouse)
+            self.curve_ann.xy = (x_mouse, y_curve)
+            self.curve_ann.set_text(self.curve_label(x_mouse, y_curve))
+            self.curve_ann.set_visible(True)
+
+        idx = self.nearest_point(x_mouse)
+        if idx is None:
+            self.point_ann.set_visible(False)
+        else:
+            x_point, y_point = self.x_points[idx], self.y_points[idx]
+            self.point_ann.xy = (x_point, y_point)
+            self.point_ann.set_text(self.point_label(x_point, y_point))
+            self.point_ann.set_visible(True)
+        self._blit()
+
+    def _on_leave(self, event) -> None:
+        if any(a.get_visible() for a in self._artists()):
+            for artist in self._artists():
+                artist.set_visible(False)
+            self._blit()
+
+    def _blit(self) -> None:
+        """Ridisegna solo le annotazioni sopra lo sfondo salvato (draw_idle se il backend non supporta blit)"""
+        if not self._use_blit or self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        for artist in self._artists():
+            if artist.get_visible():
+                self.ax.draw_artist(artist)
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def disconnect(self) -> None:
+        """Scollega gli eventi e rimuove le annotazioni"""
+        for cid in self._cids:
+            self.canvas.mpl_disconnect(cid)
+        self._cids = []
+        for artist in self._artists():
+            try:
+                artist.remove()
+            except (ValueError, NotImplementedError, AttributeError):
+                # Già rimossa da ax.clear()
+                pass
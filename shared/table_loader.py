@@ -0,0 +1,122 @@
+# ==============================================================================
+# Copyright (c) 2026 Andrea Bonvicin - bFactor Project
+# PROPRIETARY LICENSE - TUTTI I DIRITTI RISERVATI
+# Sharing, distribution or reproduction is strictly prohibited.
+# La condivisione, distribuzione o riproduzione è severamente vietata.
+# ==============================================================================
+
+"""
+SHARED TABLE LOADER - Lettura veloce di due colonne da CSV, XLSX e XLSM
+Workbook aperti una volta in sola lettura, CSV con dialetto stimato su un campione e parser C
+"""
+
+import csv
+import importlib.util
+import logging
+import os
+from typing import List
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Campione dall'inizio del CSV per stimare il dialetto (csv.Sniffer è più che
+# lineare sulla dimensione del campione: poche righe bastano)
+SNIFF_SAMPLE_BYTES = 8 * 1024
+SNIFF_SAMPLE_LINES = 50
+# Foglio preferito nelle cartelle di lavoro WKO (.xlsm)
+SUMMARY_SHEET = "Summary Sheet"
+# Engine pandas per i CSV: pyarrow se installato, altrimenti il parser C
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+def sniff_csv_dialect(file_path: str, sample_bytes: int = SNIFF_SAMPLE_BYTES) -> csv.Dialect:
+    """
+    Dialetto del CSV stimato solo sulle prime righe del file.
+
+    Args:
+        file_path: Percorso del file
+        sample_bytes: Dimensione massima del campione (al più SNIFF_SAMPLE_LINES righe)
+
+    Returns:
+        Dialetto csv (virgola se la stima fallisce, es. file a una colonna)
+    """
+    with open(file_path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+        sample = f.read(sample_bytes)
+    # L'ultima riga del campione può essere troncata
+    if len(sample) == sample_bytes and '\n' in sample:
+        sample = sample[:sample.rfind('\n')]
+    sample = '\n'.join(sample.splitlines()[:SNIFF_SAMPLE_LINES])
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        return csv.excel
+
+
+def read_csv_columns(file_path: str) -> List[str]:
+    """Nomi delle colonne del CSV (legge solo l'intestazione)"""
+    dialect = sniff_csv_dialect(file_path)
+    header = pd.read_csv(file_path, sep=dialect.delimiter, quotechar=dialect.quotechar,
+                         nrows=0, encoding='utf-8-sig', engine='c')
+    return header.columns.tolist()
+
+
+def _read_csv(file_path: str, col_a: int, col_b: int) -> pd.DataFrame:
+    """Due colonne del CSV (prima riga = intestazione, come pd.read_csv)"""
+    dialect = sniff_csv_dialect(file_path)
+    return pd.read_csv(file_path, sep=dialect.delimiter, quotechar=dialect.quotechar,
+                       usecols=sorted({col_a, col_b}), encoding='utf-8-sig', engine=CSV_ENGINE)
+
+
+def _read_workbook(file_path: str, col_a: int, col_b: int, prefer_summary: bool) -> pd.DataFrame:
+    """
+    Due colonne del primo foglio (o di SUMMARY_SHEET) senza intestazione.
+
+    Il workbook è aperto una sola volta in modalità read-only (streaming delle
+    righe, nessun caricamento di stili e formule) e si leggono solo le colonne
+    comprese tra le due richieste.
+    """
+    from openpyxl import load_workbook
+
+    first, last = min(col_a, col_b), max(col_a, col_b)
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        if prefer_summary and SUMMARY_SHEET in workbook.sheetnames:
+            sheet = workbook[SUMMARY_SHEET]
+        else:
+            sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(min_col=first + 1, max_col=last + 1, values_only=True)
+        values = [(row[col_a - first], row[col_b - first]) for row in rows if row]
+    finally:
+        workbook.close()
+    columns = [col_a, col_b] if col_a != col_b else [col_a, f"{col_b}_"]
+    return pd.DataFrame(values, columns=columns)
+
+
+def read_two_columns(file_path: str, time_col_idx: int = 0, power_col_idx: int = 1) -> pd.DataFrame:
+    """
+    Legge le colonne tempo e potenza da CSV, XLSX o XLSM.
+
+    Args:
+        file_path: Percorso del file
+        time_col_idx: Indice della colonna tempo
+        power_col_idx: Indice della colonna potenza
+
+    Returns:
+        DataFrame con colonne 't' e 'P' ancora da convertire in numeri
+
+    Raises:
+        ValueError: se il formato non è supportato
+    """
+    file_path = str(file_path)
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in (".xlsm", ".xlsx"):
+        df = _read_workbook(file_path, time_col_idx, power_col_idx, prefer_summary=(ext == ".xlsm"))
+        return pd.DataFrame({'t': df.iloc[:, 0].to_numpy(), 'P': df.iloc[:, 1].to_numpy()})
+    if ext == ".csv":
+        df = _read_csv(file_path, time_col_idx, power_col_idx)
+        # usecols restituisce le colonne in ordine di file: si rimappa per indice
+        positions = {idx: pos for pos, idx in enumerate(sorted({time_col_idx, power_col_idx}))}
+        return pd.DataFrame({'t': df.iloc[:, positions[time_col_idx]].to_numpy(),
+                             'P': df.iloc[:, positions[power_col_idx]].to_numpy()})
+    raise ValueError(f"Formato file non supportato: {ext}")